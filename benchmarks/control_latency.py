@@ -0,0 +1,123 @@
+# benchmarks/control_latency.py
+"""
+Плеер без GUI (headless.py --null): задержка ответа на команды через сокет
+и память процесса в сравнении с GUI (offscreen, пустой плейлист).
+
+    python benchmarks/control_latency.py --requests 1000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixtures import write_mp3
+from core.control_client import ControlClient
+
+# GUI после первой отрисовки и открытия аудио-устройства (оно открывается в фоне)
+GUI_SCRIPT = """
+import sys, time
+from PyQt6.QtWidgets import QApplication
+from gui.main_window import MainWindow
+from core.music_player import MusicPlayer
+app = QApplication(sys.argv)
+window = MainWindow(MusicPlayer())
+window.show()
+deadline = time.monotonic() + 2
+while time.monotonic() < deadline:
+    app.processEvents()
+    time.sleep(0.01)
+print(open("/proc/self/status").read())
+"""
+
+
+def rss_kb(status_text):
+    """VmRSS из /proc/<pid>/status"""
+    for line in status_text.splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+    return None
+
+
+def wait_for_socket(path, process, timeout=30):
+    """Дождаться, пока сервер создаст сокет"""
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("плеер не запустился")
+        time.sleep(0.02)
+
+
+def percentiles(samples):
+    """Медиана, 95-й процентиль и максимум в миллисекундах"""
+    samples = sorted(samples)
+    return {"p50_ms": round(statistics.median(samples) * 1000, 3),
+            "p95_ms": round(samples[int(len(samples) * 0.95) - 1] * 1000, 3),
+            "max_ms": round(samples[-1] * 1000, 3)}
+
+
+def timed_requests(client, count, command, **arguments):
+    """Время ответа на count одинаковых запросов"""
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = client.request(command, **arguments)
+        samples.append(time.perf_counter() - start)
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="запросов каждого вида")
+    parser.add_argument("--tracks", type=int, default=5, help="треков в очереди")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index in range(args.tracks):
+            paths.append(os.path.join(directory, f"{index:03d}.mp3"))
+            write_mp3(paths[-1], seconds=30.0, title=f"Track {index}")
+        socket_path = os.path.join(directory, "player.sock")
+        env = dict(os.environ, MUSIC_PLAYER_DATA_DIR=os.path.join(directory, "data"))
+
+        started = time.perf_counter()
+        daemon = subprocess.Popen([sys.executable, os.path.join(ROOT, "headless.py"), "--null", "--no-store",
+                                   "--socket", socket_path], env=env, stdout=subprocess.DEVNULL)
+        try:
+            wait_for_socket(socket_path, daemon)
+            startup = time.perf_counter() - started
+            with ControlClient(socket_path) as client:
+                client.request("enqueue", paths=paths)
+                client.request("play")
+                print(json.dumps({"operation": "startup", "ms": round(startup * 1000, 1)}))
+                print(json.dumps(dict(operation="status", **percentiles(timed_requests(client, args.requests, "status")))))
+                print(json.dumps(dict(operation="seek", **percentiles(
+                    timed_requests(client, args.requests // 10, "seek", position=10.0)))))
+                with open(f"/proc/{daemon.pid}/status") as file:
+                    headless_rss = rss_kb(file.read())
+                client.request("shutdown")
+            daemon.wait(timeout=10)
+        finally:
+            if daemon.poll() is None:
+                daemon.kill()
+
+        gui_env = dict(env, QT_QPA_PLATFORM="offscreen", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+        output = subprocess.run([sys.executable, "-c", GUI_SCRIPT], cwd=ROOT, env=gui_env,
+                                check=True, capture_output=True, text=True).stdout
+        gui_rss = rss_kb(output)
+
+    print(json.dumps({"operation": "memory", "headless_rss_kb": headless_rss, "gui_rss_kb": gui_rss,
+                      "ratio": round(headless_rss / max(gui_rss, 1), 2)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/fixtures.py
+"""
+Генерация синтетических mp3-файлов для бенчмарков.
+Файлы состоят из тега ID3v2.4 и корректных кадров MPEG-1 Layer III
+с нулевыми данными (декодируются как тишина)
+"""
+import os
+import random
+import struct
+import zlib
+
+SAMPLE_RATE = 44100
+SAMPLES_PER_FRAME = 1152
+
+# Индексы битрейтов MPEG-1 Layer III (кбит/с)
+BITRATE_INDEX = {32: 1, 40: 2, 48: 3, 56: 4, 64: 5, 80: 6, 96: 7, 112: 8,
+                 128: 9, 160: 10, 192: 11, 224: 12, 256: 13, 320: 14}
+
+_cover_cache = {}
+
+
+def _synchsafe(value):
+    """Целое число в формате synchsafe (7 бит на байт)"""
+    return bytes([(value >> 21) & 0x7F, (value >> 14) & 0x7F, (value >> 7) & 0x7F, value & 0x7F])
+
+
+def _id3_frame(frame_id, payload):
+    """Кадр ID3v2.4"""
+    return frame_id.encode("ascii") + _synchsafe(len(payload)) + b"\x00\x00" + payload
+
+
+def _text_frame(frame_id, text):
+    """Текстовый кадр ID3v2.4 в UTF-8"""
+    return _id3_frame(frame_id, b"\x03" + text.encode("utf-8"))
+
+
+def make_cover(size=300, color=(200, 80, 40)):
+    """Однотонная PNG-картинка для обложки"""
+    key = (size, color)
+    if key not in _cover_cache:
+        row = b"\x00" + bytes(color) * size
+        raw = zlib.compress(row * size, 9)
+
+        def chunk(kind, data):
+            return (struct.pack(">I", len(data)) + kind + data
+                    + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+        _cover_cache[key] = (b"\x89PNG\r\n\x1a\n"
+                             + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+                             + chunk(b"IDAT", raw) + chunk(b"IEND", b""))
+    return _cover_cache[key]
+
+
+def make_id3(title, artist, album, cover=None):
+    """Тег ID3v2.4 с названием, исполнителем, альбомом и обложкой"""
+    frames = _text_frame("TIT2", title) + _text_frame("TPE1", artist) + _text_frame("TALB", album)
+    if cover is not None:
+        frames += _id3_frame("APIC", b"\x03image/png\x00\x03cover\x00" + cover)
+    return b"ID3\x04\x00\x00" + _synchsafe(len(frames)) + frames
+
+
+def _frame_header(bitrate, padding=0):
+    """Заголовок кадра MPEG-1 Layer III, 44100 Гц, стерео"""
+    return bytes([0xFF, 0xFB, (BITRATE_INDEX[bitrate] << 4) | (padding << 1), 0x00])
+
+
+def _frame_size(bitrate, padding=0):
+    """Размер кадра в байтах"""
+    return 144 * bitrate * 1000 // SAMPLE_RATE + padding
+
+
+def make_audio(seconds, vbr=False, rng=None):
+    """Поток кадров MPEG длительностью seconds (VBR - с заголовком Xing)"""
+    rng = rng or random.Random(0)
+    count = max(1, int(seconds * SAMPLE_RATE / SAMPLES_PER_FRAME))
+    frames = []
+    accumulator = 0
+    for _ in range(count):
+        bitrate = rng.choice((96, 128, 160, 192)) if vbr else 128
+        # Padding по той же схеме, что у кодировщиков: средний размер кадра точный
+        accumulator += 144 * bitrate * 1000 % SAMPLE_RATE
+        padding = 1 if accumulator >= SAMPLE_RATE else 0
+        accumulator -= SAMPLE_RATE * padding
+        frames.append(_frame_header(bitrate, padding) + bytes(_frame_size(bitrate, padding) - 4))
+
+    if not vbr:
+        return b"".join(frames)
+
+    # Первый кадр с заголовком Xing: число кадров, байт и таблица TOC
+    audio_bytes = sum(len(frame) for frame in frames)
+    offsets = []
+    position = 0
+    for frame in frames:
+        offsets.append(position)
+        position += len(frame)
+    toc = bytes(min(255, offsets[min(count - 1, i * count // 100)] * 256 // audio_bytes) for i in range(100))
+    xing = b"Xing" + struct.pack(">II", 0x0F, count) + struct.pack(">I", audio_bytes) + toc + struct.pack(">I", 50)
+    info_frame = _frame_header(128) + bytes(32) + xing
+    info_frame += bytes(_frame_size(128) - len(info_frame))
+    return info_frame + b"".join(frames)
+
+
+def write_mp3(path, seconds=3.0, title="Title", artist="Artist", album="Album",
+              cover=False, vbr=False, rng=None):
+    """Записать синтетический mp3-файл"""
+    with open(path, "wb") as f:
+        f.write(make_id3(title, artist, album, make_cover() if cover else None))
+        f.write(make_audio(seconds, vbr=vbr, rng=rng))
+    return path
+
+
+def make_library(directory, count, seconds=3.0, cover_every=10, vbr_every=3, seed=0):
+    """
+    Создать библиотеку из count синтетических файлов в directory.
+    Возвращает список путей
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    artists = [f"Исполнитель {i}" for i in range(max(1, count // 50))]
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"track_{i:06d}.mp3")
+        if not os.path.exists(path):
+            artist = artists[i % len(artists)]
+            write_mp3(path, seconds=seconds, title=f"Трек {i}", artist=artist,
+                      album=f"{artist} - альбом {i % 5}", cover=(cover_every and i % cover_every == 0),
+                      vbr=(vbr_every and i % vbr_every == 0), rng=rng)
+        paths.append(path)
+    return paths
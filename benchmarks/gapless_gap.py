@@ -0,0 +1,100 @@
+# benchmarks/gapless_gap.py
+"""
+Измерение паузы между треками: переход через очередь движка (MusicPlayer.update)
+против прежней схемы - опрос раз в 500 мс, затем stop() и play() следующего трека.
+
+Пауза = прошедшее время - длительность первого трека - позиция во втором треке.
+Запускается с фиктивным аудиоустройством SDL, которое выводит звук примерно в реальном
+времени; небольшие отрицательные значения - расхождение его часов с системными.
+Устройство открывается заранее, а первый прогон каждого режима отбрасывается (разогрев),
+выводится медиана прогонов.
+
+    python benchmarks/gapless_gap.py --seconds 3 --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from fixtures import write_mp3
+from core.music_player import MusicPlayer
+from core.mp3_engine import MP3Engine
+from core.seek_index import SeekIndex
+
+POLL_INTERVAL = 1 / 60  # Частота часов позиции в GUI
+
+
+def gapless_gap(player, first_duration):
+    """Пауза при переходе через очередь движка"""
+    player.set_track(0)
+    start = time.perf_counter()
+    player.play()
+    while player.get_current_track_index() == 0:
+        player.update()
+        time.sleep(POLL_INTERVAL)
+    elapsed = time.perf_counter() - start
+    gap = elapsed - first_duration - player.get_position()
+    player.stop()
+    return gap
+
+
+def legacy_gap(engine, first, second, first_duration):
+    """Пауза при прежней схеме: опрос раз в 500 мс и отложенный на 500 мс запуск"""
+    start = time.perf_counter()
+    engine.play(first)
+    while engine.is_playing():
+        time.sleep(0.5)
+    time.sleep(0.5)
+    engine.stop()
+    engine.play(second)
+    time.sleep(POLL_INTERVAL)
+    elapsed = time.perf_counter() - start
+    gap = elapsed - first_duration - engine.get_position()
+    engine.stop()
+    return gap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3.0, help="длительность тестовых треков")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="music_player_gap_")
+    first = write_mp3(os.path.join(directory, "first.mp3"), seconds=args.seconds, title="first")
+    second = write_mp3(os.path.join(directory, "second.mp3"), seconds=args.seconds, title="second")
+    first_duration = SeekIndex.build(first).duration
+
+    player = MusicPlayer()
+    player.add_tracks([first, second])
+    engine = MP3Engine()
+    # Открытие устройства при первом воспроизведении не входит в паузу между треками
+    player.prepare_audio()
+    engine.prepare()
+
+    for mode in ("gapless", "legacy"):
+        gaps = []
+        for _ in range(args.runs + 1):
+            if mode == "gapless":
+                gaps.append(gapless_gap(player, first_duration))
+            else:
+                gaps.append(legacy_gap(engine, first, second, first_duration))
+        gaps = gaps[1:]  # Разогрев
+        print(json.dumps({
+            "mode": mode,
+            "gap_ms_median": round(statistics.median(gaps) * 1000, 1),
+            "gap_ms_max": round(max(gaps) * 1000, 1),
+        }))
+
+
+if __name__ == "__main__":
+    main()
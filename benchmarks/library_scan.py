@@ -0,0 +1,83 @@
+# benchmarks/library_scan.py
+"""
+Обход дерева папок с музыкой: glob.glob(recursive=True) против LibraryScanner
+(первый обход, повторный обход по кэшу папок, только изменения, несколько потоков).
+Дерево из пустых файлов .mp3 и посторонних файлов создается во временной папке.
+
+    python benchmarks/library_scan.py --dirs 1000 --files 30 [--workers 4]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.library_scanner import LibraryScanner
+from core.metadata_cache import MetadataCache
+
+
+def make_tree(root, dirs, files):
+    """Исполнитель/альбом/треки; время изменения папок отодвигается в прошлое, чтобы их можно было кэшировать"""
+    past = time.time() - 3600
+    created = []
+    for i in range(dirs):
+        album = os.path.join(root, f"artist_{i // 10:04d}", f"album_{i:05d}")
+        os.makedirs(album)
+        for j in range(files):
+            open(os.path.join(album, f"{j:02d} track.mp3"), "wb").close()
+        open(os.path.join(album, "cover.jpg"), "wb").close()
+        created.append(album)
+    for directory in created + [os.path.dirname(path) for path in created] + [root]:
+        os.utime(directory, (past, past))
+    return dirs * files
+
+
+def run(label, scanner, roots, **kwargs):
+    """Обойти дерево и вывести скорость"""
+    found = sum(1 for _ in scanner.scan(roots, **kwargs))
+    print(json.dumps({"mode": label, "files": found, "ms": round(scanner.elapsed() * 1000, 1),
+                      "files_per_second": round(scanner.files_per_second()),
+                      "scanned_dirs": scanner.directories, "cached_dirs": scanner.skipped_directories}))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dirs", type=int, default=1000, help="папок альбомов")
+    parser.add_argument("--files", type=int, default=30, help="треков в папке")
+    parser.add_argument("--workers", type=int, default=4, help="потоков для многопоточного обхода")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp:
+        root = os.path.join(temp, "library")
+        expected = make_tree(root, args.dirs, args.files)
+
+        start = time.perf_counter()
+        found = len(glob.glob(os.path.join(root, "**", "*.mp3"), recursive=True))
+        elapsed = time.perf_counter() - start
+        print(json.dumps({"mode": "glob_recursive", "files": found, "ms": round(elapsed * 1000, 1),
+                          "files_per_second": round(found / elapsed)}))
+
+        cache = MetadataCache(os.path.join(temp, "cache.sqlite3"))
+        assert run("scandir_cold", LibraryScanner(cache=cache), root) == expected
+        assert run("scandir_cached", LibraryScanner(cache=cache), root) == expected
+
+        # Новый альбом: повторный обход с changed_only выдает только его файлы
+        album = os.path.join(root, "artist_0000", "album_new")
+        os.makedirs(album)
+        open(os.path.join(album, "01 new.mp3"), "wb").close()
+        run("scandir_changed_only", LibraryScanner(cache=cache), root, changed_only=True)
+
+        threaded_cache = MetadataCache(os.path.join(temp, "threaded.sqlite3"))
+        run(f"threads_{args.workers}_cold", LibraryScanner(args.workers, cache=threaded_cache), root)
+        run(f"threads_{args.workers}_cached", LibraryScanner(args.workers, cache=threaded_cache), root)
+        cache.close()
+        threaded_cache.close()
+
+
+if __name__ == "__main__":
+    main()
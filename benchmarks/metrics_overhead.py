@@ -0,0 +1,62 @@
+# benchmarks/metrics_overhead.py
+"""
+Цена замеров core.metrics на горячем пути: пара start() + observe_since()
+и Counter.inc() с выключенными и включенными метриками (нс на вызов),
+а также создание Track с кэшем метаданных в обоих режимах.
+
+    python benchmarks/metrics_overhead.py [--calls 1000000] [--size 2000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import make_library
+from core import metrics
+
+
+def per_call_ns(function, calls):
+    """Среднее время одного вызова в наносекундах"""
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return round((time.perf_counter() - start) * 1e9 / calls, 1)
+
+
+def report(operation, **values):
+    """Строка результата в формате JSON"""
+    print(json.dumps({"operation": operation, **values}, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1000000, help="вызовов в микро-замерах")
+    parser.add_argument("--size", type=int, default=2000, help="треков в замере создания Track")
+    args = parser.parse_args()
+
+    histogram = metrics.histogram("bench_latency_seconds", "Замер для бенчмарка")
+    counter = metrics.counter("bench_events_total", "Счетчик для бенчмарка")
+    timing = lambda: histogram.observe_since(metrics.start())
+
+    os.environ.setdefault("MUSIC_PLAYER_CACHE_DIR", tempfile.mkdtemp())
+    from core.track import Track
+    paths = make_library(os.path.join(tempfile.gettempdir(), "music_player_suite_1s"), args.size, seconds=1.0)
+    [Track(path) for path in paths]  # Заполняем кэш метаданных
+
+    for enabled in (False, True):
+        metrics.set_enabled(enabled)
+        start = time.perf_counter()
+        [Track(path) for path in paths]
+        tracks_ms = round((time.perf_counter() - start) * 1000, 2)
+        report("metrics", enabled=enabled, timing_ns=per_call_ns(timing, args.calls),
+               counter_ns=per_call_ns(counter.inc, args.calls), tracks_ms=tracks_ms)
+
+
+if __name__ == "__main__":
+    main()
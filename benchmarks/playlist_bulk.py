@@ -0,0 +1,131 @@
+# benchmarks/playlist_bulk.py
+"""
+Пакетные операции плейлиста против поштучных:
+удаление выбранных треков (remove_track в цикле против remove_many),
+вставка в середину (по одному треку против insert_many), перенос и перестановка.
+Треки ленивые, файлы не нужны. Считается и число событий CHANGED.
+С --view к плейлисту подключается модель PlaylistModel с QTableView (offscreen):
+в замер входит и обработка событий представлением.
+
+    python benchmarks/playlist_bulk.py --size 100000 --selected 10000 [--view]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.playlist import Playlist
+from core.track import Track
+
+
+VIEW = None  # Таблица с моделью плейлиста, если замер идет с представлением
+
+
+def make_playlist(tracks):
+    """Плейлист из готовых треков со счетчиком событий"""
+    playlist = Playlist("bench")
+    playlist.append_tracks(tracks)
+    events = []
+    playlist.subscribe(Playlist.CHANGED, lambda *args: events.append(args[1]))
+    if VIEW is not None:
+        model = VIEW.model()
+        model.set_playlist(playlist)
+        playlist.subscribe(Playlist.CHANGED, model.apply_change)
+    return playlist, events
+
+
+def create_view():
+    """Таблица с моделью плейлиста на платформе offscreen"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication, QTableView
+    from gui.playlist_model import PlaylistModel
+
+    global APP, VIEW
+    APP = QApplication(sys.argv)
+    VIEW = QTableView()
+    VIEW.setModel(PlaylistModel(VIEW))
+    VIEW.resize(800, 600)
+    VIEW.show()
+
+
+def select_rows(rows):
+    """Выделить строки в таблице, как перед удалением в PlaylistView"""
+    if VIEW is None:
+        return
+    from PyQt6.QtCore import QItemSelection, QItemSelectionModel
+
+    model = VIEW.model()
+    selection = QItemSelection()
+    for row in rows:
+        selection.select(model.index(row, 0), model.index(row, model.columnCount() - 1))
+    VIEW.selectionModel().select(selection, QItemSelectionModel.SelectionFlag.ClearAndSelect)
+
+
+def timed(function):
+    """Время выполнения в миллисекундах"""
+    start = time.perf_counter()
+    function()
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000, help="треков в плейлисте")
+    parser.add_argument("--selected", type=int, default=10000, help="удаляемых/вставляемых треков")
+    parser.add_argument("--view", action="store_true", help="учитывать обработку событий моделью и таблицей")
+    args = parser.parse_args()
+    if args.view:
+        create_view()
+
+    rng = random.Random(0)
+    tracks = [Track(f"/music/track_{i:06d}.mp3", lazy=True) for i in range(args.size)]
+    extra = [Track(f"/music/extra_{i:06d}.mp3", lazy=True) for i in range(args.selected)]
+    selected = rng.sample(range(args.size), args.selected)
+
+    playlist, events = make_playlist(tracks)
+    select_rows(selected)
+
+    def remove_one_by_one():
+        for index in sorted(selected, reverse=True):
+            playlist.remove_track(index)
+    legacy = timed(remove_one_by_one)
+    print(json.dumps({"operation": "remove", "mode": "remove_track", "ms": legacy, "events": len(events)}))
+
+    playlist, events = make_playlist(tracks)
+    select_rows(selected)
+    batched = timed(lambda: playlist.remove_many(selected))
+    print(json.dumps({"operation": "remove", "mode": "remove_many", "ms": batched, "events": len(events),
+                      "speedup": round(legacy / max(batched, 0.01), 1)}))
+
+    middle = args.size // 2
+    playlist, events = make_playlist(tracks)
+
+    def insert_one_by_one():
+        for offset, track in enumerate(extra):
+            playlist.get_tracks().insert(middle + offset, track)  # Прежний способ: вставка по одному
+            playlist._notify(Playlist.CHANGED, playlist, Playlist.INSERTED, [(middle + offset, 1)])
+    legacy = timed(insert_one_by_one)
+    print(json.dumps({"operation": "insert", "mode": "insert", "ms": legacy, "events": len(events)}))
+
+    playlist, events = make_playlist(tracks)
+    batched = timed(lambda: playlist.insert_many(middle, extra))
+    print(json.dumps({"operation": "insert", "mode": "insert_many", "ms": batched, "events": len(events),
+                      "speedup": round(legacy / max(batched, 0.01), 1)}))
+
+    playlist, events = make_playlist(tracks)
+    moved = timed(lambda: playlist.move_range(0, args.selected, args.size - args.selected))
+    print(json.dumps({"operation": "move", "mode": "move_range", "ms": moved, "events": len(events)}))
+
+    order = list(range(args.size))
+    rng.shuffle(order)
+    playlist, events = make_playlist(tracks)
+    reordered = timed(lambda: playlist.reorder(order))
+    print(json.dumps({"operation": "reorder", "mode": "reorder", "ms": reordered, "events": len(events)}))
+
+
+if __name__ == "__main__":
+    main()
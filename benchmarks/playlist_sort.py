@@ -0,0 +1,91 @@
+# benchmarks/playlist_sort.py
+"""
+Сортировка плейлиста по столбцам: первая сортировка (вычисление ключей),
+повторные сортировки по готовым ключам, сортировка по нескольким столбцам.
+Для сравнения - сортировка копии списка треков с приведением строк
+при каждом сравнении ключей. С --view замеряется сортировка модели
+PlaylistModel с QTableView (offscreen) и выделенными строками.
+
+    python benchmarks/playlist_sort.py --size 100000 [--view]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.search_latency import make_tracks
+from core.collation import fold
+from core.playlist import Playlist
+
+
+def timed(function):
+    """Время выполнения в миллисекундах"""
+    start = time.perf_counter()
+    function()
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def report(operation, ms, **extra):
+    """Строка результата в формате JSON"""
+    print(json.dumps({"operation": operation, "ms": ms, **extra}, ensure_ascii=False))
+
+
+def bench_view(playlist):
+    """Сортировка через модель таблицы: щелчки по заголовкам"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtCore import Qt, QItemSelection, QItemSelectionModel
+    from PyQt6.QtWidgets import QApplication, QTableView
+    from gui.playlist_model import PlaylistModel
+
+    app = QApplication(sys.argv)
+    view = QTableView()
+    model = PlaylistModel(view)
+    view.setModel(model)
+    view.resize(800, 600)
+    view.show()
+    model.set_playlist(playlist)
+
+    selection = QItemSelection()
+    for row in random.Random(1).sample(range(playlist.size()), 100):
+        selection.select(model.index(row, 0), model.index(row, model.columnCount() - 1))
+    view.selectionModel().select(selection, QItemSelectionModel.SelectionFlag.ClearAndSelect)
+
+    for column, order in ((PlaylistModel.ALBUM, Qt.SortOrder.AscendingOrder),
+                          (PlaylistModel.ARTIST, Qt.SortOrder.AscendingOrder),
+                          (PlaylistModel.ARTIST, Qt.SortOrder.DescendingOrder),
+                          (PlaylistModel.DURATION, Qt.SortOrder.AscendingOrder),
+                          (-1, Qt.SortOrder.AscendingOrder)):
+        ms = timed(lambda: view.sortByColumn(column, order))
+        app.processEvents()
+        report("view_sort", ms, column=column, descending=order == Qt.SortOrder.DescendingOrder,
+               selected=len(view.selectionModel().selectedRows()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000, help="треков в плейлисте")
+    parser.add_argument("--view", action="store_true", help="замерить сортировку модели таблицы")
+    args = parser.parse_args()
+
+    playlist = Playlist("bench")
+    playlist.append_tracks(make_tracks(args.size, random.Random(0)))
+    tracks = playlist.get_tracks()
+
+    multi = [("artist", False), ("album", False), ("title", False)]
+    report("copy_sort_folding", timed(lambda: sorted(
+        tracks, key=lambda track: (fold(track.artist), fold(track.album), fold(track.title)))), columns=3)
+    report("first_sort", timed(lambda: playlist.sort_order(multi)), columns=3)
+    report("resort", timed(lambda: playlist.sort_order(multi)), columns=3)
+    report("resort", timed(lambda: playlist.sort_order([("title", True)])), columns=1)
+    report("resort", timed(lambda: playlist.sort_order([("duration", False), ("artist", False)])), columns=2)
+
+    if args.view:
+        bench_view(playlist)
+
+
+if __name__ == "__main__":
+    main()
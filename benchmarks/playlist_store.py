@@ -0,0 +1,82 @@
+# benchmarks/playlist_store.py
+"""
+Хранилище плейлистов: первое сохранение, загрузка при старте и
+инкрементальные сохранения после типичных правок (добавление в конец,
+удаление, перенос, переименование). Пути синтетические, файлы не нужны.
+
+    python benchmarks/playlist_store.py --playlists 100 --tracks 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.playlist_manager import PlaylistManager
+from core.playlist_store import PlaylistStore
+from core.track import Track
+
+
+def timed(function):
+    """Результат и время выполнения в миллисекундах"""
+    start = time.perf_counter()
+    result = function()
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+
+def report(operation, ms, **extra):
+    """Строка результата в формате JSON"""
+    print(json.dumps({"operation": operation, "ms": ms, **extra}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--playlists", type=int, default=100, help="количество плейлистов")
+    parser.add_argument("--tracks", type=int, default=5000, help="треков в каждом плейлисте")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as temp:
+        db_path = os.path.join(temp, "playlists.sqlite3")
+        manager = PlaylistManager()
+        manager.set_playlists([])
+        for p in range(args.playlists):
+            manager.create_playlist(f"Плейлист {p}")
+            manager.get_playlist(p).append_tracks(
+                Track(f"/home/user/Музыка/Исполнитель {p:03d}/Альбом {i // 12:04d}/{i % 12 + 1:02d} Трек {i}.mp3",
+                      lazy=True) for i in range(args.tracks))
+
+        store = PlaylistStore(db_path)
+        chunks, ms = timed(lambda: store.save(manager, 0))
+        report("first_save", ms, chunks=chunks, entries=args.playlists * args.tracks,
+               db_mb=round(os.path.getsize(db_path) / 2**20, 1))
+
+        playlist = manager.get_playlist(0)
+        playlist.append_tracks([Track(f"/new/{i}.mp3", lazy=True) for i in range(20)])
+        chunks, ms = timed(lambda: store.save(manager, 0))
+        report("save_after_append", ms, chunks=chunks)
+
+        playlist.remove_many(rng.sample(range(playlist.size()), 10))
+        chunks, ms = timed(lambda: store.save(manager, 0))
+        report("save_after_scattered_remove", ms, chunks=chunks)
+
+        manager.get_playlist(1).move_range(0, 100, 2000)
+        manager.get_playlist(2).name = "Переименован"
+        chunks, ms = timed(lambda: store.save(manager, 5))
+        report("save_after_move_and_rename", ms, chunks=chunks)
+
+        chunks, ms = timed(lambda: store.save(manager, 5))
+        report("save_unchanged", ms, chunks=chunks)
+        store.close()
+
+        loaded, ms = timed(lambda: PlaylistStore(db_path).load())
+        report("load", ms, playlists=len(loaded[0]), entries=sum(p.size() for p in loaded[0]),
+               current_track=loaded[2])
+
+
+if __name__ == "__main__":
+    main()
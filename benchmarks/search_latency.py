@@ -0,0 +1,86 @@
+# benchmarks/search_latency.py
+"""
+Задержка поиска по плейлисту при наборе запроса по букве:
+построение индекса, время ответа на каждое нажатие, обновление индекса
+при добавлении и удалении треков. Метаданные синтетические (латиница,
+кириллица, диакритика), файлы не нужны.
+
+    python benchmarks/search_latency.py --size 200000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.playlist import Playlist
+from core.search_index import SearchIndex
+from core.track import Track
+
+SYLLABLES = ["ка", "ми", "ро", "ла", "зё", "ней", "ва", "ст", "ри", "му",
+             "ba", "lo", "ré", "mi", "sta", "ne", "çö", "ku", "ri", "the", "an", "el"]
+QUERIES = ["ми", "Мира", "ваЛо", "mire", "stane", "ро ка", "Beyonce"]
+
+
+def word(rng):
+    """Случайное слово из 2-4 слогов"""
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def make_tracks(count, rng):
+    """Треки с синтетическими метаданными: исполнителей и альбомов меньше, чем треков"""
+    artists = [" ".join(word(rng) for _ in range(rng.randint(1, 2))) for _ in range(max(1, count // 20))]
+    albums = [" ".join(word(rng) for _ in range(rng.randint(1, 3))) for _ in range(max(1, count // 8))]
+    tracks = []
+    for i in range(count):
+        metadata = {"title": " ".join(word(rng) for _ in range(rng.randint(1, 4))),
+                    "artist": rng.choice(artists), "album": rng.choice(albums),
+                    "duration": 180, "cover_offset": -1, "cover_size": 0}
+        tracks.append(Track(f"/music/{i:06d}.mp3", metadata=metadata))
+    return tracks
+
+
+def timed(function):
+    """Результат и время выполнения в миллисекундах"""
+    start = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=200000, help="треков в плейлисте")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    playlist = Playlist("bench")
+    playlist.append_tracks(make_tracks(args.size, rng))
+
+    index, build_ms = timed(lambda: SearchIndex(playlist))
+    print(json.dumps({"operation": "build", "tracks": args.size, "ms": round(build_ms, 1)}))
+
+    keystrokes = []
+    for query in QUERIES:
+        for length in range(1, len(query) + 1):
+            found, elapsed = timed(lambda: index.search(query[:length]))
+            keystrokes.append(elapsed)
+        print(json.dumps({"operation": "type", "query": query, "results": len(found),
+                          "last_keystroke_ms": round(elapsed, 2)}))
+    keystrokes.sort()
+    print(json.dumps({"operation": "keystrokes", "count": len(keystrokes),
+                      "median_ms": round(keystrokes[len(keystrokes) // 2], 2),
+                      "p95_ms": round(keystrokes[int(len(keystrokes) * 0.95)], 2),
+                      "max_ms": round(keystrokes[-1], 2)}))
+
+    extra = make_tracks(1000, rng)
+    _, insert_ms = timed(lambda: playlist.insert_many(args.size // 2, extra))
+    _, remove_ms = timed(lambda: playlist.remove_many(rng.sample(range(playlist.size()), 1000)))
+    print(json.dumps({"operation": "update", "insert_1000_ms": round(insert_ms, 1),
+                      "remove_1000_ms": round(remove_ms, 1)}))
+
+
+if __name__ == "__main__":
+    main()
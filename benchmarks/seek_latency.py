@@ -0,0 +1,98 @@
+# benchmarks/seek_latency.py
+"""
+Задержка перемотки в зависимости от длины файла:
+перезагрузка трека с play(start=...) против перехода по индексу кадров.
+
+    python benchmarks/seek_latency.py --minutes 1 10 60 120
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from fixtures import write_mp3
+from core.seek_index import SeekIndex, FileSlice
+
+
+def average(values):
+    """Среднее значение в миллисекундах"""
+    return round(sum(values) / len(values) * 1000, 3)
+
+
+def measure(path, seconds, seeks, rng):
+    """Замеры для одного файла"""
+    positions = [rng.uniform(0, seconds * 0.95) for _ in range(seeks)]
+
+    reload_times = []
+    for position in positions:
+        start = time.perf_counter()
+        pygame.mixer.music.stop()
+        pygame.mixer.music.load(path)
+        pygame.mixer.music.play(start=position)
+        reload_times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    index = SeekIndex.build(path)
+    build_time = time.perf_counter() - start
+
+    data = index.to_bytes()
+    start = time.perf_counter()
+    index = SeekIndex.from_bytes(data)
+    load_time = time.perf_counter() - start
+
+    indexed_times = []
+    streams = []
+    for position in positions:
+        start = time.perf_counter()
+        offset, _ = index.locate(position)
+        stream = FileSlice(path, offset)
+        pygame.mixer.music.load(stream, "mp3")
+        pygame.mixer.music.play()
+        indexed_times.append(time.perf_counter() - start)
+        streams.append(stream)
+    pygame.mixer.music.stop()
+    for stream in streams:
+        stream.close()
+
+    return {
+        "index_build_ms": round(build_time * 1000, 3),
+        "index_load_ms": round(load_time * 1000, 3),
+        "index_bytes": len(data),
+        "reload_seek_ms": average(reload_times),
+        "indexed_seek_ms": average(indexed_times),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 10, 60])
+    parser.add_argument("--seeks", type=int, default=20, help="перемоток на файл")
+    parser.add_argument("--directory", default=os.path.join(tempfile.gettempdir(), "music_player_bench_seek"))
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    pygame.mixer.init()
+    rng = random.Random(0)
+
+    for minutes in args.minutes:
+        for vbr in (False, True):
+            path = os.path.join(args.directory, f"{minutes:g}min_{'vbr' if vbr else 'cbr'}.mp3")
+            if not os.path.exists(path):
+                write_mp3(path, seconds=minutes * 60, vbr=vbr)
+            result = {"minutes": minutes, "vbr": vbr, "file_bytes": os.path.getsize(path)}
+            result.update(measure(path, minutes * 60, args.seeks, rng))
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/spectrum_cost.py
+"""
+Цена визуализации спектра: время расчета одного кадра (окно PCM, БПФ, полосы)
+и загрузка процессора при воспроизведении через StreamEngine (приемник без устройства)
+без визуализации, с отводом звучащего PCM (PcmTap) и с декодером по позиции (DecodingSource,
+для движка pygame). Для каждого режима считаются опустошения буфера устройства:
+визуализация не должна их вызывать.
+
+    python benchmarks/spectrum_cost.py [--seconds 10] [--fps 60]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from core.audio_sink import NullSink
+from core.spectrum import SpectrumAnalyzer, PcmTap, DecodingSource
+from core.stream_engine import StreamEngine
+
+
+class CountingSink(NullSink):
+    """Приемник без устройства, считающий опустошения: блок пришел, когда звучать было уже нечему"""
+    def __init__(self):
+        super().__init__()
+        self.underruns = 0
+        self.__started = False
+
+    def write(self, block):
+        if self.__started and self.latency_frames() == 0:
+            self.underruns += 1
+        self.__started = True
+        super().write(block)
+
+    def flush(self):
+        super().flush()
+        self.__started = False
+
+
+def write_noise(path, seconds, sample_rate=44100):
+    """WAV с белым шумом: заполнены все полосы спектра"""
+    noise = np.random.default_rng(0).standard_normal((int(seconds * sample_rate), 2)) * 0.2
+    with wave.open(path, "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((np.clip(noise, -1, 1) * 32767).astype("<i2").tobytes())
+    return path
+
+
+def frame_cost(frames=2000):
+    """Среднее время кадра (мкс): сборка окна из блоков PcmTap с анализом и только анализ"""
+    tap = PcmTap(44100, 2, lambda: StreamEngine.BLOCK_FRAMES)
+    rng = np.random.default_rng(0)
+    for _ in range(PcmTap.HISTORY_BLOCKS):
+        tap.push(rng.standard_normal((StreamEngine.BLOCK_FRAMES, 2)).astype(np.float32) * 0.1)
+    analyzer = SpectrumAnalyzer(tap)  # Поток сразу засыпает: воспроизведения нет
+    window = tap.window(SpectrumAnalyzer.FFT_SIZE, None)
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        analyzer.analyze(tap.window(SpectrumAnalyzer.FFT_SIZE, None))
+    with_window = (time.perf_counter() - start) / frames
+    start = time.perf_counter()
+    for _ in range(frames):
+        analyzer.analyze(window)
+    analysis = (time.perf_counter() - start) / frames
+    analyzer.close()
+    return round(with_window * 1e6, 1), round(analysis * 1e6, 1)
+
+
+def playback(path, seconds, fps, mode):
+    """Воспроизведение seconds секунд; mode: none, tap, decoder"""
+    sink = CountingSink()
+    engine = StreamEngine(sink=sink)
+    analyzer = None
+    if mode == "tap":
+        analyzer = SpectrumAnalyzer(engine.get_pcm_tap(), fps)
+    elif mode == "decoder":
+        analyzer = SpectrumAnalyzer(DecodingSource(), fps)
+    engine.play(path)
+    time.sleep(0.5)  # Разгон: декодер заполняет буфер
+
+    frames = 0
+    sequence = 0
+    cpu = time.process_time()
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        # Как таймер интерфейса: позиция для анализатора и последний кадр
+        if analyzer is not None:
+            analyzer.set_playback(path, engine.get_position(), True)
+            latest, _ = analyzer.latest()
+            frames += latest != sequence
+            sequence = latest
+        time.sleep(1 / fps)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+
+    if analyzer is not None:
+        analyzer.close()
+    engine.close()
+    return {"mode": mode, "cpu_percent": round(cpu / elapsed * 100, 1),
+            "frames_per_second": round(frames / elapsed, 1), "underruns": sink.underruns}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0, help="длительность каждого замера")
+    parser.add_argument("--fps", type=int, default=60)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), "music_player_bench_noise.wav")
+    if not os.path.exists(path):
+        write_noise(path, 60)
+
+    with_window, analysis = frame_cost()
+    print(json.dumps({"operation": "frame", "frame_us": with_window, "analysis_us": analysis,
+                      "fft_size": SpectrumAnalyzer.FFT_SIZE, "bands": SpectrumAnalyzer.BANDS}))
+    for mode in ("none", "tap", "decoder"):
+        print(json.dumps({"operation": "playback", "fps": args.fps, **playback(path, args.seconds, args.fps, mode)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# benchmarks/startup_time.py
+"""
+Время запуска плеера: импорт модулей (python -X importtime -c "import main")
+и время до первой отрисовки главного окна (платформа offscreen).
+Каждый замер - в новом процессе; выводятся медианы.
+
+Для первой отрисовки записывается, какие тяжелые модули (pygame, numpy, mutagen)
+уже загружены, а затем - сколько длится первый play(): аудио-устройство к этому
+моменту должно быть открыто в фоне после отрисовки.
+--tracks заполняет хранилище плейлистов, чтобы учесть восстановление прошлого сеанса.
+--save сохраняет результат, --baseline сравнивает с сохраненным (код возврата 1,
+если время выросло больше чем на --tolerance).
+
+    python benchmarks/startup_time.py --runs 5 [--tracks 100000] [--save startup.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("pygame", "numpy", "mutagen", "concurrent.futures.process", "core.library_watcher")
+PLAY_DELAY = 500  # Через сколько мс после отрисовки запускается первый трек
+
+
+def child_environment(data_dir):
+    """Окружение дочернего процесса: без экрана, без звука и с отдельным хранилищем"""
+    env = dict(os.environ)
+    env.update(QT_QPA_PLATFORM="offscreen", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1",
+               MUSIC_PLAYER_DATA_DIR=data_dir, MUSIC_PLAYER_WATCH="0")
+    return env
+
+
+def measure_imports(env, top):
+    """Разбор вывода -X importtime: общее время import main и самые дорогие модули"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=ROOT, env=env,
+                            check=True, capture_output=True, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules.append((int(cumulative), name.strip()))
+    total = next(cumulative for cumulative, name in modules if name == "main")
+    loaded = {name for _, name in modules}
+    return {
+        "import_ms": round(total / 1000, 1),
+        "heavy": [name for name in HEAVY_MODULES if name in loaded],
+        "top": [[name, round(cumulative / 1000, 1)] for cumulative, name in sorted(modules, reverse=True)[1:top + 1]],
+    }
+
+
+def measure_paint(env, track_path):
+    """Запуск дочернего процесса до первой отрисовки; время от порождения процесса - по часам родителя"""
+    spawned = time.time()
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", track_path, str(spawned)],
+                            cwd=ROOT, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_child(track_path, spawned):
+    """Дочерний процесс: то же, что main.main(), с замерами"""
+    started = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    from PyQt6.QtCore import QEvent, QObject, QTimer
+    from PyQt6.QtWidgets import QApplication
+    from gui.main_window import MainWindow
+    from core.music_player import MusicPlayer
+    from core.playlist_store import PlaylistStore
+    imported = time.perf_counter()
+
+    app = QApplication(sys.argv)
+    player = MusicPlayer(store=PlaylistStore.open_default())
+    window = MainWindow(player)
+    result = {"imports_ms": round((imported - started) * 1000, 1)}
+
+    def first_play():
+        manager = player.get_playlist_manager()
+        manager.create_playlist("startup")
+        manager.set_current_playlist(len(manager.get_playlists()) - 1)
+        player.add_track(track_path)
+        player.set_track(0)
+        start = time.perf_counter()
+        player.play()
+        result["first_play_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        player.stop()
+        app.quit()
+
+    class PaintFilter(QObject):
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Type.Paint and "paint_ms" not in result:
+                result["paint_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                result["process_to_paint_ms"] = round((time.time() - spawned) * 1000, 1)
+                result["heavy_at_paint"] = [name for name in HEAVY_MODULES if name in sys.modules]
+                QTimer.singleShot(PLAY_DELAY, first_play)
+            return False
+
+    paint_filter = PaintFilter()
+    app.installEventFilter(paint_filter)
+    window.show()
+    app.exec()
+    print(json.dumps(result))
+
+
+def prepare_store(data_dir, tracks):
+    """Хранилище с одним плейлистом из tracks ленивых треков"""
+    sys.path.insert(0, ROOT)
+    from core.playlist_manager import PlaylistManager
+    from core.playlist_store import PlaylistStore
+    from core.track import Track
+
+    os.environ["MUSIC_PLAYER_DATA_DIR"] = data_dir
+    store = PlaylistStore.open_default()
+    manager = PlaylistManager()
+    manager.create_playlist("library")
+    manager.get_current_playlist().append_tracks(
+        [Track(f"/music/Artist {i // 100:04d}/Album/{i % 100:02d} Track {i}.mp3", lazy=True) for i in range(tracks)])
+    store.save(manager, 0)
+    store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="запусков каждого замера")
+    parser.add_argument("--tracks", type=int, default=0, help="треков в сохраненном плейлисте")
+    parser.add_argument("--top", type=int, default=10, help="сколько самых дорогих модулей показать")
+    parser.add_argument("--save", help="записать результат в файл JSON")
+    parser.add_argument("--baseline", help="сравнить с результатом из файла JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимый рост времени (доля)")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], float(args.child[1]))
+        return
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from fixtures import write_mp3
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_dir = os.path.join(directory, "data")
+        if args.tracks:
+            prepare_store(data_dir, args.tracks)
+        track_path = os.path.join(directory, "first.mp3")
+        write_mp3(track_path, seconds=2.0)
+        env = child_environment(data_dir)
+
+        imports = [measure_imports(env, args.top) for _ in range(args.runs)]
+        paints = [measure_paint(env, track_path) for _ in range(args.runs)]
+
+    result = {"runs": args.runs, "tracks": args.tracks,
+              "import_ms": statistics.median(run["import_ms"] for run in imports),
+              "heavy_imported": imports[-1]["heavy"], "top_modules": imports[-1]["top"]}
+    for key in ("imports_ms", "paint_ms", "process_to_paint_ms", "first_play_ms"):
+        result[key] = statistics.median(run[key] for run in paints)
+    result["heavy_at_paint"] = paints[-1]["heavy_at_paint"]
+    print(json.dumps(result, ensure_ascii=False))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressed = False
+        for key in ("import_ms", "paint_ms", "process_to_paint_ms"):
+            ratio = result[key] / max(baseline[key], 1e-9)
+            regressed |= ratio > 1 + args.tolerance
+            print(json.dumps({"metric": key, "baseline": baseline[key], "current": result[key],
+                              "ratio": round(ratio, 3)}))
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
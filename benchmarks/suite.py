@@ -0,0 +1,240 @@
+# benchmarks/suite.py
+"""
+Набор замеров горячих путей на синтетических библиотеках mp3 (по умолчанию 1k, 10k и 100k файлов;
+теги ID3v2.4, часть файлов с обложкой, часть - VBR с заголовком Xing, см. fixtures.py):
+
+    tracks          - создание Track: без кэша, с заполненным кэшем метаданных, ленивое
+    add_tracks      - PlaylistManager.add_tracks_to_current_playlist с пустым и с заполненным кэшем
+    remove_tracks   - удаление 10% треков: Playlist.remove_track по одному и remove_many
+    update_playlist - PlaylistView.update_playlist с отрисовкой (Qt offscreen)
+    engine          - get_position (мкс на вызов) и set_position (мс) движков pygame и stream
+
+Каждый замер - отдельный процесс с пустым кэшем метаданных; из --repeat запусков берется медиана.
+Результат - строки JSON; --save записывает его как базовый, --baseline сравнивает с базовым
+(код возврата 1, если какой-то замер медленнее больше чем на --tolerance).
+
+    python benchmarks/suite.py --sizes 1000 10000 --save baseline.json
+    python benchmarks/suite.py --sizes 1000 10000 --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import make_library, write_mp3
+
+SIZES = (1000, 10000, 100000)
+ENGINES = ("pygame", "stream")
+NOISE_FLOOR = 0.1  # Замеры меньше этого значения (мс или мкс) не сравниваются с базовыми
+
+
+def timed(function):
+    """Время выполнения в миллисекундах"""
+    start = time.perf_counter()
+    function()
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def bench_tracks(paths, options):
+    from core.metadata_cache import MetadataCache
+    from core.track import Track
+
+    cache = MetadataCache.get_default()
+    MetadataCache.set_default(None)
+    eager = timed(lambda: [Track(path) for path in paths])
+    MetadataCache.set_default(cache)
+    [Track(path) for path in paths]  # Заполняем кэш
+    cache.flush()
+    cached = timed(lambda: [Track(path) for path in paths])
+    lazy = timed(lambda: [Track(path, lazy=True) for path in paths])
+    return {"eager_ms": eager, "cached_ms": cached, "lazy_ms": lazy}
+
+
+def bench_add_tracks(paths, options):
+    from core.metadata_cache import MetadataCache
+    from core.playlist_manager import PlaylistManager
+
+    manager = PlaylistManager()
+    manager.create_playlist("cold")
+    cold = timed(lambda: manager.add_tracks_to_current_playlist(paths))
+    MetadataCache.get_default().flush()
+    manager.set_current_playlist(manager.create_playlist("warm"))
+    warm = timed(lambda: manager.add_tracks_to_current_playlist(paths))
+    return {"cold_cache_ms": cold, "warm_cache_ms": warm}
+
+
+def bench_remove_tracks(paths, options):
+    from core.playlist import Playlist
+    from core.track import Track
+
+    tracks = [Track(path, lazy=True) for path in paths]
+    selected = random.Random(0).sample(range(len(tracks)), max(1, len(tracks) // 10))
+
+    playlist = Playlist("bench")
+    playlist.append_tracks(tracks)
+
+    def remove_one_by_one():
+        for index in sorted(selected, reverse=True):
+            playlist.remove_track(index)
+    one_by_one = timed(remove_one_by_one)
+
+    playlist = Playlist("bench")
+    playlist.append_tracks(tracks)
+    batched = timed(lambda: playlist.remove_many(selected))
+    return {"remove_track_ms": one_by_one, "remove_many_ms": batched}
+
+
+def bench_update_playlist(paths, options):
+    from PyQt6.QtWidgets import QApplication
+    from core.music_player import MusicPlayer
+    from core.track import Track
+    from gui.player_signals import PlayerSignals
+    from gui.playlist_view import PlaylistView
+
+    app = QApplication(sys.argv)
+    player = MusicPlayer()
+    player.get_current_playlist().append_tracks([Track(path, lazy=True) for path in paths])
+    signals = PlayerSignals(player)
+    view = PlaylistView(player, signals)
+    view.resize(800, 600)
+    view.show()
+    app.processEvents()
+
+    def refresh():
+        view.update_playlist()
+        app.processEvents()  # Отрисовка видимых строк - часть обновления
+    first = timed(refresh)  # Теги видимых треков читаются из файлов
+    repeated = statistics.median(timed(refresh) for _ in range(5))
+    return {"first_ms": first, "repeated_ms": repeated}
+
+
+def bench_engine(paths, options):
+    from core.track import Track
+
+    if options.engine == "stream":
+        from core.audio_sink import NullSink
+        from core.stream_engine import StreamEngine
+        engine = StreamEngine(sink=NullSink())
+    else:
+        from core.mp3_engine import MP3Engine
+        engine = MP3Engine()
+
+    path = os.path.join(tempfile.mkdtemp(), "long.mp3")
+    write_mp3(path, seconds=600.0, vbr=True)
+    duration = Track(path).duration
+    engine.play(path)
+    time.sleep(0.2)
+
+    calls = 10000
+    start = time.perf_counter()
+    for _ in range(calls):
+        engine.get_position()
+    get_position = (time.perf_counter() - start) * 1e6 / calls
+
+    rng = random.Random(0)
+    engine.set_position(duration / 2)  # Первая перемотка строит индекс кадров
+    seeks = [timed(lambda: engine.set_position(rng.uniform(0, duration - 1))) for _ in range(30)]
+    engine.stop()
+    return {"get_position_us": round(get_position, 3), "set_position_ms": statistics.median(seeks)}
+
+
+CASES = {
+    "tracks": bench_tracks,
+    "add_tracks": bench_add_tracks,
+    "remove_tracks": bench_remove_tracks,
+    "update_playlist": bench_update_playlist,
+    "engine": bench_engine,
+}
+SIZED_CASES = ("tracks", "add_tracks", "remove_tracks", "update_playlist")
+
+
+def run_case(case, size, library, engine, seconds):
+    """Один запуск замера в отдельном процессе с пустым кэшем метаданных"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, MUSIC_PLAYER_CACHE_DIR=cache_dir, MUSIC_PLAYER_DATA_DIR=cache_dir,
+                   QT_QPA_PLATFORM="offscreen", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+        command = [sys.executable, os.path.abspath(__file__), "--child", case, "--library", library,
+                   "--sizes", str(size or 0), "--engine", engine, "--seconds", str(seconds)]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """Сравнить с базовыми замерами; возвращает True, если есть замедление"""
+    regressed = False
+    for key, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(key, {}).get(metric)
+            if base is None or max(base, value) < NOISE_FLOOR:
+                continue
+            ratio = value / max(base, 1e-9)
+            slower = ratio > 1 + tolerance
+            regressed |= slower
+            print(json.dumps({"compare": key, "metric": metric, "baseline": base, "current": value,
+                              "ratio": round(ratio, 3), "regressed": slower}))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="размеры библиотек")
+    parser.add_argument("--cases", nargs="+", choices=tuple(CASES), default=list(CASES), help="какие замеры запускать")
+    parser.add_argument("--repeat", type=int, default=3, help="запусков каждого замера")
+    parser.add_argument("--seconds", type=float, default=1.0, help="длительность синтетических треков")
+    parser.add_argument("--library", help="каталог библиотеки (по умолчанию во временном каталоге, переиспользуется)")
+    parser.add_argument("--save", help="записать результат как базовый")
+    parser.add_argument("--baseline", help="сравнить с базовым результатом")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="допустимое замедление (доля)")
+    parser.add_argument("--child", choices=tuple(CASES), help=argparse.SUPPRESS)
+    parser.add_argument("--engine", choices=ENGINES, default="pygame", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    library = args.library or os.path.join(tempfile.gettempdir(), f"music_player_suite_{args.seconds:g}s")
+    if args.child:
+        paths = make_library(library, args.sizes[0], seconds=args.seconds) if args.sizes[0] else []
+        print(json.dumps(CASES[args.child](paths, args)))
+        return
+
+    start = time.perf_counter()
+    make_library(library, max(args.sizes), seconds=args.seconds)
+    print(f"Библиотека {library}: {max(args.sizes)} файлов, {time.perf_counter() - start:.1f} с", file=sys.stderr)
+
+    runs = []
+    for case in args.cases:
+        if case in SIZED_CASES:
+            runs.extend((case, size, "pygame", f"{case}/{size}") for size in sorted(args.sizes))
+        elif case == "engine":
+            runs.extend((case, None, engine, f"{case}/{engine}") for engine in ENGINES)
+
+    results = {}
+    for case, size, engine, key in runs:
+        samples = [run_case(case, size, library, engine, args.seconds) for _ in range(args.repeat)]
+        results[key] = {metric: round(statistics.median(sample[metric] for sample in samples), 3)
+                        for metric in samples[0]}
+        print(json.dumps(dict(case=key, **results[key])))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump({"machine": platform.platform(), "python": platform.python_version(),
+                       "repeat": args.repeat, "results": results}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
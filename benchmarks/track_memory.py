@@ -0,0 +1,88 @@
+# benchmarks/track_memory.py
+"""
+Сравнение памяти и времени создания плейлиста при жадной и ленивой загрузке треков.
+
+    python benchmarks/track_memory.py --count 20000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def measure(mode, library, use_cache):
+    """Создать плейлист в текущем процессе и вернуть замеры"""
+    from core.metadata_cache import MetadataCache
+    from core.playlist import Playlist
+
+    if not use_cache:
+        MetadataCache.set_default(None)
+    paths = sorted(os.path.join(library, name) for name in os.listdir(library))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    playlist = Playlist("bench")
+    for path in paths:
+        playlist.add_track(path, lazy=(mode == "lazy"))
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "mode": mode,
+        "tracks": playlist.size(),
+        "seconds": round(elapsed, 4),
+        "retained_bytes": current,
+        "peak_bytes": peak,
+        "bytes_per_track": current // max(1, playlist.size()),
+    }
+    try:
+        import resource
+        result["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        pass
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10000, help="количество треков")
+    parser.add_argument("--library", help="каталог с синтетической библиотекой")
+    parser.add_argument("--no-cache", action="store_true", help="не использовать кэш метаданных")
+    parser.add_argument("--mode", choices=("eager", "lazy"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Дочерний процесс: один замер в чистом интерпретаторе
+        print(json.dumps(measure(args.mode, args.library, not args.no_cache)))
+        return
+
+    library = args.library or os.path.join(tempfile.gettempdir(), f"music_player_bench_{args.count}")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from fixtures import make_library
+    make_library(library, args.count)
+
+    results = []
+    for mode in ("eager", "lazy"):
+        command = [sys.executable, os.path.abspath(__file__), "--mode", mode, "--library", library]
+        if args.no_cache:
+            command.append("--no-cache")
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    for result in results:
+        print(json.dumps(result))
+    eager, lazy = results
+    print(f"lazy/eager: время {lazy['seconds'] / max(eager['seconds'], 1e-9):.3f}, "
+          f"память {lazy['retained_bytes'] / max(eager['retained_bytes'], 1):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/waveform_overview.py
+"""
+Обзор формы волны для полосы перемотки в зависимости от длины файла:
+предварительный обзор (выборочный просмотр по индексу кадров), полное построение,
+загрузка готового обзора из кэша метаданных и подготовка столбцов под ширину полосы.
+
+    python benchmarks/waveform_overview.py --minutes 5 60 120
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+sys.path.insert(0, ROOT)
+
+from fixtures import write_mp3
+
+WIDTHS = (300, 1000, 4000)  # Ширины полосы в пикселях
+
+
+def elapsed_ms(start):
+    """Время с момента start в миллисекундах"""
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def measure(path):
+    """Замеры для одного файла (с пустым кэшем метаданных)"""
+    from core.metadata_cache import MetadataCache
+    from core.waveform import Waveform, WaveformBuilder
+
+    cache_dir = tempfile.mkdtemp()
+    MetadataCache.set_default(MetadataCache(os.path.join(cache_dir, "cache.db")))
+
+    builder = WaveformBuilder(path)
+    start = time.perf_counter()
+    preview = builder.preview()
+    preview_ms = elapsed_ms(start)
+
+    start = time.perf_counter()
+    waveform = builder.build(preview=preview)
+    build_ms = elapsed_ms(start)
+    waveform.save(path)
+
+    start = time.perf_counter()
+    Waveform.load(path)
+    load_ms = elapsed_ms(start)
+
+    columns_ms = {}
+    for width in WIDTHS:
+        start = time.perf_counter()
+        waveform.columns(width)
+        columns_ms[str(width)] = elapsed_ms(start)
+
+    return {
+        "preview_ms": preview_ms if preview is not None else None,
+        "build_ms": build_ms,
+        "cached_load_ms": load_ms,
+        "columns_ms": columns_ms,
+        "stored_bytes": len(waveform.to_bytes()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[5, 60, 120])
+    parser.add_argument("--directory", default=os.path.join(tempfile.gettempdir(), "music_player_bench_waveform"))
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    for minutes in args.minutes:
+        path = os.path.join(args.directory, f"{minutes:g}min_vbr.mp3")
+        if not os.path.exists(path):
+            write_mp3(path, seconds=minutes * 60, vbr=True)
+        result = {"minutes": minutes, "file_bytes": os.path.getsize(path)}
+        result.update(measure(path))
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -43,4 +43,60 @@ class AudioEngine(ABC):
     @abstractmethod
     def get_volume(self):
         """Получить текущую громкость"""
-        pass
\ No newline at end of file
+        pass
+
+    def prepare(self):
+        """
+        Заранее подготовить устройство вывода (например, открыть его в фоновом потоке),
+        чтобы первое воспроизведение не ждало. По умолчанию ничего не делает
+        """
+        pass
+
+    def queue(self, track_path):
+        """
+        Заранее загрузить следующий трек, чтобы он начался сразу после текущего.
+        track_path = None очищает очередь. Возвращает True, если движок поддерживает очередь
+        """
+        return False
+
+    def poll(self):
+        """
+        Обработать события движка.
+        Возвращает путь трека, который начал играть из очереди, или None
+        """
+        return None
+
+    def fade_to(self, track_path):
+        """
+        Перейти к треку плавно: текущий затухает, новый нарастает.
+        Возвращает False, если движок этого не умеет или переход выключен -
+        тогда трек запускается обычным play
+        """
+        return False
+
+    def set_normalization(self, enabled):
+        """
+        Включить или выключить выравнивание громкости: усиление трека по результату анализа
+        из кэша (loudness.track_gain) применяется при загрузке трека.
+        Возвращает False, если движок этого не умеет
+        """
+        return False
+
+    def get_normalization(self):
+        """Включено ли выравнивание громкости"""
+        return False
+
+    def get_pcm_tap(self):
+        """
+        Отвод звучащего PCM для визуализации (spectrum.PcmTap) или None, если движок
+        не отдает звук (pygame.mixer.music декодирует и выводит файл сам)
+        """
+        return None
+
+    def set_crossfade(self, seconds, curve=None):
+        """Установить длительность (с) и кривую плавного перехода; 0 - без перехода"""
+        return False
+
+    def get_crossfade(self):
+        """Получить (длительность, кривая) плавного перехода"""
+        return 0, None
@@ -0,0 +1,188 @@
+# core/audio_sink.py
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import deque
+import numpy as np
+
+class AudioSink(ABC):
+    """
+    Приемник блоков PCM (NumPy float32, кадры x каналы) для StreamEngine.
+    Поток вывода ждет в wait_ready, пока приемнику нужны данные, и отдает блок в write;
+    latency_frames - сколько отданных кадров еще не прозвучало
+    """
+    POLL_INTERVAL = 0.002  # Период опроса при ожидании места, в секундах
+
+    sample_rate = 44100
+    channels = 2
+
+    @abstractmethod
+    def wait_ready(self, timeout):
+        """Дождаться, пока приемник сможет принять блок; False по таймауту"""
+        pass
+
+    @abstractmethod
+    def write(self, block):
+        """Принять блок (без ожидания)"""
+        pass
+
+    @abstractmethod
+    def latency_frames(self):
+        """Кадров, принятых, но еще не прозвучавших"""
+        pass
+
+    def pause(self):
+        """Приостановить вывод"""
+        pass
+
+    def resume(self):
+        """Продолжить вывод"""
+        pass
+
+    def flush(self):
+        """Отбросить принятые, но не прозвучавшие кадры"""
+        pass
+
+    def close(self):
+        """Освободить устройство вывода"""
+        pass
+
+
+class PygameSink(AudioSink):
+    """
+    Вывод через канал pygame.mixer: каждый блок становится объектом Sound,
+    канал держит один звучащий блок и один в очереди
+    """
+    def __init__(self, frequency=44100, channels=2, buffer=512):
+        import pygame  # Не нужен приемникам без устройства (NullSink)
+        pygame.mixer.init(frequency=frequency, size=-16, channels=channels, buffer=buffer)
+        self.sample_rate, size, self.channels = pygame.mixer.get_init()
+        self.__dtype = np.int16 if abs(size) == 16 else np.float32
+        self.__make_sound = pygame.mixer.Sound
+        pygame.mixer.set_reserved(1)  # Канал 0 не достанется другим звукам
+        self.__channel = pygame.mixer.Channel(0)
+        self.__device_latency = buffer  # Кадры в буфере микшера уже взяты из канала, но еще не слышны
+        self.__pending = deque()  # [звук, кадров] - звучащий блок и блок в очереди
+        self.__since = 0.0  # Когда начал звучать первый блок из pending
+        self.__paused_at = None
+        self.__lock = threading.Lock()
+
+    def wait_ready(self, timeout):
+        deadline = time.perf_counter() + timeout
+        while self.__channel.get_queue() is not None:
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(self.POLL_INTERVAL)
+        with self.__lock:
+            self.__advance()
+        return True
+
+    def write(self, block):
+        if self.__dtype is np.int16:
+            block = (np.clip(block, -1.0, 1.0) * 32767).astype(np.int16)
+        sound = self.__make_sound(buffer=np.ascontiguousarray(block, dtype=self.__dtype).tobytes())
+        with self.__lock:
+            self.__advance()
+            if self.__channel.get_sound() is None:
+                self.__channel.play(sound)
+                self.__since = time.perf_counter()
+            else:
+                self.__channel.queue(sound)
+            self.__pending.append((sound, len(block)))
+
+    def latency_frames(self):
+        with self.__lock:
+            self.__advance()
+            if not self.__pending:
+                return 0
+            now = self.__paused_at if self.__paused_at is not None else time.perf_counter()
+            elapsed = min(self.__pending[0][1], int((now - self.__since) * self.sample_rate))
+            queued = sum(frames for _, frames in self.__pending)
+            return queued - elapsed + self.__device_latency
+
+    def pause(self):
+        with self.__lock:
+            self.__advance()
+            self.__channel.pause()
+            self.__paused_at = time.perf_counter()
+
+    def resume(self):
+        with self.__lock:
+            self.__channel.unpause()
+            if self.__paused_at is not None:
+                self.__since += time.perf_counter() - self.__paused_at
+                self.__paused_at = None
+
+    def flush(self):
+        with self.__lock:
+            self.__channel.stop()
+            self.__pending.clear()
+
+    def close(self):
+        self.flush()
+
+    def __advance(self):
+        """Убрать доигравшие блоки: канал сам переходит к блоку из очереди"""
+        current = self.__channel.get_sound()
+        if current is None:
+            self.__pending.clear()
+            return
+        while self.__pending and self.__pending[0][0] is not current:
+            self.__pending.popleft()
+            self.__since = self.__paused_at or time.perf_counter()
+
+
+class NullSink(AudioSink):
+    """
+    Приемник без устройства вывода: принимает блоки в темпе реального времени.
+    Нужен для работы без звуковой карты и для замеров
+    """
+    def __init__(self, sample_rate=44100, channels=2, latency=0.1):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.__capacity = int(latency * sample_rate)  # Сколько кадров "устройство" держит в очереди
+        self.__written = 0
+        self.__played = 0.0
+        self.__since = time.perf_counter()
+        self.__paused = False
+        self.__lock = threading.Lock()
+
+    def wait_ready(self, timeout):
+        deadline = time.perf_counter() + timeout
+        while self.latency_frames() >= self.__capacity:
+            if self.__paused or time.perf_counter() >= deadline:
+                return False
+            time.sleep(self.POLL_INTERVAL)
+        return True
+
+    def write(self, block):
+        with self.__lock:
+            self.__advance()
+            self.__written += len(block)
+
+    def latency_frames(self):
+        with self.__lock:
+            self.__advance()
+            return self.__written - int(self.__played)
+
+    def pause(self):
+        with self.__lock:
+            self.__advance()
+            self.__paused = True
+
+    def resume(self):
+        with self.__lock:
+            self.__since = time.perf_counter()
+            self.__paused = False
+
+    def flush(self):
+        with self.__lock:
+            self.__advance()
+            self.__written = int(self.__played)
+
+    def __advance(self):
+        """Продвинуть часы воспроизведения; при нехватке данных часы ждут"""
+        now = time.perf_counter()
+        if not self.__paused:
+            self.__played = min(self.__written, self.__played + (now - self.__since) * self.sample_rate)
+        self.__since = now
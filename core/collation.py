@@ -0,0 +1,28 @@
+# core/collation.py
+import locale
+import re
+import unicodedata
+from functools import lru_cache
+
+_COMBINING_MARKS = re.compile("[\u0300-\u036f]")  # Диакритические знаки после разложения NFKD
+_NUMBER = re.compile(r"\d+")
+
+
+def fold(text):
+    """
+    Привести текст к виду для поиска и сравнения: без регистра и диакритики.
+    "Ё" и "Й" становятся "е" и "и", "Beyoncé" - "beyonce"
+    """
+    return _COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", text.casefold()))
+
+
+@lru_cache(maxsize=65536)
+def collation_key(text):
+    """
+    Ключ сортировки строки: сравниваются строки без регистра и диакритики по правилам
+    текущей локали (LC_COLLATE), числа - по значению ("Track 2" раньше "Track 10").
+    При равенстве решает исходная строка, чтобы порядок не зависел от случая.
+    Кэшируется: исполнители и альбомы повторяются
+    """
+    primary = _NUMBER.sub(lambda match: match.group().lstrip("0").zfill(12), fold(text))
+    return locale.strxfrm(primary) + "\0" + text
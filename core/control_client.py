@@ -0,0 +1,47 @@
+# core/control_client.py
+import json
+import socket
+from core.control_server import ControlServer
+
+class ControlClient:
+    """
+    Клиент ControlServer: отправляет запросы по сокету Unix и ждет ответа.
+    Соединение одно на клиента, запросы выполняются по очереди
+    """
+    def __init__(self, path=None, timeout=5.0):
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__socket.settimeout(timeout)
+        try:
+            self.__socket.connect(path or ControlServer.default_path())
+        except OSError:
+            self.__socket.close()
+            raise
+        self.__received = bytearray()
+
+    def request(self, command, **arguments):
+        """
+        Выполнить команду и вернуть ответ сервера целиком ({"ok", "result", "status"}).
+        Ошибку выполнения команды сервер сообщает в ответе - исключение не бросается
+        """
+        message = dict(arguments, command=command)
+        self.__socket.sendall(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        while True:
+            end = self.__received.find(b"\n")
+            if end >= 0:
+                line = bytes(self.__received[:end])
+                del self.__received[:end + 1]
+                return json.loads(line)
+            data = self.__socket.recv(65536)
+            if not data:
+                raise ConnectionError("сервер закрыл соединение")
+            self.__received += data
+
+    def close(self):
+        """Закрыть соединение"""
+        self.__socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,278 @@
+# core/control_server.py
+import json
+import os
+import selectors
+import socket
+import tempfile
+from core import metrics
+from core.track import Track
+
+class ControlServer:
+    """
+    Управление плеером через локальный сокет Unix (без GUI).
+    Протокол - строки JSON: запрос {"command": "seek", "position": 30},
+    ответ {"ok": true, "result": ..., "status": {...}} или {"ok": false, "error": "..."}.
+    Сервер однопоточный: poll() обрабатывает готовые соединения и возвращается,
+    поэтому плеер вызывается только из того потока, который крутит цикл
+    """
+    MAX_REQUEST = 1 << 20  # Наибольшая длина строки запроса в байтах
+    BACKLOG = 8
+
+    def __init__(self, player, path):
+        self.__player = player
+        self.__path = path
+        self.__selector = selectors.DefaultSelector()
+        self.__connections = {}  # Сокет клиента -> [принятые байты, байты к отправке]
+        self.__running = True
+        self.__commands = {
+            "play": self.__play,
+            "pause": self.__pause,
+            "stop": self.__stop,
+            "next": self.__next,
+            "previous": self.__previous,
+            "seek": self.__seek,
+            "volume": self.__volume,
+            "enqueue": self.__enqueue,
+            "status": self.__status,
+            "metrics": self.__metrics,
+            "shutdown": self.__shutdown,
+        }
+
+        self.__remove_stale_socket(path)
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            # Сокет доступен только владельцу: через него можно управлять плеером
+            previous_umask = os.umask(0o177)
+            try:
+                self.__socket.bind(path)
+            finally:
+                os.umask(previous_umask)
+            self.__socket.listen(self.BACKLOG)
+            self.__socket.setblocking(False)
+        except OSError:
+            self.__socket.close()
+            raise
+        self.__selector.register(self.__socket, selectors.EVENT_READ)
+
+    @staticmethod
+    def default_path():
+        """Путь к сокету по умолчанию: MUSIC_PLAYER_SOCKET или каталог XDG_RUNTIME_DIR"""
+        path = os.environ.get("MUSIC_PLAYER_SOCKET")
+        if path:
+            return path
+        runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+        if runtime_dir:
+            return os.path.join(runtime_dir, "music_player.sock")
+        return os.path.join(tempfile.gettempdir(), f"music_player-{os.getuid()}.sock")
+
+    @property
+    def path(self):
+        """Путь к сокету"""
+        return self.__path
+
+    def is_running(self):
+        """Не получена ли команда shutdown (и не вызван ли stop)"""
+        return self.__running
+
+    def stop(self):
+        """Попросить цикл завершиться"""
+        self.__running = False
+
+    def poll(self, timeout):
+        """Дождаться событий сокетов не дольше timeout секунд и обработать их"""
+        for key, events in self.__selector.select(timeout):
+            if key.fileobj is self.__socket:
+                self.__accept()
+                continue
+            connection = key.fileobj
+            if events & selectors.EVENT_READ:
+                self.__read(connection)
+            if events & selectors.EVENT_WRITE and connection in self.__connections:
+                self.__flush(connection)
+
+    def close(self):
+        """Закрыть соединения и удалить сокет"""
+        for connection in list(self.__connections):
+            self.__disconnect(connection)
+        self.__selector.unregister(self.__socket)
+        self.__selector.close()
+        self.__socket.close()
+        try:
+            os.unlink(self.__path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def __remove_stale_socket(path):
+        """Удалить сокет, оставшийся от завершившегося процесса; занятый сокет - ошибка"""
+        if not os.path.exists(path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(path)
+            return
+        finally:
+            probe.close()
+        raise OSError(f"сокет {path} уже используется другим процессом")
+
+    def __accept(self):
+        """Принять нового клиента"""
+        try:
+            connection, _ = self.__socket.accept()
+        except BlockingIOError:
+            return
+        connection.setblocking(False)
+        self.__connections[connection] = [bytearray(), bytearray()]
+        self.__selector.register(connection, selectors.EVENT_READ)
+
+    def __disconnect(self, connection):
+        """Закрыть соединение клиента"""
+        self.__selector.unregister(connection)
+        del self.__connections[connection]
+        connection.close()
+
+    def __read(self, connection):
+        """Прочитать данные клиента и ответить на каждую полученную строку"""
+        try:
+            data = connection.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.__disconnect(connection)
+            return
+
+        received, pending = self.__connections[connection]
+        received += data
+        while True:
+            end = received.find(b"\n")
+            if end < 0:
+                break
+            line = bytes(received[:end])
+            del received[:end + 1]
+            if line.strip():
+                pending += json.dumps(self.__handle(line), ensure_ascii=False).encode("utf-8") + b"\n"
+        if len(received) > self.MAX_REQUEST:
+            self.__disconnect(connection)
+            return
+        if pending:
+            self.__flush(connection)
+
+    def __flush(self, connection):
+        """Отправить накопленные ответы; остаток уйдет, когда сокет снова будет готов к записи"""
+        pending = self.__connections[connection][1]
+        try:
+            sent = connection.send(pending)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self.__disconnect(connection)
+            return
+        del pending[:sent]
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if pending else 0)
+        self.__selector.modify(connection, events)
+
+    def __handle(self, line):
+        """Выполнить запрос и сформировать ответ"""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("запрос должен быть объектом JSON")
+            command = self.__commands.get(request.get("command"))
+            if command is None:
+                raise ValueError(f"неизвестная команда: {request.get('command')!r}")
+            result = command(request)
+        except (ValueError, TypeError) as e:
+            return {"ok": False, "error": str(e)}
+        except Exception as e:
+            print(f"Ошибка выполнения команды: {e}")
+            return {"ok": False, "error": str(e)}
+        return {"ok": True, "result": result, "status": self.status()}
+
+    def status(self):
+        """Состояние плеера для ответа клиенту"""
+        player = self.__player
+        playlist = player.get_current_playlist()
+        track = player.get_current_track()
+        return {
+            "state": player.get_state(),
+            "playlist": playlist.name if playlist is not None else None,
+            "index": player.get_current_track_index(),
+            "size": playlist.size() if playlist is not None else 0,
+            "position": round(player.get_position(), 3),
+            "duration": player.get_duration(),
+            "volume": player.get_volume(),
+            "track": {"path": track.path, "title": track.title, "artist": track.artist, "album": track.album}
+                     if track is not None else None,
+        }
+
+    @staticmethod
+    def __number(request, key):
+        """Числовой аргумент запроса"""
+        value = request.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"нужен числовой аргумент {key!r}")
+        return value
+
+    def __play(self, request):
+        if "index" in request:
+            if not self.__player.set_track(int(self.__number(request, "index"))):
+                raise ValueError("нет трека с таким номером")
+        return self.__player.play()
+
+    def __pause(self, request):
+        return self.__player.pause()
+
+    def __stop(self, request):
+        self.__player.stop()
+        return True
+
+    def __next(self, request):
+        return self.__player.next_track()
+
+    def __previous(self, request):
+        return self.__player.previous_track()
+
+    def __seek(self, request):
+        return self.__player.set_position(max(0.0, float(self.__number(request, "position"))))
+
+    def __volume(self, request):
+        return self.__player.set_volume(int(self.__number(request, "volume")))
+
+    def __enqueue(self, request):
+        """
+        Добавить файлы в конец текущего плейлиста. Треки ленивые: теги читаются,
+        только когда нужны (например, для status текущего трека).
+        Возвращает пути, которых нет на диске
+        """
+        paths = request.get("paths")
+        if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+            raise ValueError("нужен список путей 'paths'")
+        playlist = self.__player.get_current_playlist()
+        if playlist is None:
+            raise ValueError("нет текущего плейлиста")
+        found = []
+        missing = []
+        for path in paths:
+            (found if os.path.isfile(path) else missing).append(path)
+        first = playlist.size()
+        playlist.append_tracks([Track(os.path.abspath(path), lazy=True) for path in found])
+        if found and self.__player.get_current_track_index() < 0:
+            self.__player.set_track(first)
+        return missing
+
+    def __status(self, request):
+        return None
+
+    def __metrics(self, request):
+        """Снимок метрик: format "prometheus" - текстом, иначе словарем"""
+        if request.get("format") == "prometheus":
+            return metrics.export_prometheus()
+        return metrics.export_json()
+
+    def __shutdown(self, request):
+        self.__running = False
+        return True
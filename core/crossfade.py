@@ -0,0 +1,44 @@
+# core/crossfade.py
+import numpy as np
+
+# Кривые перехода: "linear" - линейная, "equal_power" - постоянная мощность суммы,
+# "s_curve" - плавное начало и конец (smoothstep)
+CURVES = ("linear", "equal_power", "s_curve")
+
+
+def fade_gains(curve, t):
+    """Коэффициенты усиления (входящий трек, уходящий трек) для долей перехода t от 0 до 1"""
+    if curve == "linear":
+        return t, 1.0 - t
+    if curve == "equal_power":
+        angle = t * (np.pi / 2)
+        return np.sin(angle), np.cos(angle)
+    if curve == "s_curve":
+        rise = t * t * (3.0 - 2.0 * t)
+        return rise, 1.0 - rise
+    raise ValueError(f"неизвестная кривая перехода: {curve}")
+
+
+class Crossfade:
+    """
+    Плавный переход между треками: блоки уходящего трека затухают,
+    блоки входящего нарастают, усиление считается сразу для всего блока
+    """
+    def __init__(self, outgoing, length, curve):
+        self.outgoing = outgoing  # Поток уходящего трека (StreamEngine)
+        self.__length = max(1, length)  # Длительность перехода в кадрах
+        self.__curve = curve
+        self.__position = 0
+
+    def is_done(self):
+        """Переход завершен"""
+        return self.__position >= self.__length
+
+    def mix(self, block, tail):
+        """Смешать блок входящего трека с кадрами уходящего tail (не длиннее block)"""
+        t = (self.__position + np.arange(len(block), dtype=np.float32)) / np.float32(self.__length)
+        gain_in, gain_out = fade_gains(self.__curve, np.minimum(t, np.float32(1.0)))
+        mixed = block * gain_in[:, np.newaxis]
+        mixed[:len(tail)] += tail * gain_out[:len(tail), np.newaxis]
+        self.__position += len(block)
+        return mixed
@@ -0,0 +1,217 @@
+# core/library_scanner.py
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from core.metadata_cache import MetadataCache
+
+class LibraryScanner:
+    """
+    Рекурсивный поиск аудиофайлов в папках через os.scandir.
+    Пути выдаются потоком по мере обхода, поэтому импорт начинается сразу.
+    Содержимое папок запоминается в кэше вместе со временем изменения папки:
+    неизменившаяся папка повторно не читается (время изменения папки меняется
+    при добавлении, удалении и переименовании файлов в ней).
+    Несколько потоков (max_workers > 1) ускоряют обход сетевых и медленных дисков.
+    Символические ссылки на папки не обходятся, чтобы не зациклиться
+    """
+    EXTENSIONS = (".mp3",)
+    QUEUE_SIZE = 64  # Пакетов путей, ожидающих получателя при многопоточном обходе
+    RACY_INTERVAL_NS = 2 * 10**9  # Недавно измененные папки не кэшируются: изменение может уложиться в тот же тик времени
+
+    def __init__(self, max_workers=1, extensions=EXTENSIONS, cache=None):
+        self.__max_workers = max(1, max_workers)
+        self.__extensions = tuple(extension.lower() for extension in extensions)
+        self.__cache = cache if cache is not None else MetadataCache.get_default()
+        self.__cancelled = threading.Event()
+        self.__stats_lock = threading.Lock()
+        self.__files = 0
+        self.__directories = 0
+        self.__skipped = 0
+        self.__started = None
+        self.__finished = None
+
+    @property
+    def files(self):
+        """Найдено файлов за последний обход"""
+        return self.__files
+
+    @property
+    def directories(self):
+        """Прочитано папок (через os.scandir)"""
+        return self.__directories
+
+    @property
+    def skipped_directories(self):
+        """Папок, содержимое которых взято из кэша"""
+        return self.__skipped
+
+    def elapsed(self):
+        """Время обхода в секундах (для идущего обхода - на текущий момент)"""
+        if self.__started is None:
+            return 0.0
+        return (self.__finished or time.perf_counter()) - self.__started
+
+    def files_per_second(self):
+        """Скорость обхода: найдено файлов в секунду"""
+        elapsed = self.elapsed()
+        return self.__files / elapsed if elapsed > 0 else 0.0
+
+    def cancel(self):
+        """Прервать обход"""
+        self.__cancelled.set()
+
+    def is_cancelled(self):
+        """Проверить, был ли обход прерван"""
+        return self.__cancelled.is_set()
+
+    def scan(self, roots, changed_only=False):
+        """
+        Обойти папки roots (путь или список путей) вместе с вложенными.
+        Генератор путей к файлам с подходящими расширениями; при одном потоке
+        порядок - по именам, файлы папки раньше вложенных папок.
+        changed_only=True - выдавать только файлы, появившиеся в папках с момента
+        прошлого обхода (повторное сканирование библиотеки)
+        """
+        if isinstance(roots, (str, os.PathLike)):
+            roots = [roots]
+        roots = [os.path.abspath(root) for root in roots]
+        self.__files = self.__directories = self.__skipped = 0
+        self.__started = time.perf_counter()
+        self.__finished = None
+
+        if self.__max_workers > 1:
+            batches = self.__scan_threaded(roots, changed_only)
+        else:
+            batches = self.__scan_sequential(roots, changed_only)
+        try:
+            for batch in batches:
+                for path in batch:
+                    self.__files += 1
+                    yield path
+        finally:
+            batches.close()
+            self.__finished = time.perf_counter()
+            if self.__cache is not None:
+                self.__cache.flush()
+
+    def __scan_sequential(self, roots, changed_only):
+        """Обход в глубину в текущем потоке; выдает пути пакетами по папкам"""
+        stack = list(reversed(roots))
+        while stack and not self.is_cancelled():
+            directory = stack.pop()
+            files, subdirectories = self.__list(directory, changed_only)
+            if files:
+                yield [os.path.join(directory, name) for name in files]
+            stack.extend(os.path.join(directory, name) for name in reversed(subdirectories))
+
+    def __scan_threaded(self, roots, changed_only):
+        """Обход в пуле потоков: каждая папка - отдельная задача, пути собираются в очередь"""
+        results = queue.Queue(maxsize=self.QUEUE_SIZE)
+        stop = threading.Event()
+        lock = threading.Lock()
+        pending = [1]  # Задач в работе; начальная единица не дает закончить до постановки всех корней
+        executor = ThreadPoolExecutor(max_workers=self.__max_workers, thread_name_prefix="library-scan")
+
+        def put(item):
+            # Получатель мог перестать читать - не блокируемся навсегда
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def task_done():
+            with lock:
+                pending[0] -= 1
+                last = pending[0] == 0
+            if last:
+                put(None)
+
+        def submit(directory):
+            with lock:
+                pending[0] += 1
+            try:
+                executor.submit(visit, directory)
+            except RuntimeError:
+                task_done()  # Пул уже остановлен
+
+        def visit(directory):
+            try:
+                if not stop.is_set() and not self.is_cancelled():
+                    files, subdirectories = self.__list(directory, changed_only)
+                    for name in subdirectories:
+                        submit(os.path.join(directory, name))
+                    if files:
+                        put([os.path.join(directory, name) for name in files])
+            except Exception as e:
+                print(f"Ошибка обхода папки {directory}: {e}")
+            finally:
+                task_done()
+
+        try:
+            for root in roots:
+                submit(root)
+            task_done()
+            while not self.is_cancelled():
+                try:
+                    batch = results.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __list(self, directory, changed_only):
+        """
+        Файлы и вложенные папки папки (имена по алфавиту).
+        Если папка не менялась с прошлого обхода, список берется из кэша
+        """
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError as e:
+            print(f"Ошибка чтения папки: {e}")
+            return [], []
+
+        cached = self.__cache.get_directory(directory) if self.__cache is not None else None
+        if cached is not None and cached[0] == mtime_ns:
+            with self.__stats_lock:
+                self.__skipped += 1
+            return ([] if changed_only else self.__matching(cached[1])), cached[2]
+
+        names = []  # Все файлы папки: кэш не зависит от набора расширений
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.name)
+                        else:
+                            names.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Ошибка чтения папки: {e}")
+            return [], []
+        names.sort()
+        subdirectories.sort()
+        with self.__stats_lock:
+            self.__directories += 1
+
+        if self.__cache is not None and time.time_ns() - mtime_ns > self.RACY_INTERVAL_NS:
+            self.__cache.put_directory(directory, mtime_ns, names, subdirectories)
+        files = self.__matching(names)
+        if changed_only and cached is not None:
+            known = set(cached[1])
+            files = [name for name in files if name not in known]
+        return files, subdirectories
+
+    def __matching(self, names):
+        """Имена файлов с подходящими расширениями"""
+        return [name for name in names if name.lower().endswith(self.__extensions)]
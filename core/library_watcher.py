@@ -0,0 +1,396 @@
+# core/library_watcher.py
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+from core.library_scanner import LibraryScanner
+from core.metadata_cache import MetadataCache
+from core.track import Track
+
+# Флаги inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; за заголовком - имя с нулями в конце
+
+
+class _Inotify:
+    """Тонкая обертка над inotify из libc через ctypes"""
+    def __init__(self):
+        self.__libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.__fd = self.__libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.__fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    def fileno(self):
+        return self.__fd
+
+    def add_watch(self, path, mask):
+        """Начать следить за папкой; возвращает дескриптор наблюдения"""
+        wd = self.__libc.inotify_add_watch(self.__fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return wd
+
+    def rm_watch(self, wd):
+        """Перестать следить (ядро пришлет IN_IGNORED)"""
+        self.__libc.inotify_rm_watch(self.__fd, wd)
+
+    def read(self):
+        """Прочитать накопившиеся события: список (wd, маска, cookie, имя)"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.__fd, 65536)
+            except BlockingIOError:
+                return events
+            if not data:
+                return events
+            offset = 0
+            while offset + _EVENT.size <= len(data):
+                wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, cookie, name))
+
+    def close(self):
+        os.close(self.__fd)
+
+
+class LibraryChanges:
+    """
+    Изменения файлов в отслеживаемых папках за один интервал.
+    moved - переименования [(старый путь, новый путь)] файлов и папок по порядку,
+    removed - удаленные файлы и папки,
+    tracks - заново прочитанные треки новых и измененных файлов {путь: трек},
+    targets - плейлисты, в которых должны быть файлы из отслеживаемых папок {путь: [плейлисты]},
+    scanned - папки, пересканированные целиком после переполнения очереди {папка: множество путей}
+    """
+    def __init__(self, moved, removed, tracks, targets, scanned=None):
+        self.moved = moved
+        self.removed = removed
+        self.tracks = tracks
+        self.targets = targets
+        self.scanned = scanned or {}
+
+    def prefixes(self):
+        """
+        Пути, с которых начинаются пути всех затронутых файлов (для отбора треков одним
+        str.startswith): исходные пути переименований, удаленные, измененные и папки пересканирования
+        """
+        paths = {old for old, _ in self.moved}
+        paths.update(self.removed)
+        paths.update(self.tracks)
+        paths.update(root + os.sep for root in self.scanned)
+        return tuple(paths)
+
+    def new_path(self, path):
+        """Путь файла после изменений; None - файл удален"""
+        for old, new in self.moved:
+            if path == old or path.startswith(old + os.sep):
+                path = new + path[len(old):]
+        if self.removed:
+            parent = path
+            while True:
+                if parent in self.removed:
+                    return None
+                parent, tail = os.path.split(parent)
+                if not tail:
+                    break
+        for root, paths in self.scanned.items():
+            if path.startswith(root + os.sep) and path not in paths:
+                return None
+        return path
+
+    def added_to(self, playlist):
+        """Новые файлы, которые нужно добавить в плейлист (по алфавиту)"""
+        return sorted(path for path, playlists in self.targets.items()
+                      if any(target is playlist for target in playlists))
+
+
+class LibraryWatcher:
+    """
+    Слежение за папками библиотеки через inotify (только Linux).
+    События копятся и передаются пачкой, когда поток событий затихает на DEBOUNCE секунд
+    (но не реже раза в MAX_DELAY секунд): копирование альбома дает одно изменение, а не сотни.
+    Теги новых и измененных файлов читаются в потоке наблюдателя, кэш метаданных
+    обновляется там же; on_changes(LibraryChanges) вызывается из этого потока - там же
+    изменения сопоставляются с треками (PlaylistManager.plan_library_changes), а применять их
+    к плейлистам нужно в потоке, который ими владеет (PlaylistManager.apply_library_changes)
+    """
+    DEBOUNCE = 0.5
+    MAX_DELAY = 5.0
+
+    def __init__(self, on_changes, debounce=DEBOUNCE, extensions=LibraryScanner.EXTENSIONS, cache=None):
+        self.__on_changes = on_changes
+        self.__debounce = debounce
+        self.__extensions = tuple(extension.lower() for extension in extensions)
+        self.__cache = cache if cache is not None else MetadataCache.get_default()
+        self.__inotify = _Inotify()
+        self.__wake_read, self.__wake_write = os.pipe()
+        self.__wake_lock = threading.Lock()  # Запись в канал пробуждения против его закрытия потоком
+        self.__commands = queue.Queue()
+        self.__stopped = threading.Event()
+
+        # Состояние ниже используется только потоком наблюдателя
+        self.__directories = {}  # Дескриптор наблюдения -> путь папки
+        self.__roots = {}  # Корневая папка -> плейлисты, в которые добавляются новые файлы
+        self.__moved_from = {}  # cookie -> (путь, папка ли) - ждет парного IN_MOVED_TO
+        self.__moves = []
+        self.__removed = set()
+        self.__changed = set()
+        self.__overflow = False
+        self.__first_event = None  # Время первого и последнего события в накопленной пачке
+        self.__last_event = None
+
+        self.__thread = threading.Thread(target=self.__run, name="library-watcher", daemon=True)
+        self.__thread.start()
+
+    @staticmethod
+    def is_supported():
+        """Доступно ли слежение на этой системе"""
+        return sys.platform.startswith("linux")
+
+    def watch(self, root, playlist):
+        """Следить за папкой root со всеми вложенными; новые файлы добавляются в playlist"""
+        self.__command("watch", os.path.abspath(root), playlist)
+
+    def stop(self, wait=False):
+        """Остановить слежение"""
+        self.__stopped.set()
+        self.__command("stop")
+        if wait:
+            self.__thread.join()
+
+    def __command(self, *command):
+        """Передать команду потоку наблюдателя и разбудить его"""
+        self.__commands.put(command)
+        with self.__wake_lock:
+            if self.__wake_write is not None:  # None - поток уже остановлен
+                os.write(self.__wake_write, b"\0")
+
+    def __run(self):
+        """Цикл потока: ожидание событий, накопление и передача пачками"""
+        try:
+            while not self.__stopped.is_set():
+                readable, _, _ = select.select([self.__inotify, self.__wake_read], [], [], self.__timeout())
+                if self.__wake_read in readable:
+                    os.read(self.__wake_read, 4096)
+                    self.__run_commands()
+                if self.__inotify in readable:
+                    events = self.__inotify.read()
+                    if events:
+                        now = time.monotonic()
+                        self.__first_event = self.__first_event or now
+                        self.__last_event = now
+                        for event in events:
+                            self.__handle(*event)
+                if self.__first_event is not None and self.__timeout() == 0:
+                    self.__flush()
+        except Exception as e:
+            print(f"Ошибка слежения за папками: {e}")
+        finally:
+            self.__inotify.close()
+            with self.__wake_lock:
+                os.close(self.__wake_read)
+                os.close(self.__wake_write)
+                self.__wake_write = None
+
+    def __timeout(self):
+        """Сколько ждать событий до передачи накопленной пачки (None - пачки нет)"""
+        if self.__first_event is None:
+            return None
+        now = time.monotonic()
+        remaining = min(self.__last_event + self.__debounce, self.__first_event + self.MAX_DELAY) - now
+        return max(0.0, remaining)
+
+    def __run_commands(self):
+        """Выполнить команды из других потоков"""
+        while True:
+            try:
+                command = self.__commands.get_nowait()
+            except queue.Empty:
+                return
+            if command[0] == "watch":
+                _, root, playlist = command
+                playlists = self.__roots.setdefault(root, [])
+                if not any(existing is playlist for existing in playlists):
+                    playlists.append(playlist)
+                self.__add_tree(root, report=False)
+
+    def __handle(self, wd, mask, cookie, name):
+        """Учесть одно событие inotify в накопленной пачке"""
+        if mask & IN_Q_OVERFLOW:
+            self.__overflow = True  # События потеряны - папки будут пересканированы
+            return
+        directory = self.__directories.get(wd)
+        if directory is None:
+            return
+        if mask & IN_IGNORED:
+            del self.__directories[wd]
+            return
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            if directory in self.__roots:
+                self.__remove(directory)  # Сама корневая папка удалена или перенесена
+            return
+
+        path = os.path.join(directory, name)
+        if mask & IN_ISDIR:
+            if mask & IN_CREATE:
+                self.__add_tree(path, report=True)
+            elif mask & IN_MOVED_FROM:
+                self.__moved_from[cookie] = (path, True)
+            elif mask & IN_MOVED_TO:
+                source = self.__moved_from.pop(cookie, None)
+                if source is not None:
+                    self.__move(source[0], path)
+                else:
+                    self.__add_tree(path, report=True)  # Папка перенесена извне
+            elif mask & IN_DELETE:
+                self.__remove(path)
+        elif mask & IN_CLOSE_WRITE:
+            if self.__matches(path):
+                self.__change(path)
+        elif mask & IN_MOVED_FROM:
+            self.__moved_from[cookie] = (path, False)
+        elif mask & IN_MOVED_TO:
+            source = self.__moved_from.pop(cookie, None)
+            if source is not None and self.__matches(source[0]):
+                if self.__matches(path):
+                    self.__move(source[0], path)
+                else:
+                    self.__remove(source[0])
+            elif self.__matches(path):
+                self.__change(path)  # Файл перенесен извне или временный файл переименован в mp3
+        elif mask & IN_DELETE:
+            if self.__matches(path):
+                self.__remove(path)
+
+    def __matches(self, path):
+        """Подходит ли файл по расширению"""
+        return path.lower().endswith(self.__extensions)
+
+    def __change(self, path):
+        """Файл создан или изменен"""
+        self.__removed.discard(path)
+        self.__changed.add(path)
+
+    def __remove(self, path):
+        """Файл или папка удалены"""
+        prefix = path + os.sep
+        self.__changed = {changed for changed in self.__changed if changed != path and not changed.startswith(prefix)}
+        self.__removed.add(path)
+
+    def __move(self, old, new):
+        """Файл или папка переименованы внутри отслеживаемых папок"""
+        prefix = old + os.sep
+        self.__changed = {new + changed[len(old):] if changed == old or changed.startswith(prefix) else changed
+                          for changed in self.__changed}
+        self.__removed.discard(new)
+        self.__moves.append((old, new))
+        for wd, directory in self.__directories.items():
+            if directory == old or directory.startswith(prefix):
+                self.__directories[wd] = new + directory[len(old):]
+
+    def __add_tree(self, root, report):
+        """Следить за папкой и всеми вложенными; report=True - считать найденные файлы новыми"""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                wd = self.__inotify.add_watch(directory, WATCH_MASK)
+            except OSError as e:
+                print(f"Ошибка слежения за папкой: {e}")
+                continue
+            self.__directories[wd] = directory
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif report and self.__matches(entry.name):
+                                self.__change(entry.path)
+                        except OSError:
+                            continue
+            except OSError as e:
+                print(f"Ошибка чтения папки: {e}")
+
+    def __unwatch_tree(self, root):
+        """Перестать следить за папкой, перенесенной за пределы отслеживаемых"""
+        prefix = root + os.sep
+        for wd, directory in list(self.__directories.items()):
+            if directory == root or directory.startswith(prefix):
+                self.__inotify.rm_watch(wd)
+                del self.__directories[wd]
+
+    def __flush(self):
+        """Передать накопленные изменения: обновить кэш, прочитать теги, вызвать on_changes"""
+        # Непарный IN_MOVED_FROM - файл или папка перенесены за пределы отслеживаемых папок
+        for path, is_directory in self.__moved_from.values():
+            if is_directory:
+                self.__unwatch_tree(path)
+                self.__remove(path)
+            elif self.__matches(path):
+                self.__remove(path)
+        self.__moved_from.clear()
+
+        scanned = {}
+        if self.__overflow:
+            for root in list(self.__roots):
+                self.__add_tree(root, report=False)  # Папки, созданные за время потери событий
+                scanned[root] = set(LibraryScanner(cache=self.__cache).scan(root))
+
+        if self.__cache is not None:
+            for old, new in self.__moves:
+                self.__cache.move(old, new)
+            for path in self.__removed:
+                self.__cache.remove_tree(path)
+
+        tracks = {}
+        targets = {}
+        for path in sorted(self.__changed):
+            if os.path.isfile(path):
+                tracks[path] = Track(path)  # Через кэш: измененный файл не совпадет с записью и прочитается заново
+                self.__add_target(targets, path)
+        for paths in scanned.values():
+            for path in paths:
+                self.__add_target(targets, path)
+        if self.__cache is not None:
+            self.__cache.flush()
+
+        changes = LibraryChanges(self.__moves, self.__removed, tracks, targets, scanned)
+        self.__moves = []
+        self.__removed = set()
+        self.__changed = set()
+        self.__overflow = False
+        self.__first_event = self.__last_event = None
+        self.__on_changes(changes)
+
+    def __add_target(self, targets, path):
+        """Запомнить плейлисты, следящие за папкой файла"""
+        playlists = [playlist for root, root_playlists in self.__roots.items()
+                     if path.startswith(root + os.sep) for playlist in root_playlists]
+        if playlists:
+            targets[path] = playlists
@@ -0,0 +1,31 @@
+# core/loudness.py
+import math
+from core.metadata_cache import MetadataCache
+
+REFERENCE_LOUDNESS = -18.0  # Целевая громкость, LUFS (как в ReplayGain 2.0)
+MAX_GAIN = 12.0  # Наибольшее усиление тихого трека, дБ
+
+
+def gain_db(loudness, peak):
+    """
+    Усиление (дБ), приводящее трек к REFERENCE_LOUDNESS: не больше MAX_GAIN
+    и не больше, чем допускает пик (без перегрузки)
+    """
+    if loudness is None:
+        return 0.0
+    gain = min(REFERENCE_LOUDNESS - loudness, MAX_GAIN)
+    if peak > 0:
+        gain = min(gain, -20 * math.log10(peak))
+    return gain
+
+
+def track_gain(path):
+    """
+    Множитель громкости трека по результату анализа из кэша метаданных;
+    1.0, если трек еще не проанализирован (анализ при воспроизведении не выполняется)
+    """
+    cache = MetadataCache.get_default()
+    result = cache.get_loudness(path) if cache is not None else None
+    if result is None:
+        return 1.0
+    return 10 ** (gain_db(result["loudness"], result["peak"]) / 20)
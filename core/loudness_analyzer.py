@@ -0,0 +1,270 @@
+# core/loudness_analyzer.py
+import math
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+from core.metadata_cache import MetadataCache
+from core.process_pool import process_context
+
+_BLOCK_SECONDS = 0.4  # Блок стробирования BS.1770
+_STEP_SECONDS = 0.1  # Шаг блоков (перекрытие 75%)
+_ABSOLUTE_GATE = -70.0  # LUFS
+_RELATIVE_GATE = -10.0  # дБ относительно громкости блоков выше абсолютного порога
+_FFT_SIZE = 1 << 17  # Кадров в одном БПФ свертки
+_FILTER_LENGTH = 4096  # Импульсная характеристика K-фильтра затухает за это число кадров
+_responses = {}  # (частота дискретизации, размер БПФ) -> частотная характеристика K-фильтра
+_cancelled = None  # Флаг отмены анализа в процессе пула (multiprocessing.Event)
+
+
+def _k_weighting(sample_rate):
+    """
+    Коэффициенты (b0, b1, b2, a1, a2) двух биквадратных фильтров K-взвешивания
+    (полка +4 дБ и ФВЧ ~38 Гц) для любой частоты дискретизации;
+    на 48 кГц совпадают с коэффициентами из BS.1770
+    """
+    f0, gain, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / sample_rate)
+    vh = 10 ** (gain / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = ((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+             2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / sample_rate)
+    a0 = 1 + k / q + k * k
+    highpass = (1.0, -2.0, 1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+    return shelf, highpass
+
+
+def _response(sample_rate, size):
+    """Частотная характеристика K-фильтра в точках rfft размера size"""
+    key = (sample_rate, size)
+    response = _responses.get(key)
+    if response is None:
+        z = np.exp(-1j * np.linspace(0, np.pi, size // 2 + 1))
+        response = np.ones_like(z)
+        for b0, b1, b2, a1, a2 in _k_weighting(sample_rate):
+            response *= (b0 + b1 * z + b2 * z * z) / (1 + a1 * z + a2 * z * z)
+        _responses[key] = response
+    return response
+
+
+def _gated_loudness(blocks):
+    """Интегральная громкость (LUFS) по мощностям блоков с абсолютным и относительным порогами"""
+    with np.errstate(divide="ignore"):
+        levels = -0.691 + 10 * np.log10(blocks)
+    gated = blocks[levels > _ABSOLUTE_GATE]
+    if not len(gated):
+        return None  # Тишина
+    threshold = -0.691 + 10 * math.log10(gated.mean()) + _RELATIVE_GATE
+    gated = blocks[levels > max(_ABSOLUTE_GATE, threshold)]
+    return -0.691 + 10 * math.log10(gated.mean())
+
+
+def measure_loudness(path, cancelled=None):
+    """
+    Интегральная громкость (BS.1770 / EBU R128: K-взвешивание, блоки 400 мс с шагом 100 мс,
+    абсолютный и относительный пороги) и пиковое значение сэмпла.
+    Файл декодируется потоком, фильтр применяется сверткой через БПФ по большим фрагментам -
+    память не зависит от длины трека. Моно анализируется как два одинаковых канала:
+    так он и звучит при воспроизведении.
+    Возвращает {"loudness": LUFS или None для тишины, "peak": 0-1}; если файл не удалось
+    декодировать - {"loudness": None, "peak": 0.0}; None, если cancelled() вернула True
+    """
+    # Нужен только для анализа - плееру при запуске не импортируется
+    import miniaudio
+    steps = []  # Средняя мощность по шагам 100 мс
+    pending = np.zeros(0)  # Мощность кадров, еще не собранных в шаг
+    peak = 0.0
+    try:
+        sample_rate = miniaudio.get_file_info(path).sample_rate
+        step = max(1, round(sample_rate * _STEP_SECONDS))
+        history = np.zeros((_FILTER_LENGTH - 1, 2))  # Хвост предыдущего фрагмента для свертки
+        for chunk in miniaudio.stream_file(path, miniaudio.SampleFormat.FLOAT32, 2, sample_rate,
+                                           _FFT_SIZE - _FILTER_LENGTH):
+            if cancelled is not None and cancelled():
+                return None
+            block = np.frombuffer(chunk, dtype=np.float32).reshape(-1, 2)
+            if not len(block):
+                continue
+            peak = max(peak, float(np.abs(block).max()))
+
+            # Свертка с перекрытием: начало результата, испорченное циклическим сдвигом, отбрасывается
+            signal = np.concatenate((history, block))
+            size = 1 << (len(signal) - 1).bit_length()
+            spectrum = np.fft.rfft(signal, size, axis=0) * _response(sample_rate, size)[:, None]
+            filtered = np.fft.irfft(spectrum, size, axis=0)[len(history):len(signal)]
+            history = signal[-len(history):]
+
+            pending = np.concatenate((pending, np.square(filtered).sum(axis=1)))
+            whole = len(pending) - len(pending) % step
+            if whole:
+                steps.append(pending[:whole].reshape(-1, step).mean(axis=1))
+                pending = pending[whole:]
+    except Exception as e:
+        print(f"Ошибка анализа громкости {path}: {e}")
+        return {"loudness": None, "peak": 0.0}
+
+    steps = np.concatenate(steps) if steps else np.zeros(0)
+    per_block = round(_BLOCK_SECONDS / _STEP_SECONDS)
+    if len(steps) >= per_block:
+        # Мощность блоков 400 мс с шагом 100 мс - скользящее среднее по шагам
+        cumulative = np.concatenate(([0.0], np.cumsum(steps)))
+        blocks = (cumulative[per_block:] - cumulative[:-per_block]) / per_block
+    elif len(steps) or len(pending):
+        # Трек короче блока - один блок на весь трек
+        frames = len(steps) * step + len(pending)
+        blocks = np.array([(steps.sum() * step + pending.sum()) / frames])
+    else:
+        blocks = np.zeros(0)
+    return {"loudness": _gated_loudness(blocks), "peak": peak}
+
+
+def _init_worker(cancelled):
+    """Настройка процесса пула: низкий приоритет (воспроизведению процессор нужнее) и флаг отмены"""
+    global _cancelled
+    _cancelled = cancelled
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass  # Нет nice (Windows) - остается обычный приоритет
+
+
+def _analyze(path):
+    """Анализ одного файла (выполняется в процессе пула)"""
+    return measure_loudness(path, _cancelled.is_set)
+
+
+class LoudnessAnalyzer:
+    """
+    Фоновый анализ громкости треков в пуле процессов.
+    Результаты сохраняются в кэш метаданных, откуда движки берут усиление трека
+    при загрузке (loudness.track_gain); проанализированные треки пропускаются.
+    Пул запускается, когда есть работа, и закрывается, когда очередь пуста
+    """
+    def __init__(self, max_workers=None, on_analyzed=None):
+        # По умолчанию половина ядер: анализ не должен мешать интерфейсу и декодеру воспроизведения
+        self.__max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.__on_analyzed = on_analyzed  # on_analyzed(path, result) - из фонового потока
+        self.__queue = deque()
+        self.__queued = set()  # Пути в очереди (еще не отправленные в пул)
+        self.__closed = False
+        self.__cancelled = None  # Флаг отмены для процессов текущего пула
+        self.__condition = threading.Condition()
+        self.__thread = threading.Thread(target=self.__run, name="loudness-analyzer", daemon=True)
+        self.__thread.start()
+
+    def submit(self, paths, urgent=False):
+        """Поставить файлы в очередь анализа; urgent - в начало очереди (например, следующий трек)"""
+        with self.__condition:
+            for path in (reversed(list(paths)) if urgent else paths):
+                if path in self.__queued:
+                    if not urgent:
+                        continue
+                    self.__queue.remove(path)
+                self.__queued.add(path)
+                if urgent:
+                    self.__queue.appendleft(path)
+                else:
+                    self.__queue.append(path)
+            self.__condition.notify_all()
+
+    def pending(self):
+        """Сколько файлов ждет анализа"""
+        with self.__condition:
+            return len(self.__queue)
+
+    def close(self):
+        """Прервать анализ: идущие задачи останавливаются на ближайшем фрагменте"""
+        with self.__condition:
+            self.__closed = True
+            self.__queue.clear()
+            self.__queued.clear()
+            if self.__cancelled is not None:
+                self.__cancelled.set()
+            self.__condition.notify_all()
+        self.__thread.join()
+
+    def __start_pool(self):
+        """Запустить пул процессов"""
+        context = process_context()
+        with self.__condition:
+            self.__cancelled = context.Event()
+        return ProcessPoolExecutor(max_workers=self.__max_workers, mp_context=context,
+                                   initializer=_init_worker, initargs=(self.__cancelled,))
+
+    def __run(self):
+        """Поток анализатора: отправляет файлы в пул и сохраняет результаты"""
+        cache = MetadataCache.get_default()
+        executor = None
+        in_flight = {}  # Задача пула -> путь
+        while True:
+            with self.__condition:
+                idle = not self.__queue and not in_flight
+                if idle and not self.__closed and executor is None:
+                    self.__condition.wait()
+                    continue
+                closed = self.__closed
+                batch = []
+                while not closed and self.__queue and len(in_flight) + len(batch) < self.__max_workers * 2:
+                    path = self.__queue.popleft()
+                    self.__queued.discard(path)
+                    batch.append(path)
+
+            if closed or idle:
+                # Очередь пуста - процессы пула не держим
+                if executor is not None:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    executor = None
+                if cache is not None:
+                    cache.flush()
+                if closed:
+                    return
+                continue
+
+            for path in batch:
+                if cache is not None and cache.get_loudness(path) is not None:
+                    continue  # Уже проанализирован
+                try:
+                    if executor is None:
+                        executor = self.__start_pool()
+                    in_flight[executor.submit(_analyze, path)] = path
+                except Exception as e:
+                    # Пул не запускается (например, нет ресурсов) - анализ прекращается
+                    print(f"Ошибка запуска анализа громкости: {e}")
+                    with self.__condition:
+                        self.__closed = True
+                        self.__queue.clear()
+                        self.__queued.clear()
+                    break
+            if not in_flight:
+                continue
+
+            done, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Процесс пула аварийно завершился - пул пересоздается, а остальные файлы,
+                    # которые были в работе, возвращаются в начало очереди
+                    print(f"Ошибка анализа громкости {path}: {e}")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = None
+                    with self.__condition:
+                        if not self.__closed:
+                            for unfinished in reversed(list(in_flight.values())):
+                                if unfinished not in self.__queued:
+                                    self.__queue.appendleft(unfinished)
+                                    self.__queued.add(unfinished)
+                    in_flight.clear()
+                    break
+                if result is None:
+                    continue  # Анализ прерван
+                if cache is not None:
+                    cache.put_loudness(path, result["loudness"], result["peak"])
+                if self.__on_analyzed is not None:
+                    self.__on_analyzed(path, result)
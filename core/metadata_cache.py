@@ -0,0 +1,511 @@
+# core/metadata_cache.py
+import atexit
+import os
+import sys
+import sqlite3
+import threading
+from core import metrics
+
+_LOOKUPS = "music_player_cache_lookups_total"
+_LOOKUPS_HELP = "Обращения к кэшам: попадания и промахи"
+_METADATA_HITS = metrics.counter(_LOOKUPS, _LOOKUPS_HELP, {"cache": "metadata", "result": "hit"})
+_METADATA_MISSES = metrics.counter(_LOOKUPS, _LOOKUPS_HELP, {"cache": "metadata", "result": "miss"})
+_SEEK_INDEX_HITS = metrics.counter(_LOOKUPS, _LOOKUPS_HELP, {"cache": "seek_index", "result": "hit"})
+_SEEK_INDEX_MISSES = metrics.counter(_LOOKUPS, _LOOKUPS_HELP, {"cache": "seek_index", "result": "miss"})
+_LOUDNESS_HITS = metrics.counter(_LOOKUPS, _LOOKUPS_HELP, {"cache": "loudness", "result": "hit"})
+_LOUDNESS_MISSES = metrics.counter(_LOOKUPS, _LOOKUPS_HELP, {"cache": "loudness", "result": "miss"})
+_WAVEFORM_HITS = metrics.counter(_LOOKUPS, _LOOKUPS_HELP, {"cache": "waveform", "result": "hit"})
+_WAVEFORM_MISSES = metrics.counter(_LOOKUPS, _LOOKUPS_HELP, {"cache": "waveform", "result": "miss"})
+
+
+def _storable(*paths):
+    """
+    Можно ли сохранить пути в базе: SQLite хранит текст в UTF-8, а имя файла, не являющееся
+    корректным UTF-8, приходит из os.fsdecode с суррогатами. Такие файлы просто не кэшируются
+    """
+    try:
+        for path in paths:
+            path.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+class MetadataCache:
+    """
+    Постоянный кэш метаданных треков на диске (SQLite).
+    Запись считается актуальной, пока у файла не изменились размер и время изменения
+    """
+    SCHEMA_VERSION = 5
+    COMMIT_EVERY = 500  # Сколько изменений накапливать до фиксации транзакции
+    COMMIT_INTERVAL = 1.0  # Не дольше этого (с) держим открытую транзакцию: она блокирует запись другим
+
+    __default = None
+    __default_initialized = False
+    __default_lock = threading.Lock()
+
+    def __init__(self, db_path):
+        self.__db_path = db_path
+        self.__lock = threading.RLock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__pending = 0
+        self.__commit_timer = None  # Отложенная фиксация накопленных изменений
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Соединение используется из нескольких потоков, доступ защищен блокировкой
+        self.__connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.__init_schema()
+
+    @staticmethod
+    def default_path():
+        """Путь к файлу кэша по умолчанию"""
+        cache_dir = os.environ.get("MUSIC_PLAYER_CACHE_DIR")
+        if not cache_dir:
+            if sys.platform == "win32":
+                base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+            else:
+                base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+            cache_dir = os.path.join(base, "music_player")
+        return os.path.join(cache_dir, "metadata.sqlite3")
+
+    @classmethod
+    def get_default(cls):
+        """Получить общий кэш приложения (None, если кэш недоступен)"""
+        with cls.__default_lock:
+            if not cls.__default_initialized:
+                cls.__default_initialized = True
+                try:
+                    cls.__default = cls(cls.default_path())
+                    atexit.register(cls.__default.flush)
+                except Exception as e:
+                    print(f"Ошибка открытия кэша метаданных: {e}")
+                    cls.__default = None
+            return cls.__default
+
+    @classmethod
+    def set_default(cls, cache):
+        """Заменить общий кэш приложения (None - отключить кэширование)"""
+        with cls.__default_lock:
+            cls.__default = cache
+            cls.__default_initialized = True
+
+    def __init_schema(self):
+        """Создание таблиц; при смене версии схемы кэш сбрасывается"""
+        with self.__lock:
+            cursor = self.__connection.cursor()
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.SCHEMA_VERSION:
+                cursor.execute("DROP TABLE IF EXISTS tracks")
+                cursor.execute("DROP TABLE IF EXISTS seek_indexes")
+                cursor.execute("DROP TABLE IF EXISTS directories")
+                cursor.execute("DROP TABLE IF EXISTS loudness")
+                cursor.execute("DROP TABLE IF EXISTS waveforms")
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS tracks ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                "title TEXT, artist TEXT, album TEXT, duration INTEGER, "
+                "cover_offset INTEGER, cover_size INTEGER)"
+            )
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS seek_indexes ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, data BLOB)"
+            )
+            # Результаты анализа громкости: loudness = NULL - тишина или файл не декодируется
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS loudness ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                "loudness REAL, peak REAL NOT NULL)"
+            )
+            # Обзоры формы волны для полосы перемотки (core.waveform)
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS waveforms ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, data BLOB)"
+            )
+            # Содержимое папок для обхода библиотеки: имена разделены символом \0
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS directories ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, files TEXT, subdirectories TEXT)"
+            )
+            cursor.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+            self.__connection.commit()
+
+    @property
+    def db_path(self):
+        """Путь к файлу базы данных кэша"""
+        return self.__db_path
+
+    @property
+    def hits(self):
+        """Количество попаданий в кэш"""
+        return self.__hits
+
+    @property
+    def misses(self):
+        """Количество промахов кэша"""
+        return self.__misses
+
+    def get_hit_rate(self):
+        """Доля попаданий в кэш (0.0-1.0)"""
+        total = self.__hits + self.__misses
+        return self.__hits / total if total else 0.0
+
+    def reset_stats(self):
+        """Сбросить счетчики попаданий и промахов"""
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, path):
+        """
+        Получить метаданные файла из кэша.
+        Возвращает словарь или None, если записи нет или файл изменился
+        """
+        if not _storable(path):
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Файл удален - запись больше не нужна
+            with self.__lock:
+                self.remove(path)
+                self.__misses += 1
+            _METADATA_MISSES.inc()
+            return None
+
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT size, mtime_ns, title, artist, album, duration, cover_offset, cover_size "
+                "FROM tracks WHERE path = ?",
+                (path,)
+            ).fetchone()
+
+            if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+                self.__misses += 1
+                _METADATA_MISSES.inc()
+                return None
+
+            self.__hits += 1
+            _METADATA_HITS.inc()
+        return {"title": row[2], "artist": row[3], "album": row[4], "duration": row[5],
+                "cover_offset": row[6], "cover_size": row[7]}
+
+    def put(self, path, metadata):
+        """Сохранить метаданные файла в кэш"""
+        if not _storable(path):
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+
+        with self.__lock:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO tracks (path, size, mtime_ns, title, artist, album, duration, "
+                "cover_offset, cover_size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, metadata.get("title"),
+                 metadata.get("artist"), metadata.get("album"), metadata.get("duration", 0),
+                 metadata.get("cover_offset"), metadata.get("cover_size", 0))
+            )
+            self.__mark_dirty()
+        return True
+
+    def get_seek_index(self, path):
+        """Получить сериализованный индекс кадров файла или None"""
+        if not _storable(path):
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT size, mtime_ns, data FROM seek_indexes WHERE path = ?", (path,)
+            ).fetchone()
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+            _SEEK_INDEX_MISSES.inc()
+            return None
+        _SEEK_INDEX_HITS.inc()
+        return row[2]
+
+    def put_seek_index(self, path, data):
+        """Сохранить сериализованный индекс кадров файла"""
+        if not _storable(path):
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+
+        with self.__lock:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO seek_indexes (path, size, mtime_ns, data) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, data)
+            )
+            # Индексы строятся по одному при перемотке - фиксируем сразу
+            self.__connection.commit()
+            self.__pending = 0
+        return True
+
+    def get_loudness(self, path):
+        """
+        Получить результат анализа громкости файла: {"loudness": LUFS или None, "peak": 0-1}
+        или None, если файл не анализировался или изменился
+        """
+        if not _storable(path):
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT size, mtime_ns, loudness, peak FROM loudness WHERE path = ?", (path,)
+            ).fetchone()
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+            _LOUDNESS_MISSES.inc()
+            return None
+        _LOUDNESS_HITS.inc()
+        return {"loudness": row[2], "peak": row[3]}
+
+    def put_loudness(self, path, loudness, peak):
+        """Сохранить результат анализа громкости файла"""
+        if not _storable(path):
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+
+        with self.__lock:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO loudness (path, size, mtime_ns, loudness, peak) VALUES (?, ?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, loudness, peak)
+            )
+            self.__mark_dirty()
+        return True
+
+    def get_waveform(self, path):
+        """Получить сериализованный обзор формы волны файла или None"""
+        if not _storable(path):
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT size, mtime_ns, data FROM waveforms WHERE path = ?", (path,)
+            ).fetchone()
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+            _WAVEFORM_MISSES.inc()
+            return None
+        _WAVEFORM_HITS.inc()
+        return row[2]
+
+    def put_waveform(self, path, data):
+        """Сохранить сериализованный обзор формы волны файла"""
+        if not _storable(path):
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+
+        with self.__lock:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO waveforms (path, size, mtime_ns, data) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, data)
+            )
+            # Обзор строится по одному на трек - фиксируем сразу
+            self.__connection.commit()
+            self.__pending = 0
+        return True
+
+    def get_directory(self, path):
+        """
+        Получить запомненное содержимое папки.
+        Возвращает (mtime_ns, файлы, вложенные папки) или None; актуальность
+        по времени изменения проверяет вызывающий
+        """
+        if not _storable(path):
+            return None
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT mtime_ns, files, subdirectories FROM directories WHERE path = ?", (path,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], self.__split_names(row[1]), self.__split_names(row[2])
+
+    def put_directory(self, path, mtime_ns, files, subdirectories):
+        """Запомнить содержимое папки на момент времени изменения mtime_ns"""
+        if not _storable(path, *files, *subdirectories):
+            return False
+        with self.__lock:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO directories (path, mtime_ns, files, subdirectories) VALUES (?, ?, ?, ?)",
+                (path, mtime_ns, "\0".join(files), "\0".join(subdirectories))
+            )
+            self.__mark_dirty()
+        return True
+
+    def remove(self, path):
+        """Удалить все записи о файле из кэша"""
+        if not _storable(path):
+            return False
+        with self.__lock:
+            cursor = self.__connection.execute("DELETE FROM tracks WHERE path = ?", (path,))
+            removed = cursor.rowcount
+            cursor = self.__connection.execute("DELETE FROM seek_indexes WHERE path = ?", (path,))
+            removed += cursor.rowcount
+            cursor = self.__connection.execute("DELETE FROM loudness WHERE path = ?", (path,))
+            removed += cursor.rowcount
+            cursor = self.__connection.execute("DELETE FROM waveforms WHERE path = ?", (path,))
+            removed += cursor.rowcount
+            cursor = self.__connection.execute("DELETE FROM directories WHERE path = ?", (path,))
+            removed += cursor.rowcount
+            if removed:
+                self.__mark_dirty()
+            return removed > 0
+
+    def move(self, old_path, new_path):
+        """
+        Перенести записи файла или папки вместе со всем содержимым на новый путь
+        (после переименования размер и время изменения файлов не меняются)
+        """
+        if not _storable(old_path, new_path):
+            return 0
+        first, last = self.__tree_bounds(old_path)
+        moved = 0
+        with self.__lock:
+            for table in ("tracks", "seek_indexes", "loudness", "waveforms", "directories"):
+                cursor = self.__connection.execute(
+                    f"UPDATE OR REPLACE {table} SET path = ? || substr(path, ?) "
+                    "WHERE path = ? OR (path > ? AND path < ?)",
+                    (new_path, len(old_path) + 1, old_path, first, last)
+                )
+                moved += cursor.rowcount
+            if moved:
+                self.__mark_dirty()
+        return moved
+
+    def remove_tree(self, path):
+        """Удалить записи о файле или папке со всем содержимым"""
+        if not _storable(path):
+            return 0
+        first, last = self.__tree_bounds(path)
+        removed = 0
+        with self.__lock:
+            for table in ("tracks", "seek_indexes", "loudness", "waveforms", "directories"):
+                cursor = self.__connection.execute(
+                    f"DELETE FROM {table} WHERE path = ? OR (path > ? AND path < ?)", (path, first, last))
+                removed += cursor.rowcount
+            if removed:
+                self.__mark_dirty()
+        return removed
+
+    def evict_missing(self):
+        """
+        Удалить из кэша записи о файлах и папках, которых больше нет на диске.
+        Долгая операция (проверка каждого пути) - выполняется в фоновом потоке.
+        Файлы с неподключенных дисков остаются: если ближайшая существующая папка -
+        точка монтирования или пустая папка, файл не считается удаленным
+        """
+        with self.__lock:
+            paths = [row[0] for row in self.__connection.execute(
+                "SELECT path FROM tracks UNION SELECT path FROM seek_indexes UNION SELECT path FROM loudness "
+                "UNION SELECT path FROM waveforms UNION SELECT path FROM directories")]
+
+        volumes = {}  # Папка -> доступен ли диск с ней
+        missing = [(path,) for path in paths if not os.path.exists(path) and self.__volume_present(path, volumes)]
+        if missing:
+            with self.__lock:
+                self.__connection.executemany("DELETE FROM tracks WHERE path = ?", missing)
+                self.__connection.executemany("DELETE FROM seek_indexes WHERE path = ?", missing)
+                self.__connection.executemany("DELETE FROM loudness WHERE path = ?", missing)
+                self.__connection.executemany("DELETE FROM waveforms WHERE path = ?", missing)
+                self.__connection.executemany("DELETE FROM directories WHERE path = ?", missing)
+                self.__connection.commit()
+                self.__pending = 0
+        return len(missing)
+
+    def size(self):
+        """Количество записей в кэше"""
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+    def flush(self):
+        """Зафиксировать накопленные изменения на диске"""
+        with self.__lock:
+            if self.__pending:
+                self.__connection.commit()
+                self.__pending = 0
+
+    def close(self):
+        """Зафиксировать изменения и закрыть базу данных"""
+        with self.__lock:
+            if self.__commit_timer is not None:
+                self.__commit_timer.cancel()
+                self.__commit_timer = None
+            self.flush()
+            self.__connection.close()
+
+    @staticmethod
+    def __volume_present(path, volumes):
+        """Доступен ли диск с отсутствующим файлом path (volumes - уже проверенные папки)"""
+        directory = os.path.dirname(path)
+        present = volumes.get(directory)
+        if present is None:
+            existing = directory
+            while existing and not os.path.isdir(existing):
+                parent = os.path.dirname(existing)
+                if parent == existing:
+                    break
+                existing = parent
+            try:
+                # Точка монтирования или пустая папка на месте файла - похоже, диск отключен
+                present = not os.path.ismount(existing) and bool(os.listdir(existing))
+            except OSError:
+                present = False
+            volumes[directory] = present
+        return present
+
+    @staticmethod
+    def __tree_bounds(path):
+        """Границы путей внутри папки path для поиска по первичному ключу: (path/, path0)"""
+        return path + os.sep, path + chr(ord(os.sep) + 1)
+
+    @staticmethod
+    def __split_names(value):
+        """Список имен из строки, где они разделены нулевым символом"""
+        return value.split("\0") if value else []
+
+    def __mark_dirty(self):
+        """
+        Учесть изменение: транзакция фиксируется после COMMIT_EVERY изменений или через
+        COMMIT_INTERVAL после первого из них - пока она открыта, база заблокирована для записи
+        потоку анализа громкости и другим процессам плеера, а при аварии изменения теряются
+        """
+        self.__pending += 1
+        if self.__pending >= self.COMMIT_EVERY:
+            self.__connection.commit()
+            self.__pending = 0
+        elif self.__pending == 1 and (self.__commit_timer is None or not self.__commit_timer.is_alive()):
+            self.__commit_timer = threading.Timer(self.COMMIT_INTERVAL, self.__commit_pending)
+            self.__commit_timer.daemon = True
+            self.__commit_timer.start()
+
+    def __commit_pending(self):
+        """Отложенная фиксация (поток таймера); база может быть уже закрыта"""
+        try:
+            self.flush()
+        except sqlite3.ProgrammingError:
+            pass
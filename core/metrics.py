@@ -0,0 +1,233 @@
+# core/metrics.py
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Границы корзин гистограмм задержек, в секундах
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = False  # Пока метрики выключены, замеры сводятся к одной проверке этого флага
+_export_path = None
+_registry = {}  # (имя, метки) -> метрика
+_registry_lock = threading.Lock()
+
+
+class Counter:
+    """Счетчик событий (только растет)"""
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.value = 0
+        self.__lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """Увеличить счетчик (если метрики включены)"""
+        if _enabled:
+            with self.__lock:
+                self.value += amount
+
+    def reset(self):
+        """Обнулить счетчик"""
+        with self.__lock:
+            self.value = 0
+
+
+class Histogram:
+    """
+    Распределение значений (обычно задержек в секундах) по корзинам с фиксированными границами:
+    запись - поиск корзины и три сложения, квантили оцениваются по корзинам
+    """
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Последняя корзина - больше всех границ
+        self.count = 0
+        self.sum = 0.0
+        self.__lock = threading.Lock()
+
+    def observe(self, value):
+        """Записать значение (если метрики включены)"""
+        if not _enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self.__lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def observe_since(self, started):
+        """Записать время, прошедшее с момента started (результат start()); 0 - замер не начат"""
+        if started:
+            self.observe(time.perf_counter() - started)
+
+    def quantile(self, q):
+        """Оценка квантиля q (0-1) линейной интерполяцией внутри корзины; None без данных"""
+        with self.__lock:
+            counts = list(self.counts)
+            total = self.count
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower  # Выше последней границы оценить нечем
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def reset(self):
+        """Обнулить распределение"""
+        with self.__lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.sum = 0.0
+
+
+def is_enabled():
+    """Собираются ли метрики"""
+    return _enabled
+
+
+def set_enabled(enabled):
+    """Включить или выключить сбор метрик"""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def export_path():
+    """Файл, в который flush() выгружает метрики, или None"""
+    return _export_path
+
+
+def configure_from_environment():
+    """
+    Настройка по переменной MUSIC_PLAYER_METRICS: "1" - собирать метрики,
+    путь к файлу - собирать и выгружать в него (.prom - текстовый формат Prometheus,
+    иначе строки JSON)
+    """
+    global _export_path
+    value = os.environ.get("MUSIC_PLAYER_METRICS", "")
+    if value and value != "0":
+        set_enabled(True)
+        _export_path = None if value == "1" else value
+
+
+def start():
+    """Начало замера: время для Histogram.observe_since или 0, если метрики выключены"""
+    return time.perf_counter() if _enabled else 0.0
+
+
+def counter(name, help_text, labels=None):
+    """Счетчик с именем и метками (один объект на сочетание)"""
+    return _get_or_create(Counter, name, help_text, labels)
+
+
+def histogram(name, help_text, labels=None, buckets=LATENCY_BUCKETS):
+    """Гистограмма с именем и метками (один объект на сочетание)"""
+    return _get_or_create(Histogram, name, help_text, labels, buckets)
+
+
+def _get_or_create(cls, name, help_text, labels, *arguments):
+    """Найти метрику в реестре или зарегистрировать новую"""
+    key = (name, tuple(sorted((labels or {}).items())))
+    with _registry_lock:
+        metric = _registry.get(key)
+        if metric is None:
+            metric = _registry[key] = cls(name, help_text, key[1], *arguments)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"метрика {name} уже зарегистрирована другого типа")
+        return metric
+
+
+def collect():
+    """Все метрики, упорядоченные по имени и меткам"""
+    with _registry_lock:
+        return [_registry[key] for key in sorted(_registry)]
+
+
+def reset():
+    """Обнулить все метрики"""
+    for metric in collect():
+        metric.reset()
+
+
+def _format_labels(labels, extra=()):
+    """Метки в формате Prometheus: {name="value",...}"""
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def export_prometheus():
+    """Снимок метрик в текстовом формате Prometheus"""
+    lines = []
+    described = set()
+    for metric in collect():
+        if metric.name not in described:
+            described.add(metric.name)
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+        if metric.kind == "counter":
+            lines.append(f"{metric.name}{_format_labels(metric.labels)} {metric.value}")
+            continue
+        cumulative = 0
+        for bound, count in zip(metric.buckets + (float("inf"),), metric.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{metric.name}_bucket{_format_labels(metric.labels, [('le', le)])} {cumulative}")
+        lines.append(f"{metric.name}_sum{_format_labels(metric.labels)} {metric.sum}")
+        lines.append(f"{metric.name}_count{_format_labels(metric.labels)} {metric.count}")
+    return "\n".join(lines) + "\n"
+
+
+def export_json():
+    """Снимок метрик словарем (для строки JSON)"""
+    snapshot = []
+    for metric in collect():
+        entry = {"name": metric.name, "type": metric.kind, "labels": dict(metric.labels)}
+        if metric.kind == "counter":
+            entry["value"] = metric.value
+        else:
+            entry.update(count=metric.count, sum=metric.sum, buckets=list(metric.buckets), counts=list(metric.counts))
+        snapshot.append(entry)
+    return {"time": time.time(), "metrics": snapshot}
+
+
+def write(path):
+    """
+    Выгрузить метрики в файл: .prom - текстовый формат Prometheus (файл заменяется целиком,
+    как ждет textfile-коллектор), иначе - дописать строку JSON
+    """
+    try:
+        if path.endswith(".prom"):
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "w", encoding="utf-8") as file:
+                file.write(export_prometheus())
+            os.replace(temporary, path)
+        else:
+            with open(path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(export_json(), ensure_ascii=False) + "\n")
+        return True
+    except OSError as e:
+        print(f"Ошибка выгрузки метрик: {e}")
+        return False
+
+
+def flush():
+    """Выгрузить метрики в файл из MUSIC_PLAYER_METRICS (если он задан)"""
+    if _enabled and _export_path:
+        write(_export_path)
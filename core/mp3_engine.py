@@ -1,46 +1,139 @@
 # core/mp3_engine.py
 from core.audio_engine import AudioEngine
-import pygame
+from core.tag_reader import read_tags
+from core.seek_index import SeekIndex, FileSlice
+from core.loudness import track_gain
+from core import metrics
+import threading
 import os
-import time
+
+_TRACK_LOAD = metrics.histogram("music_player_track_load_seconds", "Загрузка трека в аудио-движок",
+                                {"engine": "pygame"})
+_PLAY_START = metrics.histogram("music_player_play_start_seconds", "От запроса воспроизведения до начала звука",
+                                {"engine": "pygame"})
 
 class MP3Engine(AudioEngine):
     """
-    Реализация аудио-движка с использованием pygame.mixer
+    Реализация аудио-движка с использованием pygame.mixer.
+    Позиция считается по количеству сэмплов, отданных микшером (pygame.mixer.music.get_pos),
+    поэтому не зависит от системных часов и не сбивается после пауз и перемотки.
+    pygame импортируется и устройство вывода открывается не при создании движка,
+    а в prepare() (в фоновом потоке) или при первом воспроизведении.
+    Усиление выравнивания громкости входит в громкость микшера (не выше 1.0); трек из очереди
+    pygame начинает сам, поэтому его усиление применяется при ближайшем poll().
+    Индекс кадров для перемотки строится в фоновом потоке, когда трек начинает играть;
+    до его готовности перемотка выполняется декодером pygame (play(start=...))
     """
+    MIXER_BUFFER = 512  # Размер буфера микшера в сэмплах
+    # get_pos интерполируется по системным часам и может немного отступать назад;
+    # переходом к следующему треку считается только заметный сброс счетчика (мс)
+    CLOCK_RESET_THRESHOLD = 200
+    SILENCE_SECONDS = 0.05  # Длина тишины, которой заменяется трек в очереди pygame
+
     def __init__(self):
-        pygame.mixer.init()
+        self.__pygame = None  # Модуль pygame после открытия устройства вывода
+        self.__opener = None  # Фоновый поток открытия устройства (см. prepare)
+        self.__open_lock = threading.Lock()  # Запуск открытия и применение громкости
+        self.__open_error = None
         self.__current_track = None
         self.__volume = 50  # Громкость от 0 до 100
+        self.__normalize = True  # Выравнивание громкости по результатам анализа
+        self.__gain = 1.0  # Множитель громкости текущего трека (выравнивание)
+        self.__queued_gain = 1.0
         self.__paused = False
         self.__playing = False
-        self.__start_time = 0
+        self.__duration = 0  # Длительность загруженного трека, читается один раз при загрузке
+        self.__offset = 0  # Позиция (с), с которой начался текущий отсчет get_pos
+        self.__clock_base = 0  # Значение get_pos (мс) в момент начала отсчета
         self.__pause_position = 0
-        pygame.mixer.music.set_volume(self.__volume / 100)
+        # Индекс кадров: (путь, SeekIndex или False - индекс не построить) - последний построенный.
+        # Кортеж заменяется целиком, поэтому поток интерфейса не увидит индекс одного трека с путем другого
+        self.__seek_index = None
+        self.__index_lock = threading.Lock()
+        self.__index_wanted = None  # Трек, для которого нужен индекс
+        self.__index_thread = None  # Поток построения индексов (пока есть работа)
+        self.__stream = None  # Открытый срез файла после перемотки
+        self.__queued = None  # Следующий трек, загруженный в очередь pygame
+        self.__queued_duration = 0
+        self.__last_clock = 0  # Последнее значение get_pos, по его сбросу виден переход к следующему треку
+        self.__latency = self.MIXER_BUFFER / 44100  # Уточняется при открытии устройства
+        self.__end_event = None
+
+    def prepare(self):
+        """Начать открывать устройство вывода в фоновом потоке"""
+        with self.__open_lock:
+            if self.__pygame is None and self.__opener is None:
+                self.__opener = threading.Thread(target=self.__open_device, name="audio-open", daemon=True)
+                self.__opener.start()
+
+    def __device(self):
+        """
+        Модуль pygame с открытым устройством вывода.
+        Дожидается фонового открытия или открывает устройство сразу
+        """
+        if self.__pygame is not None:
+            return self.__pygame
+        with self.__open_lock:
+            opener = self.__opener
+        if opener is not None:
+            opener.join()
+        else:
+            self.__open_device()
+        if self.__pygame is None:
+            raise RuntimeError(f"аудио-устройство недоступно: {self.__open_error}")
+        return self.__pygame
+
+    def __open_device(self):
+        """Импортировать pygame и открыть микшер (в фоновом потоке или при первом воспроизведении)"""
+        try:
+            import pygame
+            pygame.mixer.init(buffer=self.MIXER_BUFFER)
+
+            # Задержка вывода: сэмплы в буфере микшера уже посчитаны, но еще не прозвучали
+            frequency = (pygame.mixer.get_init() or (44100,))[0]
+            self.__latency = self.MIXER_BUFFER / frequency
 
-        # Регистрируем обработчик события окончания трека
-        pygame.mixer.music.set_endevent(pygame.USEREVENT)
+            # Регистрируем обработчик события окончания трека
+            self.__end_event = pygame.USEREVENT
+            pygame.mixer.music.set_endevent(self.__end_event)
+            # Под блокировкой: set_volume, вызванный во время открытия, либо уже увидит модуль,
+            # либо его значение применится здесь
+            with self.__open_lock:
+                self.__pygame = pygame
+                pygame.mixer.music.set_volume(self.__mixer_volume())
+        except Exception as e:
+            self.__open_error = e
+            print(f"Ошибка открытия аудио-устройства: {e}")
 
     def play(self, track_path=None):
         """
         Начать воспроизведение аудиофайла.
         Если track_path не указан, возобновляет воспроизведение после паузы.
         """
+        started = metrics.start()
         try:
+            pygame = self.__device()
             if track_path is not None:
                 # Новый трек - загружаем и воспроизводим
+                loading = metrics.start()
                 pygame.mixer.music.load(track_path)
+                _TRACK_LOAD.observe_since(loading)
+                self.__set_gain(self.__track_gain(track_path))
                 pygame.mixer.music.play()
+                _PLAY_START.observe_since(started)
+                self.__close_stream()
+                self.__queued = None
                 self.__current_track = track_path
-                self.__start_time = time.time()
+                self.__request_index(track_path)
+                self.__duration = self.__read_duration(track_path)
+                self.__restart_clock(0)
                 self.__paused = False
                 self.__playing = True
                 self.__pause_position = 0
                 return True
             elif self.__paused and self.__current_track:
-                # Возобновляем после паузы
+                # Возобновляем после паузы: счетчик сэмплов на паузе не растет
                 pygame.mixer.music.unpause()
-                self.__start_time = time.time() - self.__pause_position
                 self.__paused = False
                 self.__playing = True
                 return True
@@ -51,32 +144,114 @@ class MP3Engine(AudioEngine):
 
     def pause(self):
         """Поставить воспроизведение на паузу"""
-        if self.__current_track and not self.__paused and pygame.mixer.music.get_busy():
-            self.__pause_position = time.time() - self.__start_time
+        if not self.__current_track or self.__paused:
+            return False
+        pygame = self.__device()
+        if pygame.mixer.music.get_busy():
             pygame.mixer.music.pause()
+            self.__pause_position = self.__clock_position()
             self.__paused = True
             return True
         return False
 
     def stop(self):
         """Остановить воспроизведение"""
-        pygame.mixer.music.stop()
+        if self.__pygame is not None:
+            self.__pygame.mixer.music.stop()
         self.__paused = False
         self.__playing = False
         self.__pause_position = 0
+        self.__queued = None
         return True
 
+    def queue(self, track_path):
+        """Загрузить следующий трек в очередь pygame: он начнется без паузы после текущего"""
+        if track_path is None:
+            if self.__queued is not None and self.__pygame is not None:
+                # pygame не умеет очищать очередь - поставленный трек заменяется короткой тишиной,
+                # чтобы убранный трек не зазвучал до ближайшего poll (тот остановит воспроизведение)
+                try:
+                    self.__pygame.mixer.music.queue(self.__silence(), "wav")
+                except Exception as e:
+                    print(f"Ошибка при очистке очереди: {e}")
+            self.__queued = None
+            return True
+        try:
+            pygame = self.__device()
+            pygame.mixer.music.queue(track_path)
+            self.__queued = track_path
+            self.__queued_duration = self.__read_duration(track_path)
+            self.__queued_gain = self.__track_gain(track_path)
+            return True
+        except Exception as e:
+            print(f"Ошибка при загрузке следующего трека: {e}")
+            self.__queued = None
+            return False
+
+    def __silence(self):
+        """WAV с тишиной в памяти (новый на каждый вызов: pygame закрывает отыгранный поток)"""
+        # Нужны только при очистке очереди - не загружаются при запуске
+        import io
+        import wave
+        frequency, _, channels = self.__pygame.mixer.get_init() or (44100, -16, 2)
+        data = io.BytesIO()
+        with wave.open(data, "wb") as f:
+            f.setnchannels(channels)
+            f.setsampwidth(2)
+            f.setframerate(frequency)
+            f.writeframes(bytes(round(frequency * self.SILENCE_SECONDS) * channels * 2))
+        data.seek(0)
+        return data
+
+    def poll(self):
+        """Проверить, не начал ли играть трек из очереди"""
+        if not self.__playing or self.__paused:
+            return None
+
+        pygame = self.__device()
+        switched = False
+        if pygame.display.get_init():
+            # События pygame доступны только при инициализированной видеоподсистеме SDL
+            switched = bool(pygame.event.get(self.__end_event))
+
+        played = pygame.mixer.music.get_pos()
+        if played >= 0 and pygame.mixer.music.get_busy():
+            # При старте трека из очереди pygame обнуляет счетчик сэмплов
+            if played + self.CLOCK_RESET_THRESHOLD < self.__last_clock:
+                switched = True
+            self.__last_clock = max(played, self.__last_clock) if not switched else played
+
+        if not switched:
+            return None
+
+        started = self.__queued
+        if started is None:
+            # Заиграл трек, который уже убран из очереди - останавливаем его
+            self.stop()
+            return None
+
+        self.__close_stream()
+        self.__current_track = started
+        self.__request_index(started)
+        self.__duration = self.__queued_duration
+        self.__set_gain(self.__queued_gain)
+        self.__queued = None
+        # Отсчет нового трека начался с нуля в момент переключения, а не в момент опроса
+        self.__offset = 0
+        self.__clock_base = 0
+        return started
+
     def is_playing(self):
         """Проверить, воспроизводится ли трек"""
-        # Проверяем фактическое состояние pygame
-        actually_playing = pygame.mixer.music.get_busy()
+        if not self.__playing or self.__paused:
+            return False
 
         # Если мы думаем, что трек играет, но pygame говорит, что нет - значит трек закончился
-        if self.__playing and not actually_playing and not self.__paused:
+        if not self.__device().mixer.music.get_busy():
             self.__playing = False
             return False
 
-        return self.__playing and not self.__paused
+        return True
 
     def is_paused(self):
         """Проверить, на паузе ли воспроизведение"""
@@ -96,42 +271,50 @@ class MP3Engine(AudioEngine):
             return self.__pause_position
 
         # Проверяем, не закончился ли трек
-        if not pygame.mixer.music.get_busy() and not self.__paused:
+        if not self.__device().mixer.music.get_busy():
             self.__playing = False
             # Если трек закончился, возвращаем его длительность
-            return self.get_duration()
-
-        # Если трек воспроизводится, вычисляем текущую позицию
-        current_pos = time.time() - self.__start_time
-        # Проверяем, не превышает ли позиция длительность трека
-        duration = self.get_duration()
-        if duration > 0 and current_pos > duration:
-            return duration
+            return self.__duration
 
-        return current_pos
+        return self.__clock_position()
 
     def set_position(self, position):
         """
-        Установить позицию воспроизведения в секундах
-        Pygame не поддерживает перемотку напрямую, поэтому перезагружаем трек
-        и устанавливаем начальное время на position секунд назад
+        Установить позицию воспроизведения в секундах.
+        По индексу кадров находим байтовое смещение нужного кадра и отдаем декодеру
+        поток прямо с него - без декодирования файла от начала
         """
         if not self.__current_track or position < 0:
             return False
 
         try:
+            pygame = self.__device()
             # Сохраняем, воспроизводится ли трек сейчас
             was_playing = pygame.mixer.music.get_busy() and not self.__paused
 
-            # Останавливаем воспроизведение
-            pygame.mixer.music.stop()
-
-            # Загружаем трек заново и устанавливаем начальную позицию
-            pygame.mixer.music.load(self.__current_track)
-            pygame.mixer.music.play(start=position)
+            entry = self.__seek_index
+            index = entry[1] if entry is not None and entry[0] == self.__current_track else None
+            if index:
+                offset, position = index.locate(position)
+                stream = FileSlice(self.__current_track, offset)
+                pygame.mixer.music.load(stream, "mp3")
+                pygame.mixer.music.play()
+                self.__close_stream()
+                self.__stream = stream
+                if self.__queued is not None:
+                    # Перезагрузка потока сбрасывает очередь - ставим следующий трек заново
+                    pygame.mixer.music.queue(self.__queued)
+            else:
+                # Индекс еще строится или его не построить (нестандартный файл) - перезагружаем трек
+                # и просим декодер начать с позиции position
+                pygame.mixer.music.stop()
+                pygame.mixer.music.load(self.__current_track)
+                pygame.mixer.music.play(start=position)
+                if self.__queued is not None:
+                    pygame.mixer.music.queue(self.__queued)
 
-            # Обновляем время начала
-            self.__start_time = time.time() - position
+            # Отсчет сэмплов после play() начинается с нуля
+            self.__restart_clock(position)
 
             # Если трек был на паузе, снова ставим на паузу
             if not was_playing and self.__paused:
@@ -139,28 +322,48 @@ class MP3Engine(AudioEngine):
                 self.__pause_position = position
             else:
                 self.__paused = False
+                self.__playing = True
 
             return True
         except Exception as e:
             print(f"Ошибка при перемотке: {e}")
             return False
 
+    def __request_index(self, track_path):
+        """Построить индекс кадров трека в фоновом потоке (сканирование длинного файла занимает заметное время)"""
+        with self.__index_lock:
+            self.__index_wanted = track_path
+            if self.__index_thread is None:
+                self.__index_thread = threading.Thread(target=self.__build_indexes, name="seek-index", daemon=True)
+                self.__index_thread.start()
+
+    def __build_indexes(self):
+        """Поток построения индексов: строит индекс последнего запрошенного трека, пока запросы не кончатся"""
+        while True:
+            with self.__index_lock:
+                track_path = self.__index_wanted
+                entry = self.__seek_index
+                if entry is not None and entry[0] == track_path:
+                    self.__index_thread = None
+                    return
+            try:
+                index = SeekIndex.load(track_path) or False
+            except Exception as e:
+                print(f"Ошибка построения индекса кадров: {e}")
+                index = False
+            self.__seek_index = (track_path, index)
+
     def get_duration(self):
         """Получить длительность текущего трека в секундах"""
-        try:
-            if self.__current_track and os.path.exists(self.__current_track):
-                from mutagen.mp3 import MP3
-                audio = MP3(self.__current_track)
-                return int(audio.info.length)
-        except Exception as e:
-            print(f"Ошибка при получении длительности: {e}")
-        return 0
+        return int(self.__duration)
 
     def set_volume(self, volume):
         """Установить громкость (0-100)"""
         if 0 <= volume <= 100:
-            self.__volume = volume
-            pygame.mixer.music.set_volume(volume / 100)
+            with self.__open_lock:
+                self.__volume = volume
+                if self.__pygame is not None:
+                    self.__pygame.mixer.music.set_volume(self.__mixer_volume())
             return True
         return False
 
@@ -168,3 +371,65 @@ class MP3Engine(AudioEngine):
         """Получить текущую громкость"""
         return self.__volume
 
+    def set_normalization(self, enabled):
+        """Включить или выключить выравнивание громкости (действует со следующего загруженного трека)"""
+        self.__normalize = bool(enabled)
+        return True
+
+    def get_normalization(self):
+        """Включено ли выравнивание громкости"""
+        return self.__normalize
+
+    def __track_gain(self, track_path):
+        """Множитель громкости трека при загрузке"""
+        return track_gain(track_path) if self.__normalize else 1.0
+
+    def __set_gain(self, gain):
+        """Применить усиление нового трека к громкости микшера"""
+        with self.__open_lock:
+            self.__gain = gain
+            if self.__pygame is not None:
+                self.__pygame.mixer.music.set_volume(self.__mixer_volume())
+
+    def __mixer_volume(self):
+        """Громкость микшера: громкость плеера с усилением трека"""
+        return min(1.0, self.__volume / 100 * self.__gain)
+
+    def __close_stream(self):
+        """Закрыть срез файла, открытый при предыдущей перемотке"""
+        if self.__stream is not None:
+            self.__stream.close()
+            self.__stream = None
+
+    def __restart_clock(self, position):
+        """Начать отсчет позиции с position секунд"""
+        self.__offset = position
+        self.__clock_base = max(0, self.__device().mixer.music.get_pos())
+        self.__last_clock = self.__clock_base
+
+    def __clock_position(self):
+        """Позиция по счетчику сэмплов микшера с поправкой на задержку вывода"""
+        played = self.__device().mixer.music.get_pos()
+        if played < 0:
+            return self.__offset
+        position = self.__offset + max(0.0, (played - self.__clock_base) / 1000 - self.__latency)
+        if self.__duration > 0 and position > self.__duration:
+            return self.__duration
+        return position
+
+    @staticmethod
+    def __read_duration(track_path):
+        """Прочитать длительность трека (один раз при загрузке)"""
+        try:
+            if os.path.exists(track_path):
+                # Длительность из заголовка первого кадра - без полного разбора файла
+                tags = read_tags(track_path)
+                if tags is not None:
+                    return tags["duration"]
+
+                from mutagen.mp3 import MP3
+                audio = MP3(track_path)
+                return audio.info.length
+        except Exception as e:
+            print(f"Ошибка при получении длительности: {e}")
+        return 0
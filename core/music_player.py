@@ -1,49 +1,160 @@
 # core/music_player.py
 from core.audio_engine import AudioEngine
 from core.playlist_manager import PlaylistManager
+from core.playlist import Playlist
 from core.mp3_engine import MP3Engine
+from core.observable import Observable
+from core.metadata_cache import MetadataCache
+from core import metrics
+import os
+import threading
 
-class MusicPlayer:
+_SEEK_TIME = metrics.histogram("music_player_seek_seconds", "Перемотка (MusicPlayer.set_position)")
+
+
+def create_audio_engine(name=None):
+    """
+    Создать аудио-движок по имени: "pygame" - pygame.mixer.music (по умолчанию),
+    "stream" - собственное декодирование в буфер PCM (StreamEngine).
+    Без имени берется значение переменной окружения MUSIC_PLAYER_ENGINE
+    """
+    name = name or os.environ.get("MUSIC_PLAYER_ENGINE", "pygame")
+    if name == "stream":
+        # Требует numpy и miniaudio - импортируем только при выборе этого движка
+        from core.stream_engine import StreamEngine
+        return StreamEngine()
+    if name != "pygame":
+        print(f"Неизвестный аудио-движок {name!r}, используется pygame")
+    return MP3Engine()
+
+
+class MusicPlayer(Observable):
     """
     Основной класс приложения, который координирует работу
-    аудио-движка и менеджера плейлистов
+    аудио-движка и менеджера плейлистов.
+    Об изменениях состояния сообщает событиями (см. subscribe)
     """
+    # События
+    TRACK_CHANGED = "track_changed"  # Аргумент: текущий трек или None
+    STATE_CHANGED = "state_changed"  # Аргумент: одно из состояний STATE_*
+    VOLUME_CHANGED = "volume_changed"  # Аргумент: громкость 0-100
+    POSITION_CHANGED = "position_changed"  # Аргумент: позиция после перемотки, в секундах
+    PLAYLIST_CHANGED = "playlist_changed"  # Аргументы: плейлист, вид изменения, диапазоны
+    PLAYLISTS_CHANGED = "playlists_changed"  # Изменился список плейлистов или текущий плейлист
+
+    # Состояния воспроизведения
+    STATE_STOPPED = "stopped"
+    STATE_PLAYING = "playing"
+    STATE_PAUSED = "paused"
 
     def get_playlist_manager(self):
         """Получить менеджер плейлистов"""
         return self.__playlist_manager
 
-    def __init__(self):
+    def __init__(self, audio_engine=None, store=None):
+        super().__init__()
         # Инкапсуляция: скрываем внутреннюю реализацию аудио-движка и плейлистов
-        self.__audio_engine = MP3Engine()
+        self.__audio_engine = audio_engine if audio_engine is not None else create_audio_engine()
         self.__playlist_manager = PlaylistManager()
+        self.__store = store  # PlaylistStore: плейлисты между запусками (None - только в памяти)
         self.__current_track_index = -1
         self.__is_playing = False
+        self.__state = self.STATE_STOPPED
+        self.__notified_track = None
+        self.__observed_playlist = None
+        self.__loudness_analyzer = None  # LoudnessAnalyzer после start_loudness_analysis
+        self.__eviction = None  # Поток очистки кэша метаданных после start_cache_eviction
+        if store is not None:
+            self.__restore(store)
+        self.__observe_current_playlist()
+        self.__update_track()
+
+    def save_state(self):
+        """Сохранить изменения плейлистов и текущий трек в хранилище (если оно есть)"""
+        if self.__store is not None:
+            self.__store.save(self.__playlist_manager, self.__current_track_index)
+
+    def start_loudness_analysis(self):
+        """
+        Начать фоновый анализ громкости треков для выравнивания (см. LoudnessAnalyzer):
+        текущий плейлист, начиная с текущего трека, затем добавляемые треки.
+        Отключается переменной окружения MUSIC_PLAYER_LOUDNESS=0
+        """
+        if self.__loudness_analyzer is not None or os.environ.get("MUSIC_PLAYER_LOUDNESS") == "0":
+            return
+        # NumPy и пул процессов нужны только анализу - не при запуске плеера
+        from core.loudness_analyzer import LoudnessAnalyzer
+        self.__loudness_analyzer = LoudnessAnalyzer()
+        self.__analyze_playlist()
+
+    def start_cache_eviction(self):
+        """
+        Удалить из кэша метаданных записи о файлах, удаленных с диска, пока плеер не работал
+        (в фоновом потоке, один раз за запуск; пока плеер работает, удаления отслеживает LibraryWatcher)
+        """
+        if self.__eviction is not None:
+            return
+        cache = MetadataCache.get_default()
+        if cache is None:
+            return
+        self.__eviction = threading.Thread(target=self.__evict_missing, args=(cache,), name="cache-eviction",
+                                           daemon=True)
+        self.__eviction.start()
+
+    @staticmethod
+    def __evict_missing(cache):
+        """Поток очистки кэша метаданных"""
+        try:
+            cache.evict_missing()
+        except Exception as e:
+            print(f"Ошибка очистки кэша метаданных: {e}")
+
+    def close(self):
+        """Остановить фоновые задачи плеера (анализ громкости)"""
+        if self.__loudness_analyzer is not None:
+            self.__loudness_analyzer.close()
+            self.__loudness_analyzer = None
+
+    def __restore(self, store):
+        """Загрузить плейлисты и текущий трек из хранилища"""
+        loaded = store.load()
+        if loaded is None:
+            return
+        playlists, playlist_index, track_index = loaded
+        self.__playlist_manager.set_playlists(playlists, playlist_index)
+        playlist = self.__playlist_manager.get_current_playlist()
+        if playlist is not None and 0 <= track_index < playlist.size():
+            self.__current_track_index = track_index
 
     def play(self):
         """Начать воспроизведение текущего трека или возобновить после паузы"""
         if self.__is_playing:
             return False
 
+        result = False
         if self.__audio_engine.is_paused():
             # Возобновляем после паузы
             if self.__audio_engine.play():
                 self.__is_playing = True
-                return True
+                result = True
         elif self.__current_track_index >= 0:
             # Начинаем воспроизведение текущего трека
             current_track = self.__playlist_manager.get_current_playlist().get_track(self.__current_track_index)
             if self.__audio_engine.play(current_track.path):
                 self.__is_playing = True
-                return True
+                result = True
+                # Следующий трек загружается заранее, чтобы переход был без паузы
+                self.__queue_next()
 
-        return False
+        self.__update_state()
+        return result
 
     def pause(self):
         """Поставить воспроизведение на паузу"""
         if self.__is_playing:
             self.__audio_engine.pause()
             self.__is_playing = False
+            self.__update_state()
             return True
         return False
 
@@ -51,52 +162,80 @@ class MusicPlayer:
         """Остановить воспроизведение"""
         self.__audio_engine.stop()
         self.__is_playing = False
+        self.__update_state()
 
     def next_track(self):
         """Перейти к следующему треку"""
         if self.__playlist_manager.get_current_playlist():
             playlist = self.__playlist_manager.get_current_playlist()
             if self.__current_track_index < playlist.size() - 1:
-                self.__current_track_index += 1
-                was_playing = self.__is_playing
-                self.stop()
-                if was_playing:
-                    self.play()
+                self.__switch_track(self.__current_track_index + 1, self.__is_playing)
                 return True
         return False
 
     def previous_track(self):
         """Перейти к предыдущему треку"""
         if self.__current_track_index > 0:
-            self.__current_track_index -= 1
-            was_playing = self.__is_playing
-            self.stop()
-            if was_playing:
-                self.play()
+            self.__switch_track(self.__current_track_index - 1, self.__is_playing)
             return True
         return False
 
     def set_track(self, index):
         """Установить текущий трек по индексу"""
         if self.__playlist_manager.get_current_playlist() and 0 <= index < self.__playlist_manager.get_current_playlist().size():
-            self.__current_track_index = index
-            was_playing = self.__is_playing
-            self.stop()
-            if was_playing:
-                self.play()
+            self.__switch_track(index, self.__is_playing)
             return True
         return False
 
+    def update(self):
+        """
+        Обработать изменения состояния аудио-движка.
+        Вызывается периодически во время воспроизведения: учитывает переход
+        движка к заранее загруженному треку, а при окончании трека без очереди
+        переходит к следующему
+        """
+        started = self.__audio_engine.poll()
+        if started is not None:
+            playlist = self.__playlist_manager.get_current_playlist()
+            next_track = playlist.get_track(self.__current_track_index + 1) if playlist else None
+            if next_track is not None and next_track.path == started:
+                self.__current_track_index += 1
+                self.__update_track()
+                self.__queue_next()
+            elif next_track is not None:
+                # Очередь устарела (плейлист изменился) - начинаем нужный трек заново
+                self.__switch_track(self.__current_track_index + 1, True)
+            else:
+                self.stop()
+            return
+
+        if self.__is_playing and not self.__audio_engine.is_playing() and not self.__audio_engine.is_paused():
+            # Трек доиграл до конца
+            playlist = self.__playlist_manager.get_current_playlist()
+            if playlist and self.__current_track_index < playlist.size() - 1:
+                self.__switch_track(self.__current_track_index + 1, True)
+            else:
+                self.stop()
+
     def get_current_track(self):
         """Получить текущий трек"""
         if self.__current_track_index >= 0 and self.__playlist_manager.get_current_playlist():
             return self.__playlist_manager.get_current_playlist().get_track(self.__current_track_index)
         return None
 
+    def get_current_track_index(self):
+        """Получить индекс текущего трека в текущем плейлисте"""
+        return self.__current_track_index
+
+    def get_state(self):
+        """Получить состояние воспроизведения (STATE_STOPPED, STATE_PLAYING, STATE_PAUSED)"""
+        return self.__state
+
     def is_playing(self):
         """Проверить, воспроизводится ли музыка в данный момент"""
         # Обновляем флаг на основе данных от аудио-движка
         self.__is_playing = self.__audio_engine.is_playing()
+        self.__update_state()
         return self.__is_playing
 
     def is_paused(self):
@@ -113,7 +252,9 @@ class MusicPlayer:
 
     def create_playlist(self, name):
         """Создать новый плейлист"""
-        return self.__playlist_manager.create_playlist(name)
+        index = self.__playlist_manager.create_playlist(name)
+        self._notify(self.PLAYLISTS_CHANGED)
+        return index
 
     def get_playlists(self):
         """Получить список всех плейлистов"""
@@ -125,10 +266,14 @@ class MusicPlayer:
 
     def set_current_playlist(self, index):
         """Установить текущий плейлист по индексу"""
+        previous = self.__playlist_manager.get_current_playlist()
         result = self.__playlist_manager.set_current_playlist(index)
-        if result:
+        if result and self.__playlist_manager.get_current_playlist() is not previous:
             self.__current_track_index = -1
             self.stop()
+            self.__observe_current_playlist()
+            self.__update_track()
+            self._notify(self.PLAYLISTS_CHANGED)
         return result
 
     def get_position(self):
@@ -137,24 +282,198 @@ class MusicPlayer:
 
     def set_position(self, position):
         """Установить позицию воспроизведения в секундах"""
-        return self.__audio_engine.set_position(position)
+        started = metrics.start()
+        result = self.__audio_engine.set_position(position)
+        _SEEK_TIME.observe_since(started)
+        if result:
+            self._notify(self.POSITION_CHANGED, position)
+        return result
 
     def get_duration(self):
         """Получить длительность текущего трека в секундах"""
         return self.__audio_engine.get_duration()
 
+    def set_crossfade(self, seconds, curve=None):
+        """
+        Установить длительность (с) и кривую плавного перехода между треками; 0 - без перехода.
+        Возвращает False, если аудио-движок не поддерживает переход
+        """
+        return self.__audio_engine.set_crossfade(seconds, curve)
+
+    def get_crossfade(self):
+        """Получить (длительность, кривая) плавного перехода"""
+        return self.__audio_engine.get_crossfade()
+
     def set_volume(self, volume):
         """Установить громкость (0-100)"""
-        return self.__audio_engine.set_volume(volume)
+        changed = volume != self.__audio_engine.get_volume()
+        result = self.__audio_engine.set_volume(volume)
+        if result and changed:
+            self._notify(self.VOLUME_CHANGED, volume)
+        return result
 
     def get_volume(self):
         """Получить текущую громкость"""
         return self.__audio_engine.get_volume()
 
+    def set_normalization(self, enabled):
+        """
+        Включить или выключить выравнивание громкости треков (со следующего загруженного трека).
+        Возвращает False, если аудио-движок его не поддерживает
+        """
+        return self.__audio_engine.set_normalization(enabled)
+
+    def get_normalization(self):
+        """Включено ли выравнивание громкости"""
+        return self.__audio_engine.get_normalization()
+
+    def get_pcm_tap(self):
+        """Отвод звучащего PCM для визуализации или None (см. AudioEngine.get_pcm_tap)"""
+        return self.__audio_engine.get_pcm_tap()
+
+    def prepare_audio(self):
+        """Открыть устройство вывода заранее, не дожидаясь первого воспроизведения"""
+        self.__audio_engine.prepare()
+
     def delete_playlist(self, index):
         """Удалить плейлист по индексу"""
-        return self.__playlist_manager.delete_playlist(index)
+        previous = self.__playlist_manager.get_current_playlist()
+        result = self.__playlist_manager.delete_playlist(index)
+        if result:
+            if self.__playlist_manager.get_current_playlist() is not previous:
+                # Удален текущий плейлист - воспроизведение в нем прекращается
+                self.__current_track_index = -1
+                self.stop()
+                self.__observe_current_playlist()
+                self.__update_track()
+            self._notify(self.PLAYLISTS_CHANGED)
+        return result
 
     def get_playlist(self, index):
         """Получить плейлист по индексу"""
-        return self.__playlist_manager.get_playlist(index)
\ No newline at end of file
+        return self.__playlist_manager.get_playlist(index)
+
+    def __switch_track(self, index, autoplay):
+        """Сделать текущим трек index и, если нужно, начать его воспроизведение"""
+        if autoplay and self.__is_playing:
+            # Во время воспроизведения движок может перейти плавно, без остановки
+            track = self.__playlist_manager.get_current_playlist().get_track(index)
+            if self.__audio_engine.fade_to(track.path):
+                self.__current_track_index = index
+                self.__queue_next()
+                self.__update_track()
+                return
+
+        self.__current_track_index = index
+        self.__audio_engine.stop()
+        self.__is_playing = False
+        if autoplay:
+            self.play()
+        self.__update_state()
+        self.__update_track()
+
+    def __queue_next(self):
+        """Загрузить в очередь движка трек, следующий за текущим"""
+        playlist = self.__playlist_manager.get_current_playlist()
+        next_track = playlist.get_track(self.__current_track_index + 1) if playlist else None
+        if next_track is not None and self.__loudness_analyzer is not None:
+            # Следующий трек анализируется вне очереди, чтобы к загрузке усиление было готово
+            self.__loudness_analyzer.submit([next_track.path], urgent=True)
+        self.__audio_engine.queue(next_track.path if next_track else None)
+
+    def __update_state(self):
+        """Оповестить подписчиков, если изменилось состояние воспроизведения"""
+        if self.__is_playing:
+            state = self.STATE_PLAYING
+        elif self.__audio_engine.is_paused():
+            state = self.STATE_PAUSED
+        else:
+            state = self.STATE_STOPPED
+
+        if state != self.__state:
+            self.__state = state
+            self._notify(self.STATE_CHANGED, state)
+
+    def __update_track(self):
+        """Оповестить подписчиков, если сменился текущий трек"""
+        track = self.get_current_track()
+        if track is not self.__notified_track:
+            self.__notified_track = track
+            self._notify(self.TRACK_CHANGED, track)
+
+    def __observe_current_playlist(self):
+        """Подписаться на изменения текущего плейлиста"""
+        playlist = self.__playlist_manager.get_current_playlist()
+        if playlist is self.__observed_playlist:
+            return
+        if self.__observed_playlist is not None:
+            self.__observed_playlist.unsubscribe(Playlist.CHANGED, self.__on_playlist_changed)
+        self.__observed_playlist = playlist
+        if playlist is not None:
+            playlist.subscribe(Playlist.CHANGED, self.__on_playlist_changed)
+            self.__analyze_playlist()
+
+    def __analyze_playlist(self):
+        """Поставить треки текущего плейлиста в очередь анализа громкости, начиная с текущего"""
+        playlist = self.__playlist_manager.get_current_playlist()
+        if self.__loudness_analyzer is None or playlist is None:
+            return
+        tracks = playlist.get_tracks()
+        start = max(0, self.__current_track_index)
+        self.__loudness_analyzer.submit(track.path for track in tracks[start:] + tracks[:start])
+
+    def __on_playlist_changed(self, playlist, kind, ranges):
+        """Обработчик изменения состава текущего плейлиста"""
+        if kind == Playlist.REMOVED and self.__current_track_index >= 0:
+            # Сдвигаем индекс текущего трека с учетом удаленных перед ним
+            shift = 0
+            for start, count in ranges:
+                if start + count <= self.__current_track_index:
+                    shift += count
+                elif start <= self.__current_track_index:
+                    # Удален сам текущий трек
+                    self.__current_track_index = -1
+                    self.stop()
+                    shift = 0
+                    break
+            self.__current_track_index -= shift
+            self.__update_track()
+        elif kind == Playlist.UPDATED:
+            self.__update_track()  # Текущий трек мог быть заменен (переименован, изменены теги)
+            self.__analyze_ranges(playlist, ranges)
+        elif self.__current_track_index >= 0:
+            self.__current_track_index = self.__shifted_index(self.__current_track_index, kind, ranges)
+        if kind == Playlist.INSERTED:
+            self.__analyze_ranges(playlist, ranges)
+
+        if self.__is_playing and kind != Playlist.RENAMED:
+            # Следующий трек мог измениться
+            self.__queue_next()
+
+        self._notify(self.PLAYLIST_CHANGED, playlist, kind, ranges)
+
+    def __analyze_ranges(self, playlist, ranges):
+        """Поставить в очередь анализа громкости добавленные или замененные треки"""
+        if self.__loudness_analyzer is not None:
+            tracks = playlist.get_tracks()
+            self.__loudness_analyzer.submit(track.path for start, count in ranges
+                                            for track in tracks[start:start + count])
+
+    @staticmethod
+    def __shifted_index(index, kind, ranges):
+        """Новый индекс трека index после вставки или перестановки треков плейлиста"""
+        if kind == Playlist.INSERTED:
+            for start, count in ranges:
+                if start <= index:
+                    index += count
+        elif kind == Playlist.MOVED:
+            for start, count, destination in ranges:
+                if start <= index < start + count:
+                    index += destination - start
+                elif start < index < destination + count:
+                    index -= count  # Блок перенесен вперед через этот трек
+                elif destination <= index < start:
+                    index += count  # Блок перенесен назад через этот трек
+        elif kind == Playlist.REORDERED:
+            index = ranges.index(index)
+        return index
@@ -0,0 +1,29 @@
+# core/observable.py
+
+class Observable:
+    """
+    Базовый класс для объектов, которые уведомляют подписчиков о своих изменениях.
+    Подписчики вызываются синхронно в потоке, где произошло изменение
+    """
+    def __init__(self):
+        self.__subscribers = {}
+
+    def subscribe(self, event, callback):
+        """Подписаться на событие"""
+        self.__subscribers.setdefault(event, []).append(callback)
+
+    def unsubscribe(self, event, callback):
+        """Отписаться от события"""
+        callbacks = self.__subscribers.get(event)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+            return True
+        return False
+
+    def _notify(self, event, *args):
+        """Оповестить подписчиков события"""
+        for callback in list(self.__subscribers.get(event, ())):
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Ошибка в обработчике события {event}: {e}")
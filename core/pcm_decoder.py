@@ -0,0 +1,120 @@
+# core/pcm_decoder.py
+import miniaudio
+import numpy as np
+from core.tag_reader import read_tags, parse_frame_header, xing_offset
+from core.seek_index import SeekIndex, FileSlice
+
+MAX_RESERVOIR = 511  # Наибольший объем битового резервуара MPEG Layer III в байтах
+
+
+def read_duration(path):
+    """Длительность файла в секундах: по заголовку первого кадра, иначе через декодер"""
+    try:
+        tags = read_tags(path)
+        if tags is not None:
+            return tags["duration"]
+        return miniaudio.get_file_info(path).duration
+    except Exception as e:
+        print(f"Ошибка при получении длительности: {e}")
+        return 0
+
+
+def _dropped_frames(data, count):
+    """
+    Сколько из первых count кадров MPEG в data декодер пропустит при старте с середины файла:
+    кадр Layer III, чьи данные начинаются в битовом резервуаре предыдущих (еще не прочитанных)
+    кадров, не декодируется
+    """
+    reservoir = 0
+    position = 0
+    for dropped in range(count):
+        frame = parse_frame_header(data[position:position + 4])
+        if frame is None or frame["layer"] != 3:
+            return dropped
+        side_info = position + (4 if data[position + 1] & 0x01 else 6)  # 2 байта CRC, если есть
+        if len(data) < side_info + 2:
+            return dropped
+        if frame["version"] == 1:
+            main_data_begin = (data[side_info] << 1) | (data[side_info + 1] >> 7)
+        else:
+            main_data_begin = data[side_info]
+        if main_data_begin <= reservoir:
+            return dropped
+
+        header_size = xing_offset(frame) + (0 if data[position + 1] & 0x01 else 2)
+        reservoir = min(MAX_RESERVOIR, reservoir + frame["size"] - header_size)
+        position += frame["size"]
+    return count
+
+
+class _SliceSource(miniaudio.StreamableSource):
+    """Источник данных для декодера: файл, начиная с заданного байта"""
+    def __init__(self, path, start):
+        self.__file = FileSlice(path, start)
+
+    def read(self, num_bytes):
+        return self.__file.read(num_bytes)
+
+    def close(self):
+        self.__file.close()
+
+
+class PcmDecoder:
+    """
+    Потоковый декодер файла в блоки PCM (NumPy float32, кадры x каналы) с заданной позиции.
+    Для MP3 декодирование начинается по индексу кадров прямо с нужного кадра
+    (с запасом на битовый резервуар), лишние сэмплы отбрасываются: перемотка точна
+    до сэмпла и не зависит от длины файла
+    """
+    PREROLL_FRAMES = 4  # Кадров MPEG перед нужным: резервуар и перекрытие окон MDCT
+
+    def __init__(self, path, start=0.0, sample_rate=44100, channels=2, block_frames=4096, index=None):
+        self.__path = path
+        self.__index = index  # Готовый индекс кадров (для серии декодеров одного файла)
+        self.__start = max(0.0, start)
+        self.__sample_rate = sample_rate
+        self.__channels = channels
+        self.__block_frames = block_frames
+        self.__source = None
+
+    def blocks(self):
+        """Генератор блоков PCM; индекс кадров загружается при первом обращении"""
+        stream, skip = self.__open()
+        for chunk in stream:
+            block = np.frombuffer(chunk, dtype=np.float32).reshape(-1, self.__channels)
+            if skip:
+                dropped = min(skip, len(block))
+                block = block[dropped:]
+                skip -= dropped
+            if len(block):
+                yield block
+
+    def close(self):
+        """Закрыть файл"""
+        if self.__source is not None:
+            self.__source.close()
+            self.__source = None
+
+    def __open(self):
+        """Открыть декодер; возвращает (поток фрагментов, сколько кадров PCM отбросить)"""
+        index = None
+        if self.__start > 0:
+            index = self.__index or SeekIndex.load(self.__path)
+        if index is None:
+            # С начала файла или не MP3 - декодер сам переходит к нужному сэмплу
+            stream = miniaudio.stream_file(self.__path, miniaudio.SampleFormat.FLOAT32, self.__channels,
+                                           self.__sample_rate, self.__block_frames,
+                                           seek_frame=round(self.__start * self.__sample_rate))
+            return stream, 0
+
+        offset, frame_time = index.locate(self.__start - self.PREROLL_FRAMES * index.frame_duration)
+        preroll = int((self.__start - frame_time) / index.frame_duration)
+        with open(self.__path, "rb") as f:
+            f.seek(offset)
+            dropped = _dropped_frames(f.read((preroll + 1) * 2048), preroll + 1)
+
+        self.__source = _SliceSource(self.__path, offset)
+        stream = miniaudio.stream_any(self.__source, miniaudio.FileFormat.MP3, miniaudio.SampleFormat.FLOAT32,
+                                      self.__channels, self.__sample_rate, self.__block_frames)
+        skip = self.__start - frame_time - dropped * index.frame_duration
+        return stream, max(0, round(skip * self.__sample_rate))
@@ -1,13 +1,39 @@
 # core/playlist.py
 from core.track import Track
+from core.observable import Observable
+from core.collation import collation_key
 
-class Playlist:
+class Playlist(Observable):
     """
-    Класс, представляющий плейлист
+    Класс, представляющий плейлист.
+    Об изменениях состава сообщает событием CHANGED: обработчик получает
+    плейлист, вид изменения и его описание:
+    INSERTED - диапазоны (начало, количество) в новых индексах по возрастанию,
+    REMOVED - диапазоны (начало, количество) в исходных индексах по возрастанию,
+    MOVED - [(начало, количество, новое начало)],
+    REORDERED - список исходных индексов в новом порядке,
+    UPDATED - диапазоны (начало, количество) замененных на месте треков.
+    Пакетные операции сообщают об изменении одним событием
     """
+    CHANGED = "changed"
+
+    # Виды изменений
+    INSERTED = "inserted"
+    REMOVED = "removed"
+    MOVED = "moved"
+    REORDERED = "reordered"
+    UPDATED = "updated"
+    RENAMED = "renamed"
+
+    # Поля, по которым можно сортировать треки
+    SORT_FIELDS = ("artist", "album", "title", "duration")
+
     def __init__(self, name):
+        super().__init__()
         self.__name = name
         self.__tracks = []
+        self.__sort_keys = {}  # Поле -> {трек: ключ сортировки}; ключ вычисляется один раз на трек
+        self.__sort_ranks = {}  # Поле -> места треков по ключу (массив в порядке треков) до изменения состава
 
     @property
     def name(self):
@@ -18,17 +44,184 @@ class Playlist:
     def name(self, value):
         """Установить название плейлиста"""
         self.__name = value
+        self._notify(self.CHANGED, self, self.RENAMED, [])
 
-    def add_track(self, track_path):
-        """Добавить трек в плейлист"""
-        track = Track(track_path)
+    def add_track(self, track_path, lazy=False):
+        """Добавить трек в плейлист (lazy=True - теги читаются при первом обращении)"""
+        track = Track(track_path, lazy=lazy)
         self.__tracks.append(track)
-        return len(self.__tracks) - 1  # Возвращаем индекс добавленного трека
+        index = len(self.__tracks) - 1
+        self.__tracks_changed(self.INSERTED, [(index, 1)])
+        return index  # Возвращаем индекс добавленного трека
+
+    def append_tracks(self, tracks):
+        """Добавить в конец плейлиста уже созданные треки"""
+        start = len(self.__tracks)
+        self.__tracks.extend(tracks)
+        if len(self.__tracks) > start:
+            self.__tracks_changed(self.INSERTED, [(start, len(self.__tracks) - start)])
+        return list(range(start, len(self.__tracks)))  # Индексы добавленных треков
+
+    def insert_many(self, index, tracks):
+        """Вставить уже созданные треки перед позицией index (одним сдвигом списка)"""
+        index = min(max(0, index), len(self.__tracks))
+        tracks = list(tracks)
+        if tracks:
+            self.__tracks[index:index] = tracks
+            self.__tracks_changed(self.INSERTED, [(index, len(tracks))])
+        return list(range(index, index + len(tracks)))  # Индексы вставленных треков
+
+    def remove_many(self, indices):
+        """
+        Удалить треки по индексам за один проход по списку.
+        Возвращает количество удаленных треков
+        """
+        size = len(self.__tracks)
+        ranges = self.__ranges(index for index in set(indices) if 0 <= index < size)
+        if not ranges:
+            return 0
+
+        kept = []
+        previous = 0
+        for start, count in ranges:
+            kept.extend(self.__tracks[previous:start])
+            previous = start + count
+        kept.extend(self.__tracks[previous:])
+        removed = size - len(kept)
+        if self.__sort_keys:
+            self.__forget_sort_keys(track for start, count in ranges for track in self.__tracks[start:start + count])
+        self.__tracks[:] = kept
+        self.__tracks_changed(self.REMOVED, ranges)
+        return removed
+
+    def replace_tracks(self, replacements):
+        """
+        Заменить треки на месте: replacements - словарь {индекс: новый трек}
+        (например, файл переименован или изменены его теги).
+        Возвращает количество замененных треков
+        """
+        size = len(self.__tracks)
+        indices = [index for index in replacements if 0 <= index < size]
+        if not indices:
+            return 0
+
+        if self.__sort_keys:
+            self.__forget_sort_keys([self.__tracks[index] for index in indices])
+        for index in indices:
+            self.__tracks[index] = replacements[index]
+        self.__tracks_changed(self.UPDATED, self.__ranges(indices))
+        return len(indices)
+
+    def move_range(self, start, count, destination):
+        """Переместить count треков с позиции start так, чтобы первый из них оказался на позиции destination"""
+        size = len(self.__tracks)
+        if count <= 0 or start < 0 or start + count > size or not 0 <= destination <= size - count:
+            return False
+        if destination != start:
+            moved = self.__tracks[start:start + count]
+            del self.__tracks[start:start + count]
+            self.__tracks[destination:destination] = moved
+            self.__tracks_changed(self.MOVED, [(start, count, destination)])
+        return True
+
+    def reorder(self, order):
+        """Переставить треки: order - исходные индексы в новом порядке (перестановка)"""
+        size = len(self.__tracks)
+        order = list(order)
+        if len(order) != size:
+            return False
+        seen = bytearray(size)
+        for index in order:
+            if not 0 <= index < size or seen[index]:
+                return False
+            seen[index] = 1
+        self.__tracks[:] = [self.__tracks[index] for index in order]
+        self.__tracks_changed(self.REORDERED, order)
+        return True
+
+    def sort_order(self, columns):
+        """
+        Порядок треков по столбцам без изменения плейлиста.
+        columns - список пар (поле из SORT_FIELDS, по убыванию), первое поле главное.
+        Возвращает исходные индексы в отсортированном порядке. Сортировка устойчивая:
+        треки с равными ключами остаются в порядке плейлиста.
+        Строки сравниваются только при первой сортировке по полю после изменения
+        состава; повторные сортировки идут по целочисленным местам
+        """
+        if not columns or not self.__tracks:
+            return list(range(len(self.__tracks)))
+        import numpy as np  # Нужен только для сортировки - не замедляет запуск
+        # lexsort: последний ключ главный; устойчива, поэтому равные остаются в порядке плейлиста
+        keys = [-self.__sort_ranks_for(field) if descending else self.__sort_ranks_for(field)
+                for field, descending in reversed(columns)]
+        return np.lexsort(keys).tolist()
+
+    def sort(self, columns):
+        """Упорядочить треки плейлиста по столбцам (см. sort_order)"""
+        return self.reorder(self.sort_order(columns))
+
+    def __sort_ranks_for(self, field):
+        """Места треков при сортировке по полю (равные ключи - равные места)"""
+        ranks = self.__sort_ranks.get(field)
+        if ranks is None:
+            import numpy as np
+            keys = self.__sort_keys_for(field)
+            ranks = np.empty(len(keys), dtype=np.int64)
+            rank = -1
+            previous = None
+            for index in sorted(range(len(keys)), key=keys.__getitem__):
+                key = keys[index]
+                if rank < 0 or key != previous:
+                    rank += 1
+                    previous = key
+                ranks[index] = rank
+            self.__sort_ranks[field] = ranks
+        return ranks
+
+    def __sort_keys_for(self, field):
+        """Ключи сортировки по полю в порядке треков; недостающие вычисляются и запоминаются"""
+        if field not in self.SORT_FIELDS:
+            raise ValueError(f"Неизвестное поле сортировки: {field}")
+        cache = self.__sort_keys.setdefault(field, {})
+        keys = [cache.get(track) for track in self.__tracks]
+        if None in keys:
+            for index, key in enumerate(keys):
+                if key is None:
+                    track = self.__tracks[index]
+                    value = getattr(track, field)
+                    keys[index] = cache[track] = value if field == "duration" else collation_key(value or "")
+        return keys
+
+    @staticmethod
+    def __ranges(indices):
+        """Диапазоны (начало, количество) из индексов; соседние индексы объединяются"""
+        ranges = []
+        for index in sorted(indices):
+            if ranges and ranges[-1][0] + ranges[-1][1] == index:
+                ranges[-1][1] += 1
+            else:
+                ranges.append([index, 1])
+        return [(start, count) for start, count in ranges]
+
+    def __tracks_changed(self, kind, details):
+        """Сообщить об изменении состава треков; места для сортировки устаревают"""
+        self.__sort_ranks.clear()
+        self._notify(self.CHANGED, self, kind, details)
+
+    def __forget_sort_keys(self, tracks):
+        """Убрать ключи сортировки удаленных треков"""
+        tracks = list(tracks)
+        for cache in self.__sort_keys.values():
+            for track in tracks:
+                cache.pop(track, None)
 
     def remove_track(self, index):
         """Удалить трек из плейлиста по индексу"""
         if 0 <= index < len(self.__tracks):
-            self.__tracks.pop(index)
+            track = self.__tracks.pop(index)
+            if self.__sort_keys:
+                self.__forget_sort_keys([track])
+            self.__tracks_changed(self.REMOVED, [(index, 1)])
             return True
         return False
 
@@ -1,5 +1,6 @@
 # core/playlist_manager.py
 from core.playlist import Playlist
+from core.track import Track
 
 class PlaylistManager:
     """
@@ -40,6 +41,13 @@ class PlaylistManager:
             return True
         return False
 
+    def set_playlists(self, playlists, current_index=0):
+        """Заменить все плейлисты (например, загруженными из хранилища)"""
+        self.__playlists = list(playlists)
+        if not self.__playlists:
+            self.create_playlist("Избранное")
+        self.__current_playlist_index = current_index if 0 <= current_index < len(self.__playlists) else 0
+
     def get_playlist(self, index):
         """Получить плейлист по индексу"""
         if 0 <= index < len(self.__playlists):
@@ -74,10 +82,95 @@ class PlaylistManager:
         return -1
 
     def add_tracks_to_current_playlist(self, track_paths):
-        """Добавить несколько треков в текущий плейлист"""
+        """
+        Добавить несколько треков в текущий плейлист.
+        Теги разбираются параллельно, порядок треков сохраняется
+        """
+        playlist = self.get_current_playlist()
+        if not playlist:
+            return []
+
+        # Пул процессов импорта нужен только при добавлении треков - не при запуске
+        from core.track_importer import TrackImporter
         added_tracks = []
-        for path in track_paths:
-            index = self.add_track_to_current_playlist(path)
-            if index >= 0:
-                added_tracks.append(index)
-        return added_tracks
\ No newline at end of file
+        TrackImporter().run(track_paths, lambda tracks: added_tracks.extend(playlist.append_tracks(tracks)))
+        return added_tracks
+
+    def has_playlist(self, playlist):
+        """Проверить, что плейлист все еще принадлежит менеджеру"""
+        return any(existing is playlist for existing in self.__playlists)
+
+    def plan_library_changes(self, changes):
+        """
+        Сопоставить изменения файлов на диске (LibraryChanges от LibraryWatcher) с треками
+        плейлистов - без изменения плейлистов, поэтому вызывается в потоке наблюдателя.
+        Возвращает [(плейлист, {индекс: (трек, замена)}, [(индекс, трек)], [новые треки])]
+        для apply_library_changes
+        """
+        prefixes = changes.prefixes()
+        plans = []
+        for playlist in list(self.__playlists):
+            plan = self.__plan_playlist(playlist, changes, prefixes)
+            if plan is not None:
+                plans.append(plan)
+        return plans
+
+    def apply_library_changes(self, changes, plans=None):
+        """
+        Применить к плейлистам изменения файлов на диске.
+        Переименованные и измененные треки заменяются на месте, удаленные убираются,
+        новые файлы добавляются в конец плейлистов, следящих за их папкой.
+        plans - заранее сопоставленные изменения (plan_library_changes); плейлист, измененный
+        после сопоставления, сопоставляется заново. Каждый плейлист получает не больше трех событий
+        """
+        if plans is None:
+            plans = self.plan_library_changes(changes)
+        for playlist, replacements, removed, added in plans:
+            if not self.has_playlist(playlist):
+                continue
+            tracks = playlist.get_tracks()
+            expected = [(index, track) for index, (track, _) in replacements.items()] + removed
+            if any(index >= len(tracks) or tracks[index] is not track for index, track in expected):
+                plan = self.__plan_playlist(playlist, changes, changes.prefixes())
+                if plan is None:
+                    continue
+                _, replacements, removed, added = plan
+
+            if replacements:
+                playlist.replace_tracks({index: replacement for index, (_, replacement) in replacements.items()})
+            if removed:
+                playlist.remove_many([index for index, _ in removed])
+            if added:
+                playlist.append_tracks(added)
+
+    @staticmethod
+    def __plan_playlist(playlist, changes, prefixes):
+        """
+        Изменения одного плейлиста или None, если его не затрагивают.
+        Новый путь вычисляется только для треков внутри затронутых путей - остальные
+        отсеиваются одним str.startswith по всем сразу
+        """
+        tracks = list(playlist.get_tracks())  # Снимок: плейлист может меняться в потоке интерфейса
+        replacements = {}
+        removed = []
+        present = set()
+        if prefixes:
+            for index, track in enumerate(tracks):
+                if not track.path.startswith(prefixes):
+                    continue
+                path = changes.new_path(track.path)
+                if path is None:
+                    removed.append((index, track))
+                    continue
+                present.add(path)
+                replacement = changes.tracks.get(path)
+                if replacement is None and path != track.path:
+                    replacement = Track(path, lazy=True)  # Теги - из кэша, перенесенного на новый путь
+                if replacement is not None and replacement is not track:
+                    replacements[index] = (track, replacement)
+
+        added = [changes.tracks.get(path) or Track(path, lazy=True)
+                 for path in changes.added_to(playlist) if path not in present]
+        if not (replacements or removed or added):
+            return None
+        return playlist, replacements, removed, added
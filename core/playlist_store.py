@@ -0,0 +1,307 @@
+# core/playlist_store.py
+import gc
+import os
+import sqlite3
+import sys
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, repeat
+from core.playlist import Playlist
+from core.track import Track
+
+class PlaylistStore:
+    """
+    Хранилище плейлистов между запусками (SQLite в режиме WAL).
+    Пути треков плейлиста лежат кусками примерно по CHUNK_SIZE, порядок кусков
+    записан в строке плейлиста. Хранилище подписано на изменения плейлистов
+    и помечает затронутые куски - save() переписывает только их.
+    При загрузке треки создаются ленивыми: аудиофайлы не открываются
+    """
+    SCHEMA_VERSION = 1
+    CHUNK_SIZE = 4096
+
+    def __init__(self, db_path):
+        self.__db_path = db_path
+        self.__records = {}  # Плейлист -> сохраненное состояние (см. __track)
+        self.__state = {}  # Последние сохраненные значения таблицы state
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.__connection = sqlite3.connect(db_path)
+        self.__init_schema()
+
+    @staticmethod
+    def default_path():
+        """Путь к файлу хранилища по умолчанию"""
+        data_dir = os.environ.get("MUSIC_PLAYER_DATA_DIR")
+        if not data_dir:
+            if sys.platform == "win32":
+                base = os.environ.get("APPDATA") or os.path.expanduser("~")
+            else:
+                base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+            data_dir = os.path.join(base, "music_player")
+        return os.path.join(data_dir, "playlists.sqlite3")
+
+    @classmethod
+    def open_default(cls):
+        """Открыть хранилище по умолчанию (None, если оно недоступно)"""
+        try:
+            return cls(cls.default_path())
+        except Exception as e:
+            print(f"Ошибка открытия хранилища плейлистов: {e}")
+            return None
+
+    def __init_schema(self):
+        """Создание таблиц; при смене версии схемы хранилище сбрасывается"""
+        cursor = self.__connection.cursor()
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        if version != self.SCHEMA_VERSION:
+            cursor.execute("DROP TABLE IF EXISTS playlists")
+            cursor.execute("DROP TABLE IF EXISTS chunks")
+            cursor.execute("DROP TABLE IF EXISTS state")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        # chunks плейлиста - номера кусков через запятую; пути в куске разделены символом \0
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS playlists ("
+            "id INTEGER PRIMARY KEY, position INTEGER NOT NULL, name TEXT NOT NULL, chunks TEXT NOT NULL)"
+        )
+        cursor.execute("CREATE TABLE IF NOT EXISTS chunks (id INTEGER PRIMARY KEY, paths TEXT NOT NULL)")
+        cursor.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER)")
+        cursor.execute(f"PRAGMA user_version={self.SCHEMA_VERSION}")
+        self.__connection.commit()
+
+    @staticmethod
+    def __chunk_value(text):
+        """
+        Значение куска для базы: SQLite хранит текст в UTF-8, а имена файлов не в UTF-8
+        приходят из os.fsdecode с суррогатами - такой кусок сохраняется байтами без потерь
+        """
+        try:
+            text.encode("utf-8")
+        except UnicodeEncodeError:
+            return text.encode("utf-8", "surrogateescape")
+        return text
+
+    @property
+    def db_path(self):
+        """Путь к файлу базы данных"""
+        return self.__db_path
+
+    def load(self):
+        """
+        Прочитать сохраненные плейлисты.
+        Возвращает (плейлисты, индекс текущего плейлиста, индекс текущего трека)
+        или None, если сохранений еще нет
+        """
+        rows = self.__connection.execute("SELECT id, name, chunks FROM playlists ORDER BY position").fetchall()
+        if not rows:
+            return None
+        chunk_paths = dict(self.__connection.execute("SELECT id, paths FROM chunks"))
+
+        playlists = []
+        # Сотни тысяч новых объектов запускают сборщик мусора снова и снова - на время загрузки он выключен
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for position, (playlist_id, name, chunk_ids) in enumerate(rows):
+                playlist = Playlist(name)
+                tracks = []
+                chunks = []
+                for chunk_id in self.__split_ids(chunk_ids):
+                    text = chunk_paths.get(chunk_id)
+                    if isinstance(text, bytes):
+                        text = text.decode("utf-8", "surrogateescape")  # Кусок с путями не в UTF-8
+                    paths = text.split("\0") if text else []
+                    tracks.extend(map(Track, paths, repeat(None), repeat(True)))
+                    chunks.append([chunk_id, len(paths), False])
+                playlist.append_tracks(tracks)
+                self.__track(playlist, playlist_id, position, chunks)
+                playlists.append(playlist)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        self.__state = dict(self.__connection.execute("SELECT key, value FROM state"))
+        return playlists, self.__state.get("current_playlist", 0), self.__state.get("current_track", -1)
+
+    def save(self, manager, current_track=-1):
+        """
+        Записать изменения плейлистов менеджера с прошлого сохранения одной транзакцией.
+        Возвращает количество переписанных кусков
+        """
+        written = 0
+        playlists = manager.get_playlists()
+        try:
+            with self.__connection:
+                cursor = self.__connection.cursor()
+                for playlist in [playlist for playlist in self.__records if not manager.has_playlist(playlist)]:
+                    self.__delete(cursor, playlist)
+                for position, playlist in enumerate(playlists):
+                    if playlist not in self.__records:
+                        # Новый плейлист: все треки - один помеченный кусок, разбивается при записи
+                        self.__track(playlist, None, -1, [[None, playlist.size(), True]] if playlist.size() else [])
+                    written += self.__save_playlist(cursor, playlist, position)
+
+                state = {"current_playlist": manager.get_current_playlist_index(), "current_track": current_track}
+                for key, value in state.items():
+                    if self.__state.get(key) != value:
+                        cursor.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value))
+                        self.__state[key] = value
+        except sqlite3.Error as e:
+            print(f"Ошибка сохранения плейлистов: {e}")
+        return written
+
+    def is_dirty(self):
+        """Есть ли несохраненные изменения плейлистов"""
+        return any(record["layout_dirty"] or record["name_dirty"] or any(chunk[2] for chunk in record["chunks"])
+                   for record in self.__records.values())
+
+    def close(self):
+        """Отписаться от плейлистов и закрыть базу данных"""
+        for playlist in list(self.__records):
+            playlist.unsubscribe(Playlist.CHANGED, self.__on_changed)
+        self.__records.clear()
+        self.__connection.close()
+
+    def __track(self, playlist, playlist_id, position, chunks):
+        """Начать следить за изменениями плейлиста"""
+        self.__records[playlist] = {
+            "id": playlist_id,
+            "position": position,
+            "chunks": chunks,  # [номер куска или None, треков, изменен ли]
+            "layout_dirty": playlist_id is None,  # Изменился порядок кусков или позиция плейлиста
+            "name_dirty": playlist_id is None,
+        }
+        playlist.subscribe(Playlist.CHANGED, self.__on_changed)
+
+    def __delete(self, cursor, playlist):
+        """Удалить плейлист из хранилища"""
+        record = self.__records.pop(playlist)
+        playlist.unsubscribe(Playlist.CHANGED, self.__on_changed)
+        if record["id"] is not None:
+            cursor.executemany("DELETE FROM chunks WHERE id = ?",
+                               [(chunk[0],) for chunk in record["chunks"] if chunk[0] is not None])
+            cursor.execute("DELETE FROM playlists WHERE id = ?", (record["id"],))
+
+    def __save_playlist(self, cursor, playlist, position):
+        """Переписать измененные куски плейлиста; возвращает их количество"""
+        record = self.__records[playlist]
+        if position != record["position"]:
+            record["position"] = position
+            record["layout_dirty"] = True
+        chunks = record["chunks"]
+        if not (record["layout_dirty"] or record["name_dirty"] or any(chunk[2] for chunk in chunks)):
+            return 0
+
+        tracks = playlist.get_tracks()
+        layout = []
+        written = 0
+        offset = 0
+        index = 0
+        while index < len(chunks):
+            if not chunks[index][2]:
+                layout.append(chunks[index])
+                offset += chunks[index][1]
+                index += 1
+                continue
+
+            # Подряд идущие измененные куски перераспределяются на куски примерно по CHUNK_SIZE
+            end = index
+            total = 0
+            free_ids = []
+            while end < len(chunks) and chunks[end][2]:
+                total += chunks[end][1]
+                if chunks[end][0] is not None:
+                    free_ids.append(chunks[end][0])
+                end += 1
+            pieces = max(1, round(total / self.CHUNK_SIZE)) if total else 0
+            for piece in range(pieces):
+                size = total * (piece + 1) // pieces - total * piece // pieces
+                text = self.__chunk_value("\0".join(track.path for track in tracks[offset:offset + size]))
+                if free_ids:
+                    chunk_id = free_ids.pop(0)
+                    cursor.execute("UPDATE chunks SET paths = ? WHERE id = ?", (text, chunk_id))
+                else:
+                    chunk_id = cursor.execute("INSERT INTO chunks (paths) VALUES (?)", (text,)).lastrowid
+                    record["layout_dirty"] = True
+                layout.append([chunk_id, size, False])
+                offset += size
+                written += 1
+            if free_ids:
+                cursor.executemany("DELETE FROM chunks WHERE id = ?", [(chunk_id,) for chunk_id in free_ids])
+                record["layout_dirty"] = True
+            index = end
+        record["chunks"] = layout
+
+        chunk_ids = ",".join(str(chunk[0]) for chunk in layout)
+        if record["id"] is None:
+            record["id"] = cursor.execute(
+                "INSERT INTO playlists (position, name, chunks) VALUES (?, ?, ?)",
+                (position, playlist.name, chunk_ids)
+            ).lastrowid
+        elif record["layout_dirty"] or record["name_dirty"]:
+            cursor.execute("UPDATE playlists SET position = ?, name = ?, chunks = ? WHERE id = ?",
+                           (position, playlist.name, chunk_ids, record["id"]))
+        record["layout_dirty"] = record["name_dirty"] = False
+        return written
+
+    def __on_changed(self, playlist, kind, ranges):
+        """Обработчик изменения плейлиста: помечаем затронутые куски"""
+        record = self.__records.get(playlist)
+        if record is None:
+            return
+        chunks = record["chunks"]
+        if kind == Playlist.INSERTED:
+            self.__insert(chunks, ranges)
+        elif kind == Playlist.REMOVED:
+            self.__remove(chunks, ranges)
+        elif kind == Playlist.MOVED:
+            for start, count, destination in ranges:
+                self.__remove(chunks, [(start, count)])
+                self.__insert(chunks, [(destination, count)])
+        elif kind == Playlist.UPDATED:
+            self.__remove(chunks, ranges, mark_only=True)
+        elif kind == Playlist.REORDERED:
+            for chunk in chunks:
+                chunk[2] = True
+        elif kind == Playlist.RENAMED:
+            record["name_dirty"] = True
+
+    @staticmethod
+    def __offsets(chunks):
+        """Начала кусков в плейлисте (и общее количество треков последним элементом)"""
+        return list(accumulate((chunk[1] for chunk in chunks), initial=0))
+
+    def __insert(self, chunks, ranges):
+        """Учесть вставку: диапазоны в новых индексах по возрастанию"""
+        if not chunks:
+            chunks.append([None, 0, True])
+        offsets = self.__offsets(chunks)
+        inserted = 0
+        for start, count in ranges:
+            # Позиция в индексах до вставки; на границе кусков трек дописывается в конец предыдущего
+            position = start - inserted
+            chunk = chunks[max(0, bisect_left(offsets, position, 1) - 1)]
+            chunk[1] += count
+            chunk[2] = True
+            inserted += count
+
+    def __remove(self, chunks, ranges, mark_only=False):
+        """Учесть удаление (или замену при mark_only) диапазонов в исходных индексах"""
+        offsets = self.__offsets(chunks)
+        for start, count in ranges:
+            end = start + count
+            index = bisect_right(offsets, start) - 1
+            while start < end and index < len(chunks):
+                taken = min(end, offsets[index + 1]) - start
+                if not mark_only:
+                    chunks[index][1] -= taken
+                chunks[index][2] = True
+                start += taken
+                index += 1
+
+    @staticmethod
+    def __split_ids(value):
+        """Номера кусков из строки через запятую"""
+        return [int(chunk_id) for chunk_id in value.split(",")] if value else []
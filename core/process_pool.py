@@ -0,0 +1,13 @@
+# core/process_pool.py
+import multiprocessing
+
+
+def process_context():
+    """
+    Контекст multiprocessing для пулов процессов плеера. Процессы не ответвляются (fork)
+    от плеера: в нем работают потоки Qt, декодера и вывода, и унаследованная занятая
+    блокировка подвешивает процесс пула. forkserver запускает процессы из чистого
+    процесса-сервера, где его нет - spawn
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
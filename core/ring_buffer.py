@@ -0,0 +1,94 @@
+# core/ring_buffer.py
+import threading
+import numpy as np
+
+class RingBuffer:
+    """
+    Кольцевой буфер кадров PCM фиксированной емкости (NumPy float32, кадры x каналы).
+    Один поток пишет (декодер), другой читает (вывод): писатель ждет, пока освободится
+    место, поэтому память на трек ограничена емкостью буфера
+    """
+    def __init__(self, capacity, channels):
+        self.__data = np.zeros((capacity, channels), dtype=np.float32)
+        self.__capacity = capacity
+        self.__read = 0  # Счетчики прочитанных и записанных кадров с момента создания
+        self.__written = 0
+        self.__finished = False  # Писатель записал все данные
+        self.__closed = False
+        self.__condition = threading.Condition()
+
+    @property
+    def capacity(self):
+        """Емкость буфера в кадрах"""
+        return self.__capacity
+
+    @property
+    def channels(self):
+        """Количество каналов"""
+        return self.__data.shape[1]
+
+    def available(self):
+        """Кадров, готовых к чтению"""
+        with self.__condition:
+            return self.__written - self.__read
+
+    def is_complete(self):
+        """Писатель записал все данные (часть может быть еще не прочитана)"""
+        with self.__condition:
+            return self.__finished
+
+    def is_finished(self):
+        """Писатель закончил, и все данные прочитаны"""
+        with self.__condition:
+            return self.__finished and self.__written == self.__read
+
+    def write(self, block):
+        """
+        Записать блок кадров, дожидаясь свободного места.
+        Возвращает False, если буфер закрыт (писателю пора остановиться)
+        """
+        position = 0
+        with self.__condition:
+            while position < len(block):
+                while not self.__closed and self.__written - self.__read == self.__capacity:
+                    self.__condition.wait()
+                if self.__closed:
+                    return False
+
+                free = self.__capacity - (self.__written - self.__read)
+                count = min(free, len(block) - position)
+                start = self.__written % self.__capacity
+                first = min(count, self.__capacity - start)
+                self.__data[start:start + first] = block[position:position + first]
+                self.__data[:count - first] = block[position + first:position + count]
+                self.__written += count
+                position += count
+                self.__condition.notify_all()
+        return True
+
+    def read(self, frames):
+        """Прочитать до frames кадров без ожидания (копия данных)"""
+        with self.__condition:
+            count = min(frames, self.__written - self.__read)
+            start = self.__read % self.__capacity
+            first = min(count, self.__capacity - start)
+            if first == count:
+                block = self.__data[start:start + count].copy()
+            else:
+                block = np.concatenate((self.__data[start:], self.__data[:count - first]))
+            self.__read += count
+            if count:
+                self.__condition.notify_all()
+            return block
+
+    def finish(self):
+        """Отметить конец данных"""
+        with self.__condition:
+            self.__finished = True
+            self.__condition.notify_all()
+
+    def close(self):
+        """Закрыть буфер: ожидающий писатель получит False"""
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
@@ -0,0 +1,166 @@
+# core/search_index.py
+import re
+from bisect import bisect_left, insort
+from functools import lru_cache
+from core.collation import fold
+from core.playlist import Playlist
+
+_WORD = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=65536)
+def tokenize(text):
+    """Слова текста после fold (кэшируется: исполнители и альбомы повторяются)"""
+    return tuple(_WORD.findall(fold(text))) if text else ()
+
+
+class SearchIndex:
+    """
+    Инвертированный индекс слов названия, исполнителя и альбома треков плейлиста.
+    Запрос - слова, каждое из которых должно быть началом какого-то слова трека.
+    Для коротких начал (первые нажатия клавиш, самые частые совпадения) множества
+    записей хранятся готовыми, длинные ищутся по словарю.
+    Индекс подписан на изменения плейлиста и обновляется по ним, не перестраиваясь;
+    при построении читаются теги ленивых треков
+    """
+    PREFIX_LENGTH = 2  # Начала слов до этой длины (1 или 2 символа) хранятся готовыми множествами
+    def __init__(self, playlist):
+        self.__playlist = playlist
+        self.__postings = {}  # Слово -> множество номеров записей
+        self.__prefixes = {}  # Короткое начало слова -> множество номеров записей
+        self.__vocabulary = []  # Все слова по алфавиту - для поиска по началу слова
+        self.__words = {}  # Номер записи -> слова трека
+        self.__rows = None  # Номер записи -> позиция в плейлисте; пересчитывается после изменений
+        self.__next_id = 0
+        self.__order = self.__add(playlist.get_tracks())  # Номера записей в порядке треков плейлиста
+        playlist.subscribe(Playlist.CHANGED, self.__on_changed)
+
+    def close(self):
+        """Отписаться от изменений плейлиста"""
+        self.__playlist.unsubscribe(Playlist.CHANGED, self.__on_changed)
+
+    def search(self, query):
+        """
+        Найти треки по запросу.
+        Возвращает позиции подходящих треков по возрастанию или None, если запрос пустой
+        """
+        words = tokenize(query)
+        if not words:
+            return None
+
+        found = None
+        # Длинные слова встречаются реже - начинаем с них, чтобы пересечение сразу стало маленьким
+        for word in sorted(set(words), key=len, reverse=True):
+            entries = self.__prefix_entries(word)
+            found = entries if found is None else found & entries
+            if not found:
+                return []
+
+        if len(found) * 8 > len(self.__order):
+            # Большая выборка: один проход по плейлисту дешевле сортировки
+            return [row for row, entry in enumerate(self.__order) if entry in found]
+        rows = self.__row_positions()
+        return sorted(rows[entry] for entry in found)
+
+    def __prefix_entries(self, prefix):
+        """Записи, в которых есть слово, начинающееся с prefix"""
+        if len(prefix) <= self.PREFIX_LENGTH:
+            return self.__prefixes.get(prefix, set())
+
+        vocabulary = self.__vocabulary
+        position = bisect_left(vocabulary, prefix)
+        matched = []
+        while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+            matched.append(self.__postings[vocabulary[position]])
+            position += 1
+        if len(matched) == 1:
+            return matched[0]
+        return set().union(*matched)
+
+    def __row_positions(self):
+        """Позиции записей в плейлисте"""
+        if self.__rows is None:
+            self.__rows = {entry: row for row, entry in enumerate(self.__order)}
+        return self.__rows
+
+    def __add(self, tracks):
+        """Проиндексировать треки; возвращает номера их записей"""
+        entries = []
+        new_words = []
+        all_postings = self.__postings
+        all_prefixes = self.__prefixes
+        for track in tracks:
+            entry = self.__next_id
+            self.__next_id += 1
+            words = frozenset(tokenize(track.title) + tokenize(track.artist) + tokenize(track.album))
+            self.__words[entry] = words
+            for word in words:
+                postings = all_postings.get(word)
+                if postings is None:
+                    postings = all_postings[word] = set()
+                    new_words.append(word)
+                postings.add(entry)
+            for prefix in self.__short_prefixes(words):
+                prefixes = all_prefixes.get(prefix)
+                if prefixes is None:
+                    prefixes = all_prefixes[prefix] = set()
+                prefixes.add(entry)
+            entries.append(entry)
+
+        if len(new_words) > 64:
+            # Пакетом: одна сортировка вместо вставки каждого слова
+            self.__vocabulary = sorted(self.__vocabulary + new_words)
+        else:
+            for word in new_words:
+                insort(self.__vocabulary, word)
+        return entries
+
+    def __remove(self, entries):
+        """Убрать записи из индекса"""
+        for entry in entries:
+            words = self.__words.pop(entry)
+            for word in words:
+                postings = self.__postings[word]
+                postings.discard(entry)
+                if not postings:
+                    del self.__postings[word]
+                    del self.__vocabulary[bisect_left(self.__vocabulary, word)]
+            for prefix in self.__short_prefixes(words):
+                prefixes = self.__prefixes[prefix]
+                prefixes.discard(entry)
+                if not prefixes:
+                    del self.__prefixes[prefix]
+
+    def __short_prefixes(self, words):
+        """Короткие начала слов записи"""
+        return {word[:1] for word in words}.union([word[:2] for word in words])
+
+    def __on_changed(self, playlist, kind, ranges):
+        """Обработчик изменения плейлиста: правим только затронутые записи"""
+        tracks = playlist.get_tracks()
+        if kind == Playlist.INSERTED:
+            for start, count in ranges:
+                self.__order[start:start] = self.__add(tracks[start:start + count])
+        elif kind == Playlist.REMOVED:
+            kept = []
+            previous = 0
+            for start, count in ranges:
+                kept.extend(self.__order[previous:start])
+                self.__remove(self.__order[start:start + count])
+                previous = start + count
+            kept.extend(self.__order[previous:])
+            self.__order = kept
+        elif kind == Playlist.MOVED:
+            for start, count, destination in ranges:
+                moved = self.__order[start:start + count]
+                del self.__order[start:start + count]
+                self.__order[destination:destination] = moved
+        elif kind == Playlist.REORDERED:
+            self.__order = [self.__order[index] for index in ranges]
+        elif kind == Playlist.UPDATED:
+            for start, count in ranges:
+                self.__remove(self.__order[start:start + count])
+                self.__order[start:start + count] = self.__add(tracks[start:start + count])
+        else:
+            return
+        self.__rows = None
@@ -0,0 +1,225 @@
+# core/seek_index.py
+import struct
+import zlib
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from core.tag_reader import read_tags, parse_frame_header, xing_offset
+from core.metadata_cache import MetadataCache
+
+class SeekIndex:
+    """
+    Индекс кадров MPEG: по времени находит байтовое смещение кадра,
+    с которого можно начать декодирование.
+    Строится одним проходом по заголовкам кадров (без декодирования)
+    """
+    READ_CHUNK = 1024 * 1024
+    RESYNC_LIMIT = 32 * 1024  # Сколько байт мусора между кадрами пропускаем в поисках следующего кадра
+    MIN_COVERAGE = 0.9  # Индекс короче этой доли длительности по тегам считается оборванным
+    __HEADER = struct.Struct(">QIHI")  # Смещение первого кадра, частота, сэмплов в кадре, число кадров
+
+    def __init__(self, audio_start, sample_rate, samples_per_frame, frame_sizes):
+        self.__audio_start = audio_start
+        self.__sample_rate = sample_rate
+        self.__samples_per_frame = samples_per_frame
+        self.__frame_sizes = frame_sizes
+        # Смещения начала каждого кадра
+        self.__offsets = array("Q", accumulate(frame_sizes[:-1], initial=audio_start)) if frame_sizes else array("Q")
+
+    @classmethod
+    def build(cls, path):
+        """
+        Построить индекс, просканировав заголовки кадров файла.
+        Мусор между кадрами (обрывки, вставки) пропускается поиском следующего кадра - его байты
+        относятся к предыдущему кадру. None, если файл не распознан или индекс оборван
+        (сканирование остановилось задолго до конца звука) - тогда перемотку выполняет декодер
+        """
+        tags = read_tags(path)
+        if tags is None:
+            return None
+
+        frame_sizes = array("H")
+        headers = {}  # Разобранные заголовки: у файла их обычно всего несколько разных
+        complete = True
+        with open(path, "rb") as f:
+            audio_start = tags["audio_start"]
+            f.seek(audio_start)
+            buffer = f.read(cls.READ_CHUNK)
+            first = parse_frame_header(buffer[:4])
+            if first is None:
+                return None
+
+            # Кадр Xing/Info не содержит звука - в индекс не попадает
+            marker_at = xing_offset(first)
+            offset = 0
+            if first["layer"] == 3 and buffer[marker_at:marker_at + 4] in (b"Xing", b"Info"):
+                audio_start += first["size"]
+                offset = first["size"]
+
+            while True:
+                if offset + 4 > len(buffer):
+                    if offset > len(buffer):
+                        # Кадр заканчивается за пределами буфера - пропускаем его хвост
+                        f.seek(offset - len(buffer), 1)
+                        buffer = b""
+                    else:
+                        buffer = buffer[offset:]
+                    offset = 0
+                    chunk = f.read(cls.READ_CHUNK)
+                    if not chunk:
+                        break
+                    buffer += chunk
+                    continue
+
+                raw = buffer[offset:offset + 4]
+                frame = headers.get(raw)
+                if frame is None:
+                    frame = parse_frame_header(raw)
+                    if frame is None or frame["sample_rate"] != first["sample_rate"]:
+                        if len(buffer) - offset < 2 * cls.RESYNC_LIMIT:
+                            # Для поиска следующего кадра нужен запас данных за мусором
+                            buffer = buffer[offset:] + f.read(cls.READ_CHUNK)
+                            offset = 0
+                        skipped = cls.__resync(buffer, offset, first)
+                        if skipped is None:
+                            # Конец аудиоданных (тег ID3v1/APE) или слишком длинный мусор
+                            complete = len(buffer) - offset < cls.RESYNC_LIMIT
+                            break
+                        if frame_sizes and frame_sizes[-1] + skipped <= 0xFFFF:
+                            frame_sizes[-1] += skipped
+                        elif not frame_sizes:
+                            audio_start += skipped
+                        else:
+                            complete = False
+                            break
+                        offset += skipped
+                        continue
+                    headers[raw] = frame
+
+                frame_sizes.append(frame["size"])
+                offset += frame["size"]
+
+        if not frame_sizes:
+            return None
+        index = cls(audio_start, first["sample_rate"], first["samples"], frame_sizes)
+        if not complete and index.duration < tags["duration"] * cls.MIN_COVERAGE:
+            return None
+        return index
+
+    @classmethod
+    def __resync(cls, buffer, offset, first):
+        """
+        Сколько байт от offset до следующего кадра потока (той же частоты и слоя,
+        за которым следует еще один кадр); None, если в пределах RESYNC_LIMIT кадра нет
+        """
+        limit = min(len(buffer) - 4, offset + cls.RESYNC_LIMIT)
+        position = buffer.find(b"\xFF", offset + 1, limit)
+        while position >= 0:
+            frame = parse_frame_header(buffer[position:position + 4])
+            if (frame is not None and frame["sample_rate"] == first["sample_rate"]
+                    and frame["layer"] == first["layer"]):
+                following = position + frame["size"]
+                if following + 4 > len(buffer) or parse_frame_header(buffer[following:following + 4]):
+                    return position - offset
+            position = buffer.find(b"\xFF", position + 1, limit)
+        return None
+
+    @classmethod
+    def load(cls, path):
+        """
+        Получить индекс файла из кэша метаданных, при отсутствии - построить и сохранить.
+        Оборванный индекс не строится (None) и поэтому не попадает в кэш
+        """
+        cache = MetadataCache.get_default()
+        if cache is not None:
+            data = cache.get_seek_index(path)
+            if data is not None:
+                try:
+                    return cls.from_bytes(data)
+                except (ValueError, struct.error, zlib.error):
+                    pass  # Поврежденная запись будет перезаписана
+
+        index = cls.build(path)
+        if index is not None and cache is not None:
+            cache.put_seek_index(path, index.to_bytes())
+        return index
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Восстановить индекс из сериализованного вида"""
+        audio_start, sample_rate, samples_per_frame, count = cls.__HEADER.unpack_from(data)
+        frame_sizes = array("H")
+        frame_sizes.frombytes(zlib.decompress(data[cls.__HEADER.size:]))
+        if len(frame_sizes) != count:
+            raise ValueError("поврежденный индекс кадров")
+        return cls(audio_start, sample_rate, samples_per_frame, frame_sizes)
+
+    def to_bytes(self):
+        """Компактный сериализованный вид (размеры кадров, сжатые zlib)"""
+        return (self.__HEADER.pack(self.__audio_start, self.__sample_rate,
+                                   self.__samples_per_frame, len(self.__frame_sizes))
+                + zlib.compress(self.__frame_sizes.tobytes(), 6))
+
+    @property
+    def frame_count(self):
+        """Количество звуковых кадров"""
+        return len(self.__frame_sizes)
+
+    @property
+    def sample_rate(self):
+        """Частота дискретизации"""
+        return self.__sample_rate
+
+    @property
+    def frame_duration(self):
+        """Длительность одного кадра в секундах"""
+        return self.__samples_per_frame / self.__sample_rate
+
+    @property
+    def duration(self):
+        """Длительность аудиоданных в секундах"""
+        return len(self.__frame_sizes) * self.frame_duration
+
+    def locate(self, seconds):
+        """
+        Найти кадр для позиции seconds.
+        Возвращает (байтовое смещение кадра, время начала кадра в секундах)
+        """
+        if not self.__frame_sizes:
+            return self.__audio_start, 0.0
+        frame = min(max(0, int(seconds / self.frame_duration)), len(self.__frame_sizes) - 1)
+        return self.__offsets[frame], frame * self.frame_duration
+
+    def locate_offset(self, offset):
+        """Время начала кадра, содержащего байт offset"""
+        frame = max(0, bisect_right(self.__offsets, offset) - 1)
+        return frame * self.frame_duration
+
+
+class FileSlice:
+    """
+    Файл, видимый с заданного смещения: декодер получает поток,
+    который начинается прямо с нужного кадра
+    """
+    def __init__(self, path, start):
+        self.__file = open(path, "rb")
+        self.__start = start
+        self.__file.seek(start)
+
+    def read(self, size=-1):
+        """Прочитать данные"""
+        return self.__file.read(size)
+
+    def seek(self, offset, whence=0):
+        """Перейти к позиции относительно начала среза"""
+        if whence == 0:
+            offset += self.__start
+        return self.__file.seek(offset, whence) - self.__start
+
+    def tell(self):
+        """Текущая позиция относительно начала среза"""
+        return self.__file.tell() - self.__start
+
+    def close(self):
+        """Закрыть файл"""
+        self.__file.close()
@@ -0,0 +1,252 @@
+# core/spectrum.py
+import threading
+import time
+from collections import deque, namedtuple
+import numpy as np
+from core import metrics
+from core.pcm_decoder import PcmDecoder
+
+_SPECTRUM_FRAME = metrics.histogram("music_player_spectrum_frame_seconds", "Расчет кадра визуализации спектра")
+
+# Что сейчас играет: трек, позиция (с) на момент stamp (time.perf_counter) и идет ли воспроизведение
+Playback = namedtuple("Playback", "path position stamp playing")
+# Кадр визуализации: полосы спектра и уровни каналов (0-1)
+SpectrumFrame = namedtuple("SpectrumFrame", "bands levels")
+
+
+class LatestValue:
+    """
+    Ячейка "последнее значение" для передачи данных между потоками без блокировок:
+    писатель заменяет значение, читатель берет последнее опубликованное, промежуточные
+    теряются. Присваивание ссылки в CPython атомарно, а значение публикуется
+    неизменяемым кортежем (номер, значение) - читатель не увидит его наполовину записанным
+    """
+    def __init__(self):
+        self.__slot = (0, None)
+
+    def put(self, value):
+        """Опубликовать значение (пишет один поток)"""
+        self.__slot = (self.__slot[0] + 1, value)
+
+    def get(self):
+        """Последнее значение с его номером: (номер, значение); (0, None) - еще ничего не было"""
+        return self.__slot
+
+
+class PcmTap:
+    """
+    Отвод звучащего PCM из потока вывода StreamEngine.
+    Поток вывода только добавляет ссылку на отданный блок в очередь ограниченной длины
+    (без блокировок и копирования), читатель собирает из последних блоков окно,
+    заканчивающееся кадром, который звучит сейчас (с учетом задержки устройства)
+    """
+    HISTORY_BLOCKS = 32  # Блоков в истории: с запасом на задержку устройства и размер окна
+
+    def __init__(self, sample_rate, channels, latency_frames):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.__latency_frames = latency_frames  # Кадров, отданных приемнику, но еще не прозвучавших
+        self.__blocks = deque(maxlen=self.HISTORY_BLOCKS)  # (номер первого кадра, блок)
+        self.__written = 0
+
+    def push(self, block):
+        """Блок отдан приемнику (вызывается потоком вывода)"""
+        self.__blocks.append((self.__written, block))
+        self.__written += len(block)
+
+    def reset(self):
+        """Отданные блоки сброшены с устройства (перемотка, остановка)"""
+        self.__blocks.clear()
+
+    def window(self, frames, playback):
+        """Последние frames прозвучавших кадров или None, если звука нет"""
+        blocks = tuple(self.__blocks)
+        if not blocks:
+            return None
+        end = blocks[-1][0] + len(blocks[-1][1]) - self.__latency_frames()
+        start = end - frames
+        parts = [block[max(0, start - first):end - first] for first, block in blocks
+                 if first < end and first + len(block) > start]
+        window = np.concatenate(parts) if parts else np.zeros((0, self.channels), dtype=np.float32)
+        if len(window) < frames:
+            # Начало звука - недостающее дополняется тишиной
+            window = np.concatenate((np.zeros((frames - len(window), self.channels), dtype=np.float32), window))
+        return window
+
+    def close(self):
+        """Освободить ресурсы источника"""
+        pass
+
+
+class DecodingSource:
+    """
+    PCM для движков, которые не отдают звук (pygame сам декодирует файл):
+    текущий трек декодируется параллельно с воспроизведением по позиции движка.
+    Декодер идет вперед вместе с позицией и перезапускается по индексу кадров после перемотки
+    """
+    RESYNC_SECONDS = 0.5  # Расхождение с позицией, после которого декодер перезапускается
+    BLOCK_FRAMES = 2048
+
+    def __init__(self, sample_rate=44100, channels=2):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.__path = None
+        self.__decoder = None
+        self.__blocks = None
+        self.__buffer = np.zeros((0, channels), dtype=np.float32)  # Последние декодированные кадры
+        self.__end = 0  # Номер кадра трека, которым заканчивается буфер
+
+    def window(self, frames, playback):
+        """frames кадров трека, заканчивающиеся текущей позицией воспроизведения"""
+        if playback.path is None:
+            return None
+        position = playback.position + (time.perf_counter() - playback.stamp)
+        end = max(frames, round(position * self.sample_rate))
+        if (playback.path != self.__path or end < self.__end - len(self.__buffer) + frames
+                or end > self.__end + self.RESYNC_SECONDS * self.sample_rate):
+            self.__open(playback.path, (end - frames) / self.sample_rate)
+
+        while self.__end < end:
+            block = next(self.__blocks, None)
+            if block is None:
+                block = np.zeros((end - self.__end, self.channels), dtype=np.float32)  # Конец трека
+            self.__buffer = np.concatenate((self.__buffer[-frames:], block))
+            self.__end += len(block)
+
+        stop = len(self.__buffer) - (self.__end - end)
+        window = self.__buffer[max(0, stop - frames):stop]
+        if len(window) < frames:
+            window = np.concatenate((np.zeros((frames - len(window), self.channels), dtype=np.float32), window))
+        return window
+
+    def close(self):
+        """Закрыть декодер"""
+        if self.__decoder is not None:
+            self.__decoder.close()
+            self.__decoder = None
+
+    def __open(self, path, start):
+        """Начать декодирование трека с позиции start (с)"""
+        self.close()
+        start = max(0.0, start)
+        self.__path = path
+        self.__decoder = PcmDecoder(path, start, self.sample_rate, self.channels, self.BLOCK_FRAMES)
+        self.__blocks = self.__decoder.blocks()
+        self.__buffer = np.zeros((0, self.channels), dtype=np.float32)
+        self.__end = round(start * self.sample_rate)
+
+
+class SpectrumAnalyzer:
+    """
+    Визуализация спектра в собственном потоке: с частотой кадров fps берется окно звучащего PCM,
+    считается БПФ с окном Ханна, спектр сводится к полосам с логарифмическим шагом (дБ -> 0-1),
+    а уровни каналов - к среднеквадратичным за кадр. Интерфейсу передается только готовый
+    SpectrumFrame через LatestValue - без блокировок и очередей: отрисовка берет последний кадр.
+    Без воспроизведения значения плавно спадают до нуля, и поток засыпает до следующего запуска
+    """
+    FFT_SIZE = 2048  # Кадров в окне БПФ (~46 мс на 44,1 кГц)
+    BANDS = 32
+    MIN_FREQUENCY = 40.0  # Гц
+    MAX_FREQUENCY = 16000.0
+    FLOOR_DB = -72.0  # Уровень полосы, показываемый как ноль
+    LEVEL_FLOOR_DB = -60.0  # То же для уровней каналов
+    HALF_LIFE = 0.08  # Время спада значений вдвое, с (нарастание - мгновенное)
+
+    def __init__(self, source, fps=60, bands=BANDS):
+        self.__source = source  # PcmTap или DecodingSource
+        self.__period = 1 / fps
+        self.__decay = 0.5 ** (self.__period / self.HALF_LIFE)
+        self.__window = np.hanning(self.FFT_SIZE).astype(np.float32)
+        self.__edges, self.__end = self.__band_edges(source.sample_rate, bands)
+        self.__bands = np.zeros(bands, dtype=np.float32)
+        self.__levels = np.zeros(source.channels, dtype=np.float32)
+        self.__playback = LatestValue()
+        self.__frames = LatestValue()
+        self.__failed = None  # Трек, который не удалось декодировать (не пытаемся на каждом кадре)
+        self.__wake = threading.Event()
+        self.__closed = False
+        self.__thread = threading.Thread(target=self.__run, name="spectrum-analyzer", daemon=True)
+        self.__thread.start()
+
+    def set_playback(self, path, position, playing):
+        """Сообщить, что играет (из потока интерфейса); позиция нужна только DecodingSource"""
+        self.__playback.put(Playback(path, position, time.perf_counter(), playing))
+        if playing:
+            self.__wake.set()
+
+    def latest(self):
+        """Последний кадр с его номером: (номер, SpectrumFrame или None); номер растет с каждым кадром"""
+        return self.__frames.get()
+
+    def close(self):
+        """Остановить поток анализатора"""
+        self.__closed = True
+        self.__wake.set()
+        self.__thread.join()
+        self.__source.close()
+
+    def __band_edges(self, sample_rate, bands):
+        """
+        Первые бины БПФ полос (логарифмический шаг, в каждой полосе хотя бы один бин)
+        и бин за концом последней полосы - бин верхней частоты входит в нее
+        """
+        bin_width = sample_rate / self.FFT_SIZE
+        top = min(self.MAX_FREQUENCY, sample_rate / 2)
+        frequencies = np.geomspace(self.MIN_FREQUENCY, top, bands + 1)[:-1]
+        edges = np.maximum(1, np.round(frequencies / bin_width).astype(int))
+        for band in range(1, bands):
+            edges[band] = max(edges[band], edges[band - 1] + 1)
+        end = max(round(top / bin_width), edges[-1]) + 1
+        return edges, end
+
+    def analyze(self, window):
+        """Полосы спектра и уровни каналов окна PCM (0-1)"""
+        mono = window.mean(axis=1) * self.__window
+        # Нормировка: синус полной громкости дает 1 (0 дБ) при когерентном усилении окна Ханна 0.5
+        magnitude = np.abs(np.fft.rfft(mono)) * (4 / self.FFT_SIZE)
+        peaks = np.maximum.reduceat(magnitude[:self.__end], self.__edges)
+        with np.errstate(divide="ignore"):
+            bands = (20 * np.log10(peaks) - self.FLOOR_DB) / -self.FLOOR_DB
+            recent = window[-round(self.__source.sample_rate * self.__period):]
+            rms = np.sqrt(np.square(recent).mean(axis=0))
+            levels = (20 * np.log10(rms) - self.LEVEL_FLOOR_DB) / -self.LEVEL_FLOOR_DB
+        return np.clip(bands, 0, 1), np.clip(levels, 0, 1)
+
+    def __run(self):
+        """Поток анализатора: кадр за кадром в темпе fps"""
+        deadline = time.perf_counter()
+        while not self.__closed:
+            started = metrics.start()
+            _, playback = self.__playback.get()
+            window = None
+            active = playback is not None and playback.playing and playback.path != self.__failed
+            if active:
+                try:
+                    window = self.__source.window(self.FFT_SIZE, playback)
+                except Exception as e:
+                    print(f"Ошибка визуализации спектра: {e}")
+                    self.__failed = playback.path
+            if window is not None:
+                bands, levels = self.analyze(window)
+            else:
+                bands, levels = 0.0, 0.0
+            # Нарастание сразу, спад - плавный
+            self.__bands = np.maximum(bands, self.__bands * self.__decay).astype(np.float32)
+            self.__levels = np.maximum(levels, self.__levels * self.__decay).astype(np.float32)
+            self.__frames.put(SpectrumFrame(self.__bands, self.__levels))
+            _SPECTRUM_FRAME.observe_since(started)
+
+            if not active and self.__bands.max() < 1e-3 and self.__levels.max() < 1e-3:
+                # Все спало до нуля - спим до запуска воспроизведения
+                self.__frames.put(SpectrumFrame(np.zeros_like(self.__bands), np.zeros_like(self.__levels)))
+                self.__wake.wait()
+                self.__wake.clear()
+                deadline = time.perf_counter()
+                continue
+
+            deadline += self.__period
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -self.__period:
+                deadline = time.perf_counter()  # Отстали больше чем на кадр - пропускаем кадры
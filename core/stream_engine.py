@@ -0,0 +1,442 @@
+# core/stream_engine.py
+import os
+import threading
+from collections import deque
+import numpy as np
+from core import metrics
+from core.audio_engine import AudioEngine
+from core.audio_sink import AudioSink, PygameSink
+from core.crossfade import Crossfade, CURVES
+from core.loudness import track_gain
+from core.pcm_decoder import PcmDecoder, read_duration
+from core.ring_buffer import RingBuffer
+from core.spectrum import PcmTap
+
+_TRACK_LOAD = metrics.histogram("music_player_track_load_seconds", "Загрузка трека в аудио-движок",
+                                {"engine": "stream"})
+_PLAY_START = metrics.histogram("music_player_play_start_seconds", "От запроса воспроизведения до начала звука",
+                                {"engine": "stream"})
+
+
+class _Stream:
+    """Трек, который декодируется в собственном потоке в кольцевой буфер"""
+    def __init__(self, path, start, sink, buffer_frames, block_frames, gain=1.0):
+        self.path = path
+        self.start = start  # Позиция (с) первого кадра в буфере
+        self.gain = gain  # Множитель громкости (выравнивание), применяется при декодировании
+        self.duration = read_duration(path)
+        self.buffer = RingBuffer(buffer_frames, sink.channels)
+        self.output_start = 0  # Номер кадра вывода, с которого трек звучит
+        self.__decoder = PcmDecoder(path, start, sink.sample_rate, sink.channels, block_frames)
+        self.__thread = threading.Thread(target=self.__decode, name="pcm-decoder", daemon=True)
+        self.__thread.start()
+
+    def close(self):
+        """Остановить декодирование"""
+        self.buffer.close()
+
+    def __decode(self):
+        """Декодировать трек в буфер; поток ждет, пока в буфере есть место"""
+        try:
+            for block in self.__decoder.blocks():
+                if self.gain != 1.0:
+                    block = block * np.float32(self.gain)
+                if not self.buffer.write(block):
+                    break
+        except Exception as e:
+            print(f"Ошибка декодирования: {e}")
+        finally:
+            self.__decoder.close()
+            self.buffer.finish()
+
+
+class StreamEngine(AudioEngine):
+    """
+    Аудио-движок с собственным декодированием.
+    Поток декодера заполняет кольцевой буфер кадров PCM (NumPy), поток вывода забирает
+    из него блоки, применяет громкость и отдает приемнику звука (канал pygame или NullSink).
+    Память на трек ограничена емкостью буфера, перемотка точна до сэмпла,
+    а следующий трек из очереди декодируется заранее и начинается без паузы
+    или с плавным переходом (set_crossfade). Усиление выравнивания громкости
+    применяется в потоке декодера трека
+    """
+    PREFETCH_SECONDS = 2.0  # На сколько декодер опережает вывод (емкость буфера трека)
+    BLOCK_FRAMES = 2048  # Кадров в блоке вывода
+
+    def __init__(self, sink=None, prefetch_seconds=PREFETCH_SECONDS, block_frames=BLOCK_FRAMES,
+                 crossfade=0.0, crossfade_curve="equal_power"):
+        self.__sink = sink if sink is not None else PygameSink()
+        self.__block_frames = block_frames
+        self.__buffer_frames = max(block_frames, int(prefetch_seconds * self.__sink.sample_rate))
+        self.__volume = 50  # Громкость от 0 до 100
+        self.__normalize = True  # Выравнивание громкости по результатам анализа
+        self.__outputs = deque()  # Треки в выводе: первый сейчас звучит, из последнего читаются блоки
+        self.__queued = None  # Следующий трек, декодируемый заранее
+        self.__current_track = None
+        self.__duration = 0
+        self.__playing = False
+        self.__paused = False
+        self.__drained = False  # Последний трек вывода прочитан до конца
+        self.__written = 0  # Кадров, отданных приемнику
+        self.__crossfade = 0.0  # Длительность плавного перехода в секундах
+        self.__crossfade_curve = "equal_power"
+        self.__fade = None  # Идущий переход (Crossfade)
+        self.__closed = False
+        self.__play_requested = 0.0  # Начало замера запуска трека (metrics.start); 0 - замера нет
+        self.__pcm_tap = None  # Отвод звука для визуализации, создается по запросу
+        self.__condition = threading.Condition()
+        self.set_crossfade(crossfade, crossfade_curve)
+        self.__thread = threading.Thread(target=self.__output, name="audio-output", daemon=True)
+        self.__thread.start()
+
+    def play(self, track_path=None):
+        """
+        Начать воспроизведение аудиофайла.
+        Если track_path не указан, возобновляет воспроизведение после паузы.
+        """
+        with self.__condition:
+            if track_path is not None:
+                if not os.path.isfile(track_path):
+                    print(f"Ошибка воспроизведения: файл не найден: {track_path}")
+                    return False
+                if self.__queued is not None:
+                    self.__queued.close()
+                    self.__queued = None
+                self.__play_requested = metrics.start()
+                self.__restart(track_path, 0)
+                _TRACK_LOAD.observe_since(self.__play_requested)
+                self.__resume()
+                return True
+            elif self.__paused and self.__current_track:
+                self.__resume()
+                return True
+            return False
+
+    def pause(self):
+        """Поставить воспроизведение на паузу"""
+        with self.__condition:
+            if self.__current_track and self.__playing and not self.__paused and not self.__ended():
+                self.__sink.pause()
+                self.__paused = True
+                return True
+            return False
+
+    def stop(self):
+        """Остановить воспроизведение"""
+        with self.__condition:
+            self.__cancel_fade()
+            for stream in self.__outputs:
+                stream.close()
+            self.__outputs.clear()
+            if self.__queued is not None:
+                self.__queued.close()
+                self.__queued = None
+            self.__sink.flush()
+            if self.__pcm_tap is not None:
+                self.__pcm_tap.reset()
+            if self.__paused:
+                self.__sink.resume()
+            self.__paused = False
+            self.__playing = False
+            return True
+
+    def queue(self, track_path):
+        """Начать заранее декодировать следующий трек: он зазвучит сразу за текущим"""
+        with self.__condition:
+            if self.__queued is not None:
+                self.__queued.close()
+                self.__queued = None
+            if track_path is None:
+                return True
+            if not os.path.isfile(track_path):
+                print(f"Ошибка при загрузке следующего трека: файл не найден: {track_path}")
+                return False
+            self.__queued = self.__open(track_path, 0)
+            self.__condition.notify_all()
+            return True
+
+    def poll(self):
+        """Проверить, не зазвучал ли трек из очереди"""
+        with self.__condition:
+            if not self.__playing or self.__paused or len(self.__outputs) < 2:
+                return None
+            if self.__played_frames() < self.__outputs[1].output_start:
+                return None
+            previous = self.__outputs.popleft()
+            if self.__fade is None or previous is not self.__fade.outgoing:
+                previous.close()  # Затухающий трек закроется в конце перехода
+            current = self.__outputs[0]
+            self.__current_track = current.path
+            self.__duration = current.duration
+            return current.path
+
+    def is_playing(self):
+        """Проверить, воспроизводится ли трек"""
+        with self.__condition:
+            if self.__playing and not self.__paused and self.__ended():
+                self.__playing = False
+            return self.__playing and not self.__paused
+
+    def is_paused(self):
+        """Проверить, на паузе ли воспроизведение"""
+        return self.__paused
+
+    def get_position(self):
+        """Получить текущую позицию воспроизведения в секундах (по кадрам, отданным приемнику)"""
+        with self.__condition:
+            if not self.__current_track or not self.__outputs or not (self.__playing or self.__paused):
+                return 0
+            stream = self.__outputs[0]
+            played = max(0, self.__played_frames() - stream.output_start)
+            position = stream.start + played / self.__sink.sample_rate
+            if stream.duration > 0 and position > stream.duration:
+                return stream.duration
+            return position
+
+    def set_position(self, position):
+        """
+        Установить позицию воспроизведения в секундах.
+        Декодирование начинается заново с кадра, найденного по индексу, - без чтения файла от начала
+        """
+        with self.__condition:
+            if not self.__current_track or position < 0:
+                return False
+            # Усиление трека не меняется при перемотке, даже если анализ успел завершиться
+            gain = next((stream.gain for stream in self.__outputs if stream.path == self.__current_track), None)
+            self.__restart(self.__current_track, position, gain)
+            if not self.__paused:
+                self.__playing = True
+            self.__condition.notify_all()
+            return True
+
+    def fade_to(self, track_path):
+        """
+        Плавно перейти к треку: декодер текущего продолжает работу, пока тот затухает,
+        а если трек уже в очереди, его начало декодировано заранее
+        """
+        with self.__condition:
+            if self.__crossfade <= 0 or not self.__playing or self.__paused or not self.__outputs or self.__ended():
+                return False
+            if not os.path.isfile(track_path):
+                print(f"Ошибка воспроизведения: файл не найден: {track_path}")
+                return False
+
+            outgoing = self.__outputs.pop()
+            self.__cancel_fade()
+            for stream in self.__outputs:
+                stream.close()
+            if self.__queued is not None and self.__queued.path == track_path:
+                incoming = self.__queued
+            else:
+                if self.__queued is not None:
+                    self.__queued.close()
+                incoming = self.__open(track_path, 0)
+            self.__queued = None
+
+            incoming.output_start = self.__written
+            self.__outputs = deque([incoming])
+            self.__drained = False
+            self.__fade = Crossfade(outgoing, self.__crossfade_frames(), self.__crossfade_curve)
+            self.__current_track = track_path
+            self.__duration = incoming.duration
+            self.__condition.notify_all()
+            return True
+
+    def set_crossfade(self, seconds, curve=None):
+        """Установить длительность (с) и кривую плавного перехода (см. crossfade.CURVES); 0 - без перехода"""
+        if seconds < 0 or (curve is not None and curve not in CURVES):
+            return False
+        with self.__condition:
+            self.__crossfade = seconds
+            if curve is not None:
+                self.__crossfade_curve = curve
+        return True
+
+    def get_crossfade(self):
+        """Получить (длительность, кривая) плавного перехода"""
+        return self.__crossfade, self.__crossfade_curve
+
+    def get_duration(self):
+        """Получить длительность текущего трека в секундах"""
+        return int(self.__duration)
+
+    def set_volume(self, volume):
+        """Установить громкость (0-100)"""
+        if 0 <= volume <= 100:
+            self.__volume = volume
+            return True
+        return False
+
+    def get_volume(self):
+        """Получить текущую громкость"""
+        return self.__volume
+
+    def set_normalization(self, enabled):
+        """Включить или выключить выравнивание громкости (действует со следующего загруженного трека)"""
+        self.__normalize = bool(enabled)
+        return True
+
+    def get_normalization(self):
+        """Включено ли выравнивание громкости"""
+        return self.__normalize
+
+    def get_pcm_tap(self):
+        """Отвод звучащего PCM для визуализации (создается при первом запросе)"""
+        with self.__condition:
+            if self.__pcm_tap is None:
+                self.__pcm_tap = PcmTap(self.__sink.sample_rate, self.__sink.channels, self.__sink.latency_frames)
+            return self.__pcm_tap
+
+    def close(self):
+        """Остановить потоки движка и освободить устройство вывода"""
+        self.stop()
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+        self.__thread.join()
+        self.__sink.close()
+
+    def __open(self, track_path, start, gain=None):
+        """
+        Начать декодирование трека с позиции start (gain = None - усиление по анализу громкости).
+        Буфер вмещает весь переход: к его началу оба декодера уже впереди вывода
+        """
+        if gain is None:
+            gain = track_gain(track_path) if self.__normalize else 1.0
+        buffer_frames = max(self.__buffer_frames, self.__crossfade_frames() + 2 * self.__block_frames)
+        return _Stream(track_path, start, self.__sink, buffer_frames, self.__block_frames, gain)
+
+    def __crossfade_frames(self):
+        """Длительность перехода в кадрах"""
+        return int(self.__crossfade * self.__sink.sample_rate)
+
+    def __cancel_fade(self):
+        """Прервать идущий переход"""
+        if self.__fade is not None:
+            self.__fade.outgoing.close()
+            self.__fade = None
+
+    def __restart(self, track_path, start, gain=None):
+        """Заменить звучащий трек новым потоком с позиции start (очередь сохраняется)"""
+        self.__cancel_fade()
+        for stream in self.__outputs:
+            stream.close()
+        self.__sink.flush()
+        if self.__pcm_tap is not None:
+            self.__pcm_tap.reset()
+        stream = self.__open(track_path, start, gain)
+        stream.output_start = self.__written
+        self.__outputs = deque([stream])
+        self.__drained = False
+        self.__current_track = track_path
+        self.__duration = stream.duration
+
+    def __resume(self):
+        """Продолжить вывод после паузы или запуска трека"""
+        if self.__paused:
+            self.__sink.resume()
+        self.__paused = False
+        self.__playing = True
+        self.__condition.notify_all()
+
+    def __played_frames(self):
+        """Номер кадра вывода, который звучит сейчас"""
+        return self.__written - self.__sink.latency_frames()
+
+    def __ended(self):
+        """Все треки вывода прочитаны и доиграли"""
+        return self.__drained and self.__sink.latency_frames() == 0
+
+    def __active(self):
+        """Поток вывода должен отдавать блоки"""
+        return self.__playing and not self.__paused and self.__outputs and not self.__drained
+
+    def __output(self):
+        """Поток вывода: переносит блоки из буферов треков в приемник"""
+        while True:
+            with self.__condition:
+                while not self.__closed and not self.__active():
+                    self.__condition.wait()
+                if self.__closed:
+                    return
+
+            if not self.__sink.wait_ready(AudioSink.POLL_INTERVAL * 10):
+                continue
+
+            with self.__condition:
+                if not self.__active():
+                    continue
+                block = self.__read_block()
+                if block is None:
+                    # Декодер не успевает - ждем данных
+                    self.__condition.wait(AudioSink.POLL_INTERVAL)
+                    continue
+                self.__sink.write(block * (self.__volume / 100))
+                self.__written += len(block)
+                if self.__pcm_tap is not None:
+                    self.__pcm_tap.push(block)  # Ссылка на блок до громкости: спектр не зависит от нее
+                if self.__play_requested:
+                    # Первый блок нового трека отдан устройству - звук пошел
+                    _PLAY_START.observe_since(self.__play_requested)
+                    self.__play_requested = 0.0
+
+    def __read_block(self):
+        """Собрать блок вывода, смешав его с затухающим треком, если идет переход"""
+        if self.__fade is None and self.__crossfade > 0:
+            self.__start_crossfade()
+
+        block = self.__read_stream()
+        fade = self.__fade
+        if fade is None:
+            return block
+        if block is None:
+            if self.__drained:
+                self.__cancel_fade()  # Входящий трек кончился раньше перехода
+            return None
+
+        mixed = fade.mix(block, fade.outgoing.buffer.read(len(block)))
+        if fade.is_done():
+            self.__cancel_fade()
+        return mixed
+
+    def __start_crossfade(self):
+        """Начать переход к треку из очереди, когда у текущего осталось декодированных кадров на переход"""
+        stream = self.__outputs[-1]
+        if self.__queued is None or not stream.buffer.is_complete():
+            return
+        remaining = stream.buffer.available()
+        if remaining > self.__crossfade_frames():
+            return
+        incoming = self.__queued
+        self.__queued = None
+        incoming.output_start = self.__written
+        self.__outputs.append(incoming)
+        self.__fade = Crossfade(stream, remaining, self.__crossfade_curve)
+
+    def __read_stream(self):
+        """
+        Прочитать блок из буфера трека. Когда трек заканчивается, блок дополняется началом
+        трека из очереди - переход без паузы
+        """
+        stream = self.__outputs[-1]
+        parts = []
+        frames = 0
+        while frames < self.__block_frames:
+            data = stream.buffer.read(self.__block_frames - frames)
+            if len(data):
+                parts.append(data)
+                frames += len(data)
+                continue
+            if not stream.buffer.is_finished():
+                break
+            if self.__queued is None:
+                self.__drained = True
+                break
+            stream = self.__queued
+            stream.output_start = self.__written + frames
+            self.__outputs.append(stream)
+            self.__queued = None
+
+        if not parts:
+            return None
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
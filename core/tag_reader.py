@@ -0,0 +1,277 @@
+# core/tag_reader.py
+import os
+import struct
+
+# Сколько байт читать за один раз: тег без обложки и первый кадр MPEG обычно помещаются целиком
+HEAD_SIZE = 64 * 1024
+# Сколько байт после тега просматривать в поисках первого кадра MPEG
+SYNC_WINDOW = 8 * 1024
+
+# Битрейты (кбит/с) по версии MPEG и слою
+_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+
+# Текстовые кадры ID3v2.3/2.4 и их аналоги в ID3v2.2
+_TEXT_FRAMES = {"TIT2": "title", "TPE1": "artist", "TALB": "album",
+                "TT2": "title", "TP1": "artist", "TAL": "album"}
+
+
+class _FileWindow:
+    """
+    Доступ к началу файла через один буфер.
+    Байты за пределами буфера дочитываются только при необходимости
+    """
+    def __init__(self, file, head):
+        self.__file = file
+        self.__head = head
+
+    def read(self, offset, size):
+        """Прочитать size байт с позиции offset"""
+        if offset + size <= len(self.__head):
+            return self.__head[offset:offset + size]
+        self.__file.seek(offset)
+        return self.__file.read(size)
+
+
+def _synchsafe(data):
+    """Декодировать synchsafe-целое (7 бит на байт)"""
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _decode_text(payload):
+    """Декодировать содержимое текстового кадра ID3"""
+    if not payload:
+        return ""
+    encoding, data = payload[0], payload[1:]
+    if encoding == 0:
+        text = data.decode("latin-1")
+    elif encoding == 1:
+        text = data.decode("utf-16")
+    elif encoding == 2:
+        text = data.decode("utf-16-be")
+    elif encoding == 3:
+        text = data.decode("utf-8")
+    else:
+        raise ValueError(f"неизвестная кодировка {encoding}")
+    # Несколько значений в одном кадре разделяются нулевым символом
+    return "/".join(part for part in text.split("\x00") if part)
+
+
+def _parse_id3(window, tags):
+    """
+    Разобрать тег ID3v2 в начале файла.
+    Возвращает смещение конца тега или None, если тег требует полного разбора
+    """
+    header = window.read(0, 10)
+    if len(header) < 10 or header[:3] != b"ID3":
+        return 0
+
+    version, flags = header[3], header[5]
+    tag_end = 10 + _synchsafe(header[6:10])
+    if flags & 0x10:
+        tag_end += 10  # Футер ID3v2.4
+    if version not in (2, 3, 4) or flags & 0x80:
+        return None  # Рассинхронизация всего тега - оставляем mutagen
+
+    position = 10
+    if flags & 0x40 and version in (3, 4):
+        # Расширенный заголовок пропускаем
+        size_bytes = window.read(position, 4)
+        if version == 4:
+            position += _synchsafe(size_bytes)
+        else:
+            position += 4 + struct.unpack(">I", size_bytes)[0]
+
+    id_size, header_size = (3, 6) if version == 2 else (4, 10)
+    while position + header_size <= tag_end:
+        frame_header = window.read(position, header_size)
+        frame_id = frame_header[:id_size]
+        if not frame_id.strip(b"\x00"):
+            break  # Началось заполнение нулями
+        if version == 2:
+            size = int.from_bytes(frame_header[3:6], "big")
+            frame_flags = 0
+        elif version == 4:
+            size = _synchsafe(frame_header[4:8])
+            frame_flags = struct.unpack(">H", frame_header[8:10])[0]
+        else:
+            size = struct.unpack(">I", frame_header[4:8])[0]
+            frame_flags = struct.unpack(">H", frame_header[8:10])[0]
+
+        data_offset = position + header_size
+        if data_offset + size > tag_end:
+            return None
+
+        if version == 4 and frame_flags & 0x000E or version == 3 and frame_flags & 0x00C0:
+            # Сжатые, зашифрованные или рассинхронизированные кадры
+            return None
+        # Перед данными кадра могут стоять байт группы (v2.3 0x0020, v2.4 0x0040)
+        # и, в v2.4, 4 байта исходной длины данных
+        skip = 1 if version == 4 and frame_flags & 0x0040 or version == 3 and frame_flags & 0x0020 else 0
+        if version == 4 and frame_flags & 0x0001:
+            skip += 4
+
+        name = frame_id.decode("latin-1")
+        if name in _TEXT_FRAMES and _TEXT_FRAMES[name] not in tags:
+            tags[_TEXT_FRAMES[name]] = _decode_text(window.read(data_offset + skip, size - skip))
+        elif name == "APIC" and "cover_offset" not in tags:
+            # Саму картинку не читаем, запоминаем только ее положение в файле
+            tags["cover_offset"] = data_offset + skip
+            tags["cover_size"] = size - skip
+        elif name == "PIC" and "cover_offset" not in tags:
+            tags["cover_offset"] = None  # Обложку ID3v2.2 отдаем mutagen
+            tags["cover_size"] = 0
+
+        position = data_offset + size
+
+    return tag_end
+
+
+def parse_frame_header(data):
+    """Разобрать заголовок кадра MPEG; None, если это не заголовок"""
+    if len(data) < 4 or data[0] != 0xFF or data[1] & 0xE0 != 0xE0:
+        return None
+    version_bits = (data[1] >> 3) & 0x03
+    layer_bits = (data[1] >> 1) & 0x03
+    bitrate_index = data[2] >> 4
+    rate_index = (data[2] >> 2) & 0x03
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    version = {0: 2.5, 2: 2, 3: 1}[version_bits]
+    layer = 4 - layer_bits
+    bitrate = _BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (data[2] >> 1) & 0x01
+    mono = (data[3] >> 6) == 3
+
+    if layer == 1:
+        samples = 384
+        size = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if layer == 2 or version == 1 else 576
+        size = samples // 8 * bitrate // sample_rate + padding
+
+    return {"version": version, "layer": layer, "bitrate": bitrate, "sample_rate": sample_rate,
+            "samples": samples, "size": size, "mono": mono}
+
+
+def _find_first_frame(window, start):
+    """Найти первый кадр MPEG после тега; возвращает (смещение, заголовок, байты кадра)"""
+    data = window.read(start, SYNC_WINDOW)
+    position = data.find(b"\xFF")
+    while 0 <= position < len(data) - 4:
+        frame = parse_frame_header(data[position:position + 4])
+        if frame is not None:
+            # Проверяем, что следом идет еще один кадр - иначе это случайные байты
+            following = position + frame["size"]
+            if following + 4 > len(data) or parse_frame_header(data[following:following + 4]):
+                return start + position, frame, data[position:]
+        position = data.find(b"\xFF", position + 1)
+    return None, None, None
+
+
+def xing_offset(frame):
+    """Смещение заголовка Xing/Info от начала кадра"""
+    if frame["version"] == 1:
+        return 4 + (17 if frame["mono"] else 32)
+    return 4 + (9 if frame["mono"] else 17)
+
+
+def _read_duration(frame, frame_data, audio_start, file_size):
+    """Длительность по заголовку Xing/Info/VBRI первого кадра или по битрейту"""
+    frames = None
+    if frame["layer"] == 3:
+        offset = xing_offset(frame)
+        marker = frame_data[offset:offset + 4]
+        if marker in (b"Xing", b"Info") and len(frame_data) >= offset + 12:
+            flags = struct.unpack(">I", frame_data[offset + 4:offset + 8])[0]
+            if flags & 0x01:
+                frames = struct.unpack(">I", frame_data[offset + 8:offset + 12])[0]
+        elif frame_data[36:40] == b"VBRI" and len(frame_data) >= 54:
+            frames = struct.unpack(">I", frame_data[50:54])[0]
+
+    if frames:
+        return frames * frame["samples"] / frame["sample_rate"]
+    # Постоянный битрейт: длительность по размеру аудиоданных
+    return (file_size - audio_start) * 8 / frame["bitrate"]
+
+
+def read_tags(path):
+    """
+    Прочитать теги ID3v2 и длительность mp3-файла за одно ограниченное чтение.
+    Возвращает словарь (title, artist, album - None, если тега нет; duration в секундах;
+    cover_offset/cover_size - положение картинки APIC, cover_offset = -1 без обложки
+    и None, если положение неизвестно; audio_start - смещение первого кадра MPEG)
+    или None, если файл нужно разбирать полноценным парсером
+    """
+    try:
+        with open(path, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            window = _FileWindow(f, f.read(HEAD_SIZE))
+
+            tags = {}
+            audio_start = _parse_id3(window, tags)
+            if audio_start is None:
+                return None
+
+            offset, frame, frame_data = _find_first_frame(window, audio_start)
+            if frame is None:
+                return None
+
+            return {
+                "title": tags.get("title"),
+                "artist": tags.get("artist"),
+                "album": tags.get("album"),
+                "duration": _read_duration(frame, frame_data, offset, file_size),
+                "cover_offset": tags.get("cover_offset", -1),
+                "cover_size": tags.get("cover_size", 0),
+                "audio_start": offset,
+            }
+    except (OSError, ValueError, UnicodeDecodeError, struct.error, IndexError):
+        return None
+
+
+def read_cover(path, offset, size):
+    """
+    Прочитать картинку из кадра APIC по сохраненному положению.
+    Возвращает байты изображения или None, если кадр не распознан
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            payload = f.read(size)
+    except OSError:
+        return None
+    if len(payload) != size or size < 4:
+        return None
+
+    encoding = payload[0]
+    if encoding > 3:
+        return None
+    # MIME-тип, затем тип картинки и описание
+    mime_end = payload.find(b"\x00", 1)
+    if mime_end < 0:
+        return None
+    description_start = mime_end + 2
+
+    if encoding in (1, 2):
+        # UTF-16: описание завершается двумя нулевыми байтами на четной позиции
+        position = description_start
+        while position + 1 < len(payload):
+            if payload[position] == 0 and payload[position + 1] == 0:
+                return payload[position + 2:]
+            position += 2
+        return None
+
+    description_end = payload.find(b"\x00", description_start)
+    if description_end < 0:
+        return None
+    return payload[description_end + 1:]
@@ -1,53 +1,145 @@
 # core/track.py
 import os
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3
+import sys
 import datetime
+from core import metrics
+from core.metadata_cache import MetadataCache
+from core.tag_reader import read_tags, read_cover
+
+_PARSE_TIME = metrics.histogram("music_player_metadata_parse_seconds", "Разбор тегов mp3-файла без кэша")
+
+
+def read_metadata(path):
+    """
+    Прочитать метаданные mp3-файла без использования кэша.
+    Возвращает словарь с полями title, artist, album, duration, cover_offset, cover_size
+    или None, если файл не удалось разобрать
+    """
+    started = metrics.start()
+    metadata = _parse_metadata(path)
+    _PARSE_TIME.observe_since(started)
+    return metadata
+
+
+def _parse_metadata(path):
+    """Разбор тегов для read_metadata"""
+    try:
+        if os.path.exists(path) and path.lower().endswith('.mp3'):
+            # Быстрый путь: тег и первый кадр за одно чтение
+            tags = read_tags(path)
+            if tags is not None:
+                return {
+                    "title": tags["title"] or os.path.basename(path),
+                    "artist": tags["artist"] or "Неизвестный исполнитель",
+                    "album": tags["album"] or "Неизвестный альбом",
+                    "duration": int(tags["duration"]),
+                    "cover_offset": tags["cover_offset"],
+                    "cover_size": tags["cover_size"]
+                }
+
+            # Нестандартный файл - разбираем полностью через mutagen
+            # (импортируется только здесь: быстрому пути и запуску плеера он не нужен)
+            from mutagen.mp3 import MP3
+            from mutagen.id3 import ID3
+            audio = MP3(path)
+            id3 = ID3(path)
+
+            # Извлекаем название
+            if "TIT2" in id3:
+                title = str(id3["TIT2"])
+            else:
+                title = os.path.basename(path)
+
+            # Извлекаем исполнителя
+            if "TPE1" in id3:
+                artist = str(id3["TPE1"])
+            else:
+                artist = "Неизвестный исполнитель"
+
+            # Извлекаем альбом
+            if "TALB" in id3:
+                album = str(id3["TALB"])
+            else:
+                album = "Неизвестный альбом"
+
+            return {
+                "title": title,
+                "artist": artist,
+                "album": album,
+                "duration": int(audio.info.length),  # Длительность трека
+                "cover_offset": None,  # Положение обложки неизвестно
+                "cover_size": 0
+            }
+    except Exception as e:
+        print(f"Ошибка загрузки метаданных: {e}")
+    return None
+
+
+def fallback_metadata(path):
+    """Метаданные для файла, теги которого прочитать не удалось"""
+    return {"title": os.path.basename(path), "artist": "", "album": "", "duration": 0,
+            "cover_offset": None, "cover_size": 0}
+
 
 class Track:
     """
-    Класс, представляющий музыкальный трек
+    Класс, представляющий музыкальный трек.
+    В ленивом режиме (lazy=True) хранит только путь, а теги читает
+    при первом обращении к title/artist/album/duration
     """
-    def __init__(self, path):
+    # Без __dict__ у каждого объекта: для плейлистов на сотни тысяч треков
+    __slots__ = ("__path", "__title", "__artist", "__album", "__duration", "__cover")
+
+    def __init__(self, path, metadata=None, lazy=False):
         self.__path = path
-        self.__title = ""
+        self.__title = None  # None - метаданные еще не загружены
         self.__artist = ""
         self.__album = ""
         self.__duration = 0
-        self.__load_metadata()
+        self.__cover = None  # Положение обложки в файле: (смещение, размер)
+        if metadata is not None:
+            # Метаданные уже разобраны (например, при параллельном импорте)
+            self.__apply_metadata(metadata)
+        elif not lazy:
+            self.__load_metadata()
 
     def __load_metadata(self):
-        """Загрузка метаданных трека"""
-        try:
-            if os.path.exists(self.__path) and self.__path.lower().endswith('.mp3'):
-                audio = MP3(self.__path)
-                id3 = ID3(self.__path)
+        """Загрузка метаданных трека (из кэша или из файла)"""
+        cache = MetadataCache.get_default()
+        if cache is not None:
+            cached = cache.get(self.__path)
+            if cached is not None:
+                self.__apply_metadata(cached)
+                return
 
-                # Извлекаем название
-                if "TIT2" in id3:
-                    self.__title = str(id3["TIT2"])
-                else:
-                    self.__title = os.path.basename(self.__path)
-
-                # Извлекаем исполнителя
-                if "TPE1" in id3:
-                    self.__artist = str(id3["TPE1"])
-                else:
-                    self.__artist = "Неизвестный исполнитель"
-
-                # Извлекаем альбом
-                if "TALB" in id3:
-                    self.__album = str(id3["TALB"])
-                else:
-                    self.__album = "Неизвестный альбом"
-
-                # Длительность трека
-                self.__duration = int(audio.info.length)
-            else:
-                self.__title = os.path.basename(self.__path)
-        except Exception as e:
-            print(f"Ошибка загрузки метаданных: {e}")
-            self.__title = os.path.basename(self.__path)
+        metadata = read_metadata(self.__path)
+        if metadata is not None:
+            self.__apply_metadata(metadata)
+
+            # Сохраняем разобранные теги, чтобы не читать файл повторно
+            if cache is not None:
+                cache.put(self.__path, metadata)
+        else:
+            self.__apply_metadata(fallback_metadata(self.__path))
+
+    def __apply_metadata(self, metadata):
+        """Заполнить поля трека из словаря метаданных"""
+        # Исполнитель и альбом повторяются у многих треков - храним одну копию строки
+        self.__artist = sys.intern(metadata["artist"] or "")
+        self.__album = sys.intern(metadata["album"] or "")
+        self.__duration = metadata["duration"] or 0
+        if metadata.get("cover_offset") is not None:
+            self.__cover = (metadata["cover_offset"], metadata["cover_size"])
+        self.__title = metadata["title"] or ""
+
+    def __ensure_loaded(self):
+        """Загрузить метаданные ленивого трека при первом обращении"""
+        if self.__title is None:
+            self.__load_metadata()
+
+    def is_loaded(self):
+        """Проверить, загружены ли метаданные трека"""
+        return self.__title is not None
 
     @property
     def path(self):
@@ -57,31 +149,46 @@ class Track:
     @property
     def title(self):
         """Получить название трека"""
+        self.__ensure_loaded()
         return self.__title
 
     @property
     def artist(self):
         """Получить исполнителя трека"""
+        self.__ensure_loaded()
         return self.__artist
 
     @property
     def album(self):
         """Получить альбом трека"""
+        self.__ensure_loaded()
         return self.__album
 
     @property
     def duration(self):
         """Получить длительность трека в секундах"""
+        self.__ensure_loaded()
         return self.__duration
 
     def get_duration_str(self):
         """Получить длительность трека в формате MM:SS"""
+        self.__ensure_loaded()
         return str(datetime.timedelta(seconds=self.__duration)).split('.')[0][-5:]
 
     def get_album_cover(self):
         """Получить обложку альбома (bytes)"""
+        self.__ensure_loaded()
+        if self.__cover is not None:
+            offset, size = self.__cover
+            if offset < 0:
+                return None  # Обложки в файле нет
+            data = read_cover(self.__path, offset, size)
+            if data is not None:
+                return data
+
         try:
             if os.path.exists(self.__path) and self.__path.lower().endswith('.mp3'):
+                from mutagen.id3 import ID3
                 id3 = ID3(self.__path)
                 for tag in id3.keys():
                     if tag.startswith('APIC'):  # APIC - тег, содержащий изображение
@@ -92,4 +199,5 @@ class Track:
 
     def __str__(self):
         """Строковое представление трека"""
+        self.__ensure_loaded()
         return f"{self.__artist} - {self.__title}"
\ No newline at end of file
@@ -0,0 +1,118 @@
+# core/track_importer.py
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from core.track import Track, read_metadata, fallback_metadata
+from core.metadata_cache import MetadataCache
+from core.process_pool import process_context
+
+
+def _read_metadata_chunk(paths):
+    """Разобрать теги группы файлов (выполняется в процессе пула)"""
+    return [read_metadata(path) for path in paths]
+
+
+class TrackImporter:
+    """
+    Импорт треков с разбором тегов в пуле процессов.
+    Готовые треки выдаются пакетами в исходном порядке путей
+    """
+    BATCH_SIZE = 200
+
+    def __init__(self, max_workers=None, batch_size=BATCH_SIZE):
+        self.__max_workers = max_workers or os.cpu_count() or 1
+        self.__batch_size = batch_size
+        self.__cancelled = threading.Event()
+
+    def cancel(self):
+        """Отменить импорт (уже выданные пакеты остаются в плейлисте)"""
+        self.__cancelled.set()
+
+    def is_cancelled(self):
+        """Проверить, был ли импорт отменен"""
+        return self.__cancelled.is_set()
+
+    def run(self, paths, on_batch, on_progress=None):
+        """
+        Импортировать треки по путям (список или любой итерируемый поток путей).
+        on_batch(tracks) вызывается для каждого готового пакета по порядку,
+        on_progress(done, total) - после каждого пакета (total = -1, если неизвестно).
+        Возвращает количество импортированных треков
+        """
+        total = len(paths) if hasattr(paths, "__len__") else -1
+        cache = MetadataCache.get_default()
+        executor = None
+        in_flight = deque()
+        done = 0
+
+        try:
+            for chunk in self.__chunks(paths):
+                if self.is_cancelled():
+                    break
+
+                # Сначала ищем метаданные в кэше, в пул отправляем только промахи
+                cached = [cache.get(path) if cache is not None else None for path in chunk]
+                missing = [path for path, metadata in zip(chunk, cached) if metadata is None]
+
+                future = None
+                if missing:
+                    if executor is None and (total < 0 or total > self.__batch_size):
+                        executor = ProcessPoolExecutor(max_workers=self.__max_workers, mp_context=process_context())
+                    if executor is not None:
+                        future = executor.submit(_read_metadata_chunk, missing)
+                    else:
+                        # Небольшой импорт быстрее выполнить без запуска процессов
+                        future = Future()
+                        future.set_result(_read_metadata_chunk(missing))
+                in_flight.append((chunk, cached, future))
+
+                # Выдаем уже готовые пакеты и ограничиваем число пакетов в работе,
+                # чтобы не держать в памяти весь поток
+                while in_flight and (len(in_flight) > self.__max_workers * 2
+                                     or in_flight[0][2] is None or in_flight[0][2].done()):
+                    done += self.__deliver(in_flight.popleft(), cache, on_batch)
+                    if on_progress:
+                        on_progress(done, total)
+
+            while in_flight and not self.is_cancelled():
+                done += self.__deliver(in_flight.popleft(), cache, on_batch)
+                if on_progress:
+                    on_progress(done, total)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            if cache is not None:
+                cache.flush()
+
+        return done
+
+    def __chunks(self, paths):
+        """Разбить поток путей на пакеты"""
+        chunk = []
+        for path in paths:
+            chunk.append(path)
+            if len(chunk) >= self.__batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def __deliver(self, item, cache, on_batch):
+        """Дождаться разбора пакета, создать треки и передать их получателю"""
+        chunk, cached, future = item
+        parsed = iter(future.result() if future is not None else [])
+
+        tracks = []
+        for path, metadata in zip(chunk, cached):
+            if metadata is None:
+                metadata = next(parsed)
+                if metadata is not None:
+                    if cache is not None:
+                        cache.put(path, metadata)
+                else:
+                    metadata = fallback_metadata(path)
+            tracks.append(Track(path, metadata))
+
+        on_batch(tracks)
+        return len(tracks)
@@ -0,0 +1,241 @@
+# core/waveform.py
+import math
+import struct
+import time
+import zlib
+import numpy as np
+from core.metadata_cache import MetadataCache
+from core.pcm_decoder import PcmDecoder, read_duration
+from core.seek_index import SeekIndex
+
+
+class Waveform:
+    """
+    Обзор формы волны трека: минимумы и максимумы сэмплов по равным интервалам времени.
+    Хранится пирамидой уровней (int8, каждый следующий вдвое грубее подробного),
+    поэтому картинка любой ширины получается без повторного декодирования (columns)
+    """
+    BASE_BUCKETS = 1 << 14  # Интервалов на подробном уровне: с запасом для широкого экрана с HiDPI
+    MIN_BUCKETS = 64  # Самый грубый уровень
+    __HEADER = struct.Struct(">dIB")  # Длительность, интервалов на подробном уровне, число уровней
+
+    def __init__(self, duration, levels, complete=True):
+        self.__duration = duration
+        self.__levels = levels  # Массивы (интервалы x 2) int8: минимум и максимум
+        self.__complete = complete
+
+    @classmethod
+    def from_peaks(cls, minimum, maximum, duration, complete=True):
+        """Построить пирамиду по минимумам и максимумам подробного уровня (-1..1)"""
+        base = np.empty((len(minimum), 2), dtype=np.int8)
+        # Округление наружу: тихий, но не нулевой сигнал не пропадает с картинки
+        base[:, 0] = np.clip(np.floor(np.asarray(minimum) * 127), -127, 127)
+        base[:, 1] = np.clip(np.ceil(np.asarray(maximum) * 127), -127, 127)
+        levels = [base]
+        while len(levels[-1]) > cls.MIN_BUCKETS:
+            level = levels[-1]
+            if len(level) % 2:
+                level = np.concatenate((level, level[-1:]))
+            pairs = level.reshape(-1, 2, 2)
+            levels.append(np.stack((pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1)), axis=1))
+        return cls(duration, levels, complete)
+
+    @property
+    def duration(self):
+        """Длительность трека в секундах"""
+        return self.__duration
+
+    @property
+    def complete(self):
+        """Построен ли обзор по всему декодированному треку (иначе - предварительный)"""
+        return self.__complete
+
+    def columns(self, width):
+        """
+        Минимумы и максимумы (-1..1) для width столбцов картинки: берется самый грубый уровень,
+        в котором интервалов не меньше столбцов, и интервалы сводятся к столбцам
+        """
+        width = max(1, int(width))
+        level = self.__levels[0]
+        for candidate in self.__levels:
+            if len(candidate) >= width:
+                level = candidate
+        count = len(level)
+        if not count:
+            return np.zeros(width), np.zeros(width)
+        if count >= width:
+            starts = np.arange(width) * count // width
+            minimum = np.minimum.reduceat(level[:, 0], starts)
+            maximum = np.maximum.reduceat(level[:, 1], starts)
+        else:
+            # Короткий трек - интервалов меньше, чем столбцов
+            indices = np.arange(width) * count // width
+            minimum, maximum = level[indices, 0], level[indices, 1]
+        return minimum / 127.0, maximum / 127.0
+
+    def to_bytes(self):
+        """Компактный сериализованный вид: уровни подряд, сжатые zlib"""
+        data = b"".join(level.tobytes() for level in self.__levels)
+        return self.__HEADER.pack(self.__duration, len(self.__levels[0]), len(self.__levels)) + zlib.compress(data, 6)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Восстановить обзор из сериализованного вида"""
+        duration, count, level_count = cls.__HEADER.unpack_from(data)
+        raw = np.frombuffer(zlib.decompress(data[cls.__HEADER.size:]), dtype=np.int8)
+        levels = []
+        offset = 0
+        for _ in range(level_count):
+            levels.append(raw[offset:offset + count * 2].reshape(-1, 2))
+            offset += count * 2
+            count = (count + 1) // 2
+        if offset != len(raw):
+            raise ValueError("поврежденный обзор формы волны")
+        return cls(duration, levels)
+
+    @classmethod
+    def load(cls, path):
+        """Получить обзор из кэша метаданных или None"""
+        cache = MetadataCache.get_default()
+        data = cache.get_waveform(path) if cache is not None else None
+        if data is None:
+            return None
+        try:
+            return cls.from_bytes(data)
+        except (ValueError, struct.error, zlib.error):
+            return None  # Поврежденная запись будет перезаписана
+
+    def save(self, path):
+        """Сохранить полный обзор в кэш метаданных"""
+        cache = MetadataCache.get_default()
+        if cache is not None and self.__complete:
+            cache.put_waveform(path, self.to_bytes())
+
+
+class WaveformBuilder:
+    """
+    Построение обзора формы волны декодированием трека (в фоновом потоке).
+    Длинный трек сначала просматривается выборочно - короткие фрагменты в равноотстоящих точках
+    (перемотка по индексу кадров без декодирования от начала), что дает предварительную картинку
+    за доли секунды; затем трек декодируется целиком, и картинка уточняется по мере декодирования
+    """
+    PREVIEW_MIN_DURATION = 60.0  # Короче этого трек декодируется сразу целиком, с
+    PREVIEW_PROBES = 256  # Точек выборочного просмотра
+    PROBE_FRAMES = 2048  # Кадров PCM, декодируемых в каждой точке
+    BLOCK_FRAMES = 1 << 16
+    PROGRESS_INTERVAL = 0.25  # Период промежуточных результатов, с
+
+    def __init__(self, path, cancelled=None):
+        self.__path = path
+        self.__cancelled = cancelled or (lambda: False)
+        self.__format = None
+
+    def __native_format(self):
+        """
+        Частота и число каналов файла: декодирование без передискретизации и сведения
+        каналов почти вдвое быстрее, а пики считаются сразу по всем каналам
+        """
+        if self.__format is None:
+            # Нужен только для построения обзора - плееру при запуске не импортируется
+            import miniaudio
+            info = miniaudio.get_file_info(self.__path)
+            self.__format = (info.sample_rate, info.nchannels)
+        return self.__format
+
+    def preview(self):
+        """Предварительный обзор по выборочным фрагментам; None для короткого трека или при отмене"""
+        duration = read_duration(self.__path)
+        if duration < self.PREVIEW_MIN_DURATION:
+            return None
+        try:
+            sample_rate, channels = self.__native_format()
+        except Exception as e:
+            print(f"Ошибка построения обзора: {e}")
+            return None
+        index = SeekIndex.load(self.__path)  # Один раз на все точки
+        minimum = np.zeros(self.PREVIEW_PROBES)
+        maximum = np.zeros(self.PREVIEW_PROBES)
+        for probe in range(self.PREVIEW_PROBES):
+            if self.__cancelled():
+                return None
+            start = (probe + 0.5) * duration / self.PREVIEW_PROBES
+            decoder = PcmDecoder(self.__path, start, sample_rate, channels, self.PROBE_FRAMES, index)
+            try:
+                block = next(decoder.blocks(), None)
+            except Exception as e:
+                print(f"Ошибка построения обзора: {e}")
+                return None
+            finally:
+                decoder.close()
+            if block is not None and len(block):
+                minimum[probe] = block.min()
+                maximum[probe] = block.max()
+        return Waveform.from_peaks(minimum, maximum, duration, complete=False)
+
+    def build(self, on_progress=None, preview=None):
+        """
+        Полный обзор по всему треку. on_progress(waveform) получает промежуточные результаты:
+        декодированная часть - подробно, остальное - из предварительного обзора preview.
+        Возвращает Waveform или None при ошибке или отмене
+        """
+        duration = read_duration(self.__path)
+        try:
+            sample_rate, channels = self.__native_format()
+        except Exception as e:
+            print(f"Ошибка построения обзора: {e}")
+            return None
+        # Интервал подробного уровня - целое число кадров PCM по оценке длины трека
+        per_bucket = max(1, math.ceil(duration * sample_rate / Waveform.BASE_BUCKETS))
+        count = max(1, math.ceil(duration * sample_rate / per_bucket))
+        per_bucket *= channels  # Сэмплы всех каналов подряд
+        minimum = np.zeros(count)
+        maximum = np.zeros(count)
+        if preview is not None:
+            minimum[:], maximum[:] = preview.columns(count)
+
+        filled = 0  # Готовых интервалов
+        pending = []  # Сэмплы, еще не собранные в интервал
+        pending_samples = 0
+        reported = time.perf_counter()
+        decoder = PcmDecoder(self.__path, 0, sample_rate, channels, self.BLOCK_FRAMES)
+        try:
+            for block in decoder.blocks():
+                if self.__cancelled():
+                    return None
+                pending.append(block.ravel())
+                pending_samples += block.size
+                if pending_samples < per_bucket:
+                    continue
+                samples = np.concatenate(pending)
+                whole = len(samples) - len(samples) % per_bucket
+                buckets = samples[:whole].reshape(-1, per_bucket)
+                if filled + len(buckets) > len(minimum):
+                    # Трек длиннее оценки по заголовку
+                    extra = filled + len(buckets) - len(minimum)
+                    minimum = np.concatenate((minimum, np.zeros(extra)))
+                    maximum = np.concatenate((maximum, np.zeros(extra)))
+                minimum[filled:filled + len(buckets)] = buckets.min(axis=1)
+                maximum[filled:filled + len(buckets)] = buckets.max(axis=1)
+                filled += len(buckets)
+                pending = [samples[whole:]]
+                pending_samples = len(samples) - whole
+
+                if on_progress is not None and time.perf_counter() - reported >= self.PROGRESS_INTERVAL:
+                    reported = time.perf_counter()
+                    on_progress(Waveform.from_peaks(minimum, maximum, duration, complete=False))
+        except Exception as e:
+            print(f"Ошибка построения обзора: {e}")
+            return None
+        finally:
+            decoder.close()
+
+        if pending_samples:
+            samples = np.concatenate(pending)
+            if filled >= len(minimum):
+                minimum = np.concatenate((minimum, [0.0]))
+                maximum = np.concatenate((maximum, [0.0]))
+            minimum[filled] = samples.min()
+            maximum[filled] = samples.max()
+            filled += 1
+        # Трек короче оценки - лишние интервалы отбрасываются
+        return Waveform.from_peaks(minimum[:filled], maximum[:filled], duration)
@@ -0,0 +1,98 @@
+# gui/cover_loader.py
+from collections import OrderedDict
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+from core import metrics
+
+_COVER_HITS = metrics.counter("music_player_cache_lookups_total", "Обращения к кэшам: попадания и промахи",
+                              {"cache": "cover", "result": "hit"})
+_COVER_MISSES = metrics.counter("music_player_cache_lookups_total", "Обращения к кэшам: попадания и промахи",
+                                {"cache": "cover", "result": "miss"})
+
+class _CoverSignals(QObject):
+    """Сигналы фоновой задачи (QRunnable сам не может их объявлять)"""
+    finished = pyqtSignal(object, QImage)
+
+
+class _CoverTask(QRunnable):
+    """
+    Фоновая задача: чтение обложки из файла, декодирование и масштабирование.
+    Работает с QImage, так как QPixmap можно использовать только в GUI-потоке
+    """
+    def __init__(self, signals, key, track, width, height):
+        super().__init__()
+        self.__signals = signals
+        self.__key = key
+        self.__track = track
+        self.__width = width
+        self.__height = height
+
+    def run(self):
+        """Выполнение задачи в пуле потоков"""
+        image = QImage()
+        try:
+            data = self.__track.get_album_cover()
+            if data and image.loadFromData(data):
+                image = image.scaled(self.__width, self.__height,
+                                     Qt.AspectRatioMode.KeepAspectRatio,
+                                     Qt.TransformationMode.SmoothTransformation)
+        except Exception as e:
+            print(f"Ошибка при загрузке обложки: {e}")
+            image = QImage()
+        self.__signals.finished.emit(self.__key, image)
+
+
+class CoverLoader(QObject):
+    """
+    Загрузчик обложек с ограниченным LRU-кэшем готовых картинок.
+    Ключ кэша - путь к треку и размер, под который масштабирована обложка
+    """
+    cover_ready = pyqtSignal(object, QPixmap)  # Ключ и готовая картинка (пустая, если обложки нет)
+
+    def __init__(self, max_entries=32, parent=None):
+        super().__init__(parent)
+        self.__max_entries = max_entries
+        self.__cache = OrderedDict()
+        self.__pending = set()
+        self.__pool = QThreadPool(self)
+        self.__pool.setMaxThreadCount(2)
+        self.__signals = _CoverSignals(self)
+        self.__signals.finished.connect(self.__on_finished)
+
+    @staticmethod
+    def make_key(track, size):
+        """Ключ кэша для трека и размера"""
+        return (track.path, size.width(), size.height())
+
+    def request(self, track, size):
+        """
+        Запросить обложку трека под размер size.
+        Возвращает картинку из кэша или None - тогда она придет сигналом cover_ready
+        """
+        key = self.make_key(track, size)
+        if key in self.__cache:
+            self.__cache.move_to_end(key)
+            _COVER_HITS.inc()
+            return self.__cache[key]
+        _COVER_MISSES.inc()
+
+        if key not in self.__pending:
+            self.__pending.add(key)
+            self.__pool.start(_CoverTask(self.__signals, key, track, size.width(), size.height()))
+        return None
+
+    def clear(self):
+        """Очистить кэш обложек"""
+        self.__cache.clear()
+
+    def __on_finished(self, key, image):
+        """Обработчик готовой обложки (выполняется в GUI-потоке)"""
+        self.__pending.discard(key)
+        pixmap = QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+
+        self.__cache[key] = pixmap
+        self.__cache.move_to_end(key)
+        while len(self.__cache) > self.__max_entries:
+            self.__cache.popitem(last=False)
+
+        self.cover_ready.emit(key, pixmap)
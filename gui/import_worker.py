@@ -0,0 +1,37 @@
+# gui/import_worker.py
+from PyQt6.QtCore import QThread, pyqtSignal
+from core.track_importer import TrackImporter
+
+class ImportWorker(QThread):
+    """
+    Фоновый поток импорта треков.
+    Готовые пакеты передаются в GUI-поток сигналом batch_ready
+    """
+    batch_ready = pyqtSignal(object, list)  # Плейлист назначения и пакет треков
+    progress = pyqtSignal(int, int)  # Обработано треков и всего (-1, если неизвестно)
+
+    def __init__(self, playlist, paths, parent=None):
+        super().__init__(parent)
+        self.__playlist = playlist
+        self.__paths = paths
+        self.__importer = TrackImporter()
+
+    @property
+    def playlist(self):
+        """Плейлист, в который выполняется импорт"""
+        return self.__playlist
+
+    def run(self):
+        """Выполнение импорта в фоновом потоке"""
+        try:
+            self.__importer.run(
+                self.__paths,
+                lambda tracks: self.batch_ready.emit(self.__playlist, tracks),
+                self.progress.emit
+            )
+        except Exception as e:
+            print(f"Ошибка импорта треков: {e}")
+
+    def cancel(self):
+        """Отменить импорт"""
+        self.__importer.cancel()
@@ -1,17 +1,24 @@
 # gui/main_window.py
 from PyQt6.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
                            QSplitter, QMenuBar, QMenu, QFileDialog, QMessageBox)
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtCore import Qt, QSize, QTimer
+from core import metrics
 from gui.player_controls import PlayerControls
 from gui.playlist_view import PlaylistView
+from gui.spectrum_view import SpectrumView
+from gui.player_signals import PlayerSignals
 
 class MainWindow(QMainWindow):
     """
     Главное окно приложения
     """
+    AUTOSAVE_INTERVAL = 5000  # Период сохранения изменений плейлистов, мс
+    METRICS_INTERVAL = 10000  # Период выгрузки метрик в файл из MUSIC_PLAYER_METRICS, мс
+
     def __init__(self, player):
         super().__init__()
         self.__player = player
+        self.__signals = PlayerSignals(player, self)
 
         self.setWindowTitle("Музыкальный плеер")
         self.setMinimumSize(QSize(800, 600))
@@ -20,6 +27,33 @@ class MainWindow(QMainWindow):
         self.__setup_menu()
         self.__connect_signals()
 
+        # Изменения плейлистов сохраняются понемногу, а не только при выходе
+        self.__autosave_timer = QTimer(self)
+        self.__autosave_timer.timeout.connect(self.__player.save_state)
+        self.__autosave_timer.start(self.AUTOSAVE_INTERVAL)
+        self.__painted = False
+        self.__metrics_panel = None
+
+        self.__metrics_timer = QTimer(self)
+        self.__metrics_timer.timeout.connect(metrics.flush)
+        if metrics.export_path():
+            self.__metrics_timer.start(self.METRICS_INTERVAL)
+
+    def paintEvent(self, event):
+        """
+        Первая отрисовка окна: после нее в фоне открывается аудио-устройство,
+        чтобы не задерживать появление окна и не заставлять ждать первое воспроизведение,
+        и начинаются анализ громкости треков, построение обзоров формы волны и визуализация спектра
+        """
+        super().paintEvent(event)
+        if not self.__painted:
+            self.__painted = True
+            QTimer.singleShot(0, self.__player.prepare_audio)
+            QTimer.singleShot(0, self.__player.start_loudness_analysis)
+            QTimer.singleShot(0, self.__player.start_cache_eviction)
+            QTimer.singleShot(0, self.__player_controls.start_waveforms)
+            QTimer.singleShot(0, self.__spectrum_view.start)
+
     def __setup_ui(self):
         """Настройка пользовательского интерфейса"""
         # Основной виджет и его компоновка
@@ -30,13 +64,15 @@ class MainWindow(QMainWindow):
         splitter = QSplitter(Qt.Orientation.Horizontal)
 
         # Виджет для отображения плейлиста
-        self.__playlist_view = PlaylistView(self.__player)
+        self.__playlist_view = PlaylistView(self.__player, self.__signals)
 
         # Элементы управления плеером
         controls_widget = QWidget()
         controls_layout = QVBoxLayout(controls_widget)
-        self.__player_controls = PlayerControls(self.__player)
+        self.__player_controls = PlayerControls(self.__player, self.__signals)
         controls_layout.addWidget(self.__player_controls)
+        self.__spectrum_view = SpectrumView(self.__player, self.__signals)
+        controls_layout.addWidget(self.__spectrum_view)
 
         # Добавляем виджеты в разделитель
         splitter.addWidget(self.__playlist_view)
@@ -81,11 +117,54 @@ class MainWindow(QMainWindow):
         delete_playlist_action = playlist_menu.addAction("Удалить плейлист")
         delete_playlist_action.triggered.connect(self.__delete_playlist)
 
+        # Меню "Воспроизведение"
+        playback_menu = menubar.addMenu("Воспроизведение")
+
+        # Пункт "Плавный переход"
+        crossfade_action = playback_menu.addAction("Плавный переход...")
+        crossfade_action.triggered.connect(self.__set_crossfade)
+
+        # Пункт "Выравнивать громкость"
+        normalization_action = playback_menu.addAction("Выравнивать громкость")
+        normalization_action.setCheckable(True)
+        normalization_action.setChecked(self.__player.get_normalization())
+        normalization_action.toggled.connect(self.__player.set_normalization)
+
+        # Меню "Вид"
+        view_menu = menubar.addMenu("Вид")
+
+        # Пункт "Спектр"
+        spectrum_action = view_menu.addAction("Спектр")
+        spectrum_action.setCheckable(True)
+        spectrum_action.setChecked(True)
+        spectrum_action.toggled.connect(self.__spectrum_view.setVisible)
+
+        # Меню "Отладка"
+        debug_menu = menubar.addMenu("Отладка")
+
+        # Пункт "Метрики"
+        metrics_action = debug_menu.addAction("Метрики...")
+        metrics_action.triggered.connect(self.__show_metrics)
+
     def __connect_signals(self):
         """Подключение сигналов"""
         # Здесь можно подключить сигналы от виджетов к слотам
         pass
 
+    def closeEvent(self, event):
+        """Обработчик закрытия окна"""
+        # Дожидаемся остановки фонового импорта, чтобы поток не пережил окно
+        self.__playlist_view.cancel_import(wait=True)
+        self.__playlist_view.stop_watching()
+        self.__player_controls.stop_waveforms()
+        self.__spectrum_view.stop()
+        self.__autosave_timer.stop()
+        self.__player.save_state()
+        self.__player.close()
+        self.__metrics_timer.stop()
+        metrics.flush()
+        super().closeEvent(event)
+
     def __open_file(self):
         """Обработчик открытия файла"""
         file_dialog = QFileDialog(self)
@@ -94,25 +173,15 @@ class MainWindow(QMainWindow):
 
         if file_dialog.exec():
             files = file_dialog.selectedFiles()
-            self.__player.add_tracks(files)
-            self.__playlist_view.update_playlist()
+            self.__playlist_view.import_tracks(files)
 
     def __open_folder(self):
         """Обработчик открытия папки"""
         folder = QFileDialog.getExistingDirectory(self, "Выберите папку с музыкой")
 
         if folder:
-            import os
-            import glob
-
-            # Получаем все mp3 файлы в выбранной папке
-            mp3_files = glob.glob(os.path.join(folder, "*.mp3"))
-
-            if mp3_files:
-                self.__player.add_tracks(mp3_files)
-                self.__playlist_view.update_playlist()
-            else:
-                QMessageBox.information(self, "Информация", "В выбранной папке не найдены MP3 файлы.")
+            # mp3-файлы ищутся и во вложенных папках; импорт идет по мере обхода
+            self.__playlist_view.import_folder(folder)
 
     def __create_playlist(self):
         """Обработчик создания плейлиста"""
@@ -141,7 +210,35 @@ class MainWindow(QMainWindow):
                                       QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
 
         if confirm == QMessageBox.StandardButton.Yes:
-            # Используем метод из playlist_manager, а не из player
-            self.__player.get_playlist_manager().delete_playlist(current_index)
+            # Удаляем через плеер, чтобы он остановил воспроизведение удаленного плейлиста
+            self.__player.delete_playlist(current_index)
             self.__playlist_view.update_playlists()
-            self.__playlist_view.update_playlist()
\ No newline at end of file
+            self.__playlist_view.update_playlist()
+
+    def __show_metrics(self):
+        """Обработчик открытия панели метрик"""
+        if self.__metrics_panel is None:
+            from gui.metrics_panel import MetricsPanel
+            self.__metrics_panel = MetricsPanel(self)
+        self.__metrics_panel.show()
+        self.__metrics_panel.raise_()
+
+    def __set_crossfade(self):
+        """Обработчик настройки плавного перехода между треками"""
+        from PyQt6.QtWidgets import QInputDialog
+        from core.crossfade import CURVES
+
+        seconds, curve = self.__player.get_crossfade()
+        if curve is None:
+            QMessageBox.information(self, "Информация",
+                                    "Плавный переход доступен с движком stream (MUSIC_PLAYER_ENGINE=stream).")
+            return
+
+        seconds, ok = QInputDialog.getDouble(self, "Плавный переход", "Длительность перехода (с), 0 - выключен:",
+                                             seconds, 0.0, 20.0, 1)
+        if not ok:
+            return
+        curve, ok = QInputDialog.getItem(self, "Плавный переход", "Кривая перехода:",
+                                         list(CURVES), CURVES.index(curve), False)
+        if ok:
+            self.__player.set_crossfade(seconds, curve)
@@ -0,0 +1,109 @@
+# gui/metrics_panel.py
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView,
+                             QCheckBox, QLabel, QPushButton, QFileDialog)
+from PyQt6.QtCore import Qt, QTimer
+from core import metrics
+
+class MetricsPanel(QDialog):
+    """
+    Отладочная панель: счетчики и гистограммы задержек из core.metrics
+    (количество, среднее и квантили в миллисекундах) и доля попаданий в кэши.
+    Обновляется раз в секунду, пока открыта
+    """
+    REFRESH_INTERVAL = 1000  # мс
+    COLUMNS = ("Метрика", "Метки", "Количество", "Среднее, мс", "p50, мс", "p95, мс", "p99, мс")
+    CACHE_LOOKUPS = "music_player_cache_lookups_total"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Метрики")
+        self.resize(760, 420)
+
+        layout = QVBoxLayout(self)
+        self.__enabled_box = QCheckBox("Собирать метрики")
+        self.__enabled_box.setChecked(metrics.is_enabled())
+        self.__enabled_box.toggled.connect(self.__on_enabled_toggled)
+        layout.addWidget(self.__enabled_box)
+
+        self.__table = QTableWidget(0, len(self.COLUMNS))
+        self.__table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.__table.verticalHeader().setVisible(False)
+        self.__table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.__table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.__table)
+
+        self.__cache_label = QLabel()
+        layout.addWidget(self.__cache_label)
+
+        buttons = QHBoxLayout()
+        reset_button = QPushButton("Сбросить")
+        reset_button.clicked.connect(self.__on_reset)
+        export_button = QPushButton("Сохранить...")
+        export_button.clicked.connect(self.__on_export)
+        buttons.addStretch()
+        buttons.addWidget(reset_button)
+        buttons.addWidget(export_button)
+        layout.addLayout(buttons)
+
+        self.__timer = QTimer(self)
+        self.__timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.__timer.start(self.REFRESH_INTERVAL)
+
+    def hideEvent(self, event):
+        self.__timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        """Перечитать метрики"""
+        rows = []
+        lookups = {}  # Кэш -> [попадания, промахи]
+        for metric in metrics.collect():
+            labels = dict(metric.labels)
+            if metric.name == self.CACHE_LOOKUPS:
+                counts = lookups.setdefault(labels.get("cache", ""), [0, 0])
+                counts[0 if labels.get("result") == "hit" else 1] += metric.value
+            label_text = ", ".join(f"{name}={value}" for name, value in metric.labels)
+            if metric.kind == "counter":
+                rows.append((metric.name, label_text, str(metric.value), "", "", "", ""))
+            else:
+                mean = metric.sum / metric.count if metric.count else None
+                rows.append((metric.name, label_text, str(metric.count), self.__milliseconds(mean),
+                             *(self.__milliseconds(metric.quantile(q)) for q in (0.5, 0.95, 0.99))))
+
+        self.__table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column >= 2:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.__table.setItem(row, column, item)
+
+        parts = [f"{cache}: {hits / (hits + misses):.0%} из {hits + misses}"
+                 for cache, (hits, misses) in sorted(lookups.items()) if hits + misses]
+        self.__cache_label.setText("Попадания в кэши: " + ("; ".join(parts) if parts else "нет обращений"))
+
+    @staticmethod
+    def __milliseconds(seconds):
+        """Секунды как текст в миллисекундах"""
+        return "" if seconds is None else f"{seconds * 1000:.2f}"
+
+    def __on_enabled_toggled(self, checked):
+        """Включение и выключение сбора метрик"""
+        metrics.set_enabled(checked)
+        self.refresh()
+
+    def __on_reset(self):
+        """Обнулить метрики"""
+        metrics.reset()
+        self.refresh()
+
+    def __on_export(self):
+        """Сохранить снимок метрик в файл"""
+        path, _ = QFileDialog.getSaveFileName(self, "Сохранить метрики", "metrics.prom",
+                                              "Prometheus (*.prom);;Строки JSON (*.jsonl)")
+        if path:
+            metrics.write(path)
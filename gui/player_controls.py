@@ -2,28 +2,49 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                            QSlider, QLabel, QStyle)
 from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QPixmap
 from io import BytesIO
 import datetime
+from core import metrics
+from gui.cover_loader import CoverLoader
+from gui.waveform_loader import WaveformLoader
+from gui.waveform_slider import WaveformSlider
+
+_REFRESH = "music_player_ui_refresh_seconds"
+_REFRESH_HELP = "Обновление элементов интерфейса"
+_TRACK_REFRESH = metrics.histogram(_REFRESH, _REFRESH_HELP, {"view": "track_info"})
+_POSITION_REFRESH = metrics.histogram(_REFRESH, _REFRESH_HELP, {"view": "position"})
 
 class PlayerControls(QWidget):
     """
-    Виджет с элементами управления плеером
+    Виджет с элементами управления плеером.
+    Обновляется по сигналам плеера; позицию воспроизведения опрашивает
+    отдельный легкий таймер, который работает только во время воспроизведения
     """
-    def __init__(self, player):
+    def __init__(self, player, signals):
         super().__init__()
         self.__player = player
+        self.__signals = signals
+        self.__shown_position = -1  # Последняя показанная позиция (в секундах)
+
+        # Обложки загружаются в фоне, на экране - ключ показанной (ожидаемой) обложки
+        self.__cover_loader = CoverLoader(parent=self)
+        self.__cover_key = None
 
-        # Таймер для обновления информации о воспроизведении
-        self.__update_timer = QTimer(self)
-        self.__update_timer.setInterval(500)  # Обновление каждые 500 мс
-        self.__update_timer.timeout.connect(self.__update_player_info)
+        # Обзор формы волны под полосой перемотки: строится в фоне после первой отрисовки окна
+        self.__waveform_loader = WaveformLoader(parent=self)
+        self.__waveform_path = None
+
+        # Часы позиции: тикают с частотой обновления экрана, пока идет воспроизведение
+        self.__position_clock = QTimer(self)
+        self.__position_clock.timeout.connect(self.__on_clock_tick)
 
         self.__setup_ui()
         self.__connect_signals()
 
-        # Запускаем таймер
-        self.__update_timer.start()
+        # Показываем начальное состояние плеера
+        self.__volume_slider.setValue(self.__player.get_volume())
+        self.__on_track_changed(self.__player.get_current_track())
+        self.__on_state_changed(self.__player.get_state())
 
     def __setup_ui(self):
         """Настройка пользовательского интерфейса"""
@@ -45,7 +66,7 @@ class PlayerControls(QWidget):
         progress_layout = QHBoxLayout()
 
         self.__time_label = QLabel("0:00")
-        self.__position_slider = QSlider(Qt.Orientation.Horizontal)
+        self.__position_slider = WaveformSlider()
         self.__duration_label = QLabel("0:00")
 
         progress_layout.addWidget(self.__time_label)
@@ -82,7 +103,7 @@ class PlayerControls(QWidget):
         volume_label = QLabel("Громкость:")
         self.__volume_slider = QSlider(Qt.Orientation.Horizontal)
         self.__volume_slider.setRange(0, 100)
-        self.__volume_slider.setValue(50)  # Начальная громкость
+        self.__volume_slider.setValue(50)  # Начальная громкость (уточняется по плееру)
 
         volume_layout.addWidget(volume_label)
         volume_layout.addWidget(self.__volume_slider, 1)
@@ -104,6 +125,15 @@ class PlayerControls(QWidget):
         # Добавляем обработку одиночного клика - выполнится при отпускании клика
         self.__position_slider.sliderReleased.connect(self.__on_slider_released)
 
+        self.__cover_loader.cover_ready.connect(self.__on_cover_ready)
+        self.__waveform_loader.waveform_ready.connect(self.__on_waveform_ready)
+
+        # Сигналы плеера
+        self.__signals.track_changed.connect(self.__on_track_changed)
+        self.__signals.state_changed.connect(self.__on_state_changed)
+        self.__signals.volume_changed.connect(self.__on_volume_changed)
+        self.__signals.position_changed.connect(self.__on_position_changed)
+
     def __on_slider_released(self):
         """Обработка отпускания ползунка после клика или перетаскивания"""
         position = self.__position_slider.value()
@@ -111,74 +141,33 @@ class PlayerControls(QWidget):
 
     def __toggle_play(self):
         """Переключение между воспроизведением и паузой"""
+        # Иконка кнопки обновится по сигналу смены состояния
         if self.__player.is_playing():
             self.__player.pause()
-            self.__play_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPlay))
         else:
-            if self.__player.play():
-                self.__play_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPause))
+            self.__player.play()
 
     def __seek_position(self, position):
         """Изменение позиции воспроизведения"""
-        # Отключаем обновление слайдера во время перемотки
-        self.__update_timer.stop()
-
-        # Перематываем трек
-        self.__player.set_position(position)  # Исправленная строка - напрямую устанавливаем позицию
-
-        # Возобновляем обновление через небольшую задержку
-        # чтобы не перезаписать позицию слайдера сразу после установки
-        QTimer.singleShot(100, self.__update_timer.start)
+        self.__player.set_position(position)
 
-    def __update_player_info(self):
-        """Обновление информации о воспроизведении"""
-        current_track = self.__player.get_current_track()
-
-        if current_track:
+    def __on_track_changed(self, track):
+        """Обработчик смены текущего трека"""
+        started = metrics.start()
+        self.__shown_position = -1
+        if track:
             # Обновляем информацию о треке
-            self.__info_label.setText(f"{current_track.artist} - {current_track.title}")
-
-            # Загружаем обложку альбома
-            cover_data = current_track.get_album_cover()
-            if cover_data:
-                pixmap = QPixmap()
-                pixmap.loadFromData(cover_data)
-                self.__album_cover.setPixmap(pixmap.scaled(
-                    self.__album_cover.size(),
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                ))
-            else:
-                # Если обложка не найдена, очищаем
-                self.__album_cover.clear()
+            self.__info_label.setText(f"{track.artist} - {track.title}")
 
             # Обновляем длительность
-            duration = current_track.duration
+            duration = track.duration
             self.__position_slider.setRange(0, duration)
+            self.__duration_label.setText(self.__format_time(duration))
 
-            duration_str = str(datetime.timedelta(seconds=duration)).split('.')[0][-5:]
-            self.__duration_label.setText(duration_str)
-
-            # Проверяем, воспроизводится ли трек
-            if self.__player.is_playing() or self.__player.is_paused():
-                # Обновляем текущую позицию
-                position = self.__player.get_position()
-                if not self.__position_slider.isSliderDown():  # Не обновляем, если пользователь перемещает ползунок
-                    self.__position_slider.setValue(int(position))
-
-                position_str = str(datetime.timedelta(seconds=int(position))).split('.')[0][-5:]
-                self.__time_label.setText(position_str)
-
-                # Проверяем, не закончился ли трек
-                if position >= duration and not self.__player.is_paused():
-                    # Трек закончился, переходим к следующему
-                    QTimer.singleShot(500, self.__player.next_track)
-
-            # Обновляем иконку на кнопке воспроизведения
-            if self.__player.is_playing():
-                self.__play_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPause))
-            else:
-                self.__play_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPlay))
+            # Обложку запрашиваем только при смене трека
+            self.__request_cover(track)
+            self.__request_waveform(track)
+            self.__show_position(0)
         else:
             # Сбрасываем информацию, если нет текущего трека
             self.__info_label.setText("Нет воспроизведения")
@@ -186,5 +175,110 @@ class PlayerControls(QWidget):
             self.__duration_label.setText("0:00")
             self.__position_slider.setValue(0)
             self.__position_slider.setRange(0, 0)
+            self.__cover_key = None
+            self.__album_cover.clear()
+            self.__waveform_path = None
+            self.__waveform_loader.cancel()
+            self.__position_slider.set_waveform(None)
+        _TRACK_REFRESH.observe_since(started)
+
+    def __on_state_changed(self, state):
+        """Обработчик смены состояния воспроизведения"""
+        if state == self.__player.STATE_PLAYING:
+            self.__play_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPause))
+            screen = self.screen()
+            refresh_rate = screen.refreshRate() if screen else 60
+            self.__position_clock.start(max(1, round(1000 / (refresh_rate or 60))))
+        else:
             self.__play_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPlay))
-            self.__album_cover.clear()
\ No newline at end of file
+            self.__position_clock.stop()
+
+        if state == self.__player.STATE_STOPPED:
+            self.__show_position(0)
+        else:
+            self.__show_position(self.__player.get_position())
+
+    def __on_volume_changed(self, volume):
+        """Обработчик изменения громкости"""
+        if self.__volume_slider.value() != volume:
+            self.__volume_slider.blockSignals(True)
+            self.__volume_slider.setValue(volume)
+            self.__volume_slider.blockSignals(False)
+
+    def __on_position_changed(self, position):
+        """Обработчик перемотки"""
+        self.__show_position(position)
+
+    def __on_clock_tick(self):
+        """Тик часов позиции: обработка конца трека и обновление позиции"""
+        started = metrics.start()
+        self.__player.update()
+        if self.__player.get_state() == self.__player.STATE_PLAYING:
+            self.__show_position(self.__player.get_position())
+        _POSITION_REFRESH.observe_since(started)
+
+    def __show_position(self, position):
+        """Показать позицию, если изменилось отображаемое значение"""
+        seconds = int(position)
+        if seconds == self.__shown_position:
+            return
+        self.__shown_position = seconds
+
+        if not self.__position_slider.isSliderDown():  # Не обновляем, если пользователь перемещает ползунок
+            self.__position_slider.setValue(seconds)
+        self.__time_label.setText(self.__format_time(seconds))
+
+    @staticmethod
+    def __format_time(seconds):
+        """Время в формате MM:SS"""
+        return str(datetime.timedelta(seconds=int(seconds))).split('.')[0][-5:]
+
+    def __request_cover(self, track):
+        """Запросить обложку трека под текущий размер области обложки"""
+        size = self.__album_cover.size()
+        self.__cover_key = CoverLoader.make_key(track, size)
+        pixmap = self.__cover_loader.request(track, size)
+        if pixmap is not None:
+            self.__show_cover(pixmap)
+
+    def __on_cover_ready(self, key, pixmap):
+        """Обработчик загруженной в фоне обложки"""
+        if key == self.__cover_key:
+            self.__show_cover(pixmap)
+
+    def __show_cover(self, pixmap):
+        """Показать обложку (пустая картинка - обложки нет)"""
+        if pixmap.isNull():
+            # Если обложка не найдена, очищаем
+            self.__album_cover.clear()
+        else:
+            self.__album_cover.setPixmap(pixmap)
+
+    def start_waveforms(self):
+        """Начать построение обзоров формы волны (после первой отрисовки окна)"""
+        self.__waveform_loader.start()
+
+    def stop_waveforms(self):
+        """Прервать построение обзора и дождаться фонового потока (при закрытии окна)"""
+        self.__waveform_loader.shutdown()
+
+    def __request_waveform(self, track):
+        """Запросить обзор формы волны трека"""
+        if track.path == self.__waveform_path:
+            return
+        self.__waveform_path = track.path
+        waveform = self.__waveform_loader.request(track.path)
+        self.__position_slider.set_waveform(waveform)
+
+    def __on_waveform_ready(self, path, waveform):
+        """Обработчик обзора, построенного (уточненного) в фоне"""
+        if path == self.__waveform_path:
+            self.__position_slider.set_waveform(waveform)
+
+    def resizeEvent(self, event):
+        """При изменении размера перемасштабируем обложку под новую область"""
+        super().resizeEvent(event)
+        current_track = self.__player.get_current_track()
+        if current_track and self.__cover_key is not None:
+            if self.__cover_key[1:] != (self.__album_cover.width(), self.__album_cover.height()):
+                self.__request_cover(current_track)
\ No newline at end of file
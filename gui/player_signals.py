@@ -0,0 +1,29 @@
+# gui/player_signals.py
+from PyQt6.QtCore import QObject, pyqtSignal
+from core.music_player import MusicPlayer
+
+class PlayerSignals(QObject):
+    """
+    Мост между событиями MusicPlayer и сигналами Qt.
+    События из других потоков доставляются в GUI-поток через очередь сигналов
+    """
+    track_changed = pyqtSignal(object)
+    state_changed = pyqtSignal(str)
+    volume_changed = pyqtSignal(int)
+    position_changed = pyqtSignal(float)
+    playlist_changed = pyqtSignal(object, str, list)
+    playlists_changed = pyqtSignal()
+
+    def __init__(self, player, parent=None):
+        super().__init__(parent)
+        self.__player = player
+        player.subscribe(MusicPlayer.TRACK_CHANGED, self.track_changed.emit)
+        player.subscribe(MusicPlayer.STATE_CHANGED, self.state_changed.emit)
+        player.subscribe(MusicPlayer.VOLUME_CHANGED, self.volume_changed.emit)
+        player.subscribe(MusicPlayer.POSITION_CHANGED, self.__emit_position)
+        player.subscribe(MusicPlayer.PLAYLIST_CHANGED, self.playlist_changed.emit)
+        player.subscribe(MusicPlayer.PLAYLISTS_CHANGED, self.playlists_changed.emit)
+
+    def __emit_position(self, position):
+        """Передать позицию после перемотки"""
+        self.position_changed.emit(float(position))
@@ -0,0 +1,201 @@
+# gui/playlist_model.py
+from PyQt6.QtCore import Qt, QAbstractItemModel, QAbstractTableModel, QModelIndex
+from core.playlist import Playlist
+
+class PlaylistModel(QAbstractTableModel):
+    """
+    Модель текущего плейлиста для QTableView.
+    Текст ячеек формируется лениво в data() - только для видимых строк;
+    изменения состава плейлиста передаются представлению диапазонами
+    (rowsInserted/rowsRemoved), без перестроения всего списка.
+    Фильтр и сортировка не трогают плейлист: строки показываются
+    через список индексов треков
+    """
+    COLUMNS = ("Исполнитель", "Название", "Альбом", "Длительность")
+    ARTIST, TITLE, ALBUM, DURATION = range(4)
+    SORT_FIELDS = ("artist", "title", "album", "duration")  # Поле Playlist.SORT_FIELDS для столбца
+    MAX_SORT_KEYS = 3  # Сколько последних выбранных столбцов участвует в сортировке
+    MAX_RANGE_SIGNALS = 32  # Больше диапазонов удаления - сброс модели вместо сигналов по строкам
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.__playlist = None
+        self.__rows = 0  # Число строк, о котором уже сообщено представлению
+        self.__filter = None  # Индексы треков, прошедших фильтр, или None - показываются все
+        self.__sort = []  # Ключи сортировки: (поле, по убыванию), первый главный; пусто - порядок плейлиста
+        self.__map = None  # Строка -> индекс трека с учетом фильтра и сортировки; None - строка и есть индекс
+
+    def set_playlist(self, playlist):
+        """Показать другой плейлист (без сортировки время не зависит от его длины)"""
+        self.beginResetModel()
+        self.__playlist = playlist
+        self.__filter = None
+        self.__update_map()
+        self.endResetModel()
+
+    def set_filter(self, rows):
+        """
+        Показывать только треки с индексами rows (по возрастанию); None - все треки.
+        Заодно пересчитывается сортировка - после изменений плейлиста представление
+        вызывает этот метод, чтобы обновить строки
+        """
+        self.beginResetModel()
+        self.__filter = rows
+        self.__update_map()
+        self.endResetModel()
+
+    def is_filtered(self):
+        """Включен ли фильтр"""
+        return self.__filter is not None
+
+    def is_remapped(self):
+        """Отличаются ли строки модели от индексов плейлиста (фильтр или сортировка)"""
+        return self.__map is not None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """
+        Сортировка по столбцу (щелчок по заголовку): столбец становится главным ключом,
+        ранее выбранные остаются дополнительными. column < 0 - порядок плейлиста.
+        Переставляются только индексы строк; выделение сохраняется
+        """
+        if column < 0:
+            self.__sort = []
+        else:
+            field = self.SORT_FIELDS[column]
+            previous = [key for key in self.__sort if key[0] != field]
+            self.__sort = [(field, order == Qt.SortOrder.DescendingOrder)] + previous[:self.MAX_SORT_KEYS - 1]
+
+        hint = QAbstractItemModel.LayoutChangeHint.VerticalSortHint
+        self.layoutAboutToBeChanged.emit([], hint)
+        persistent = self.persistentIndexList()
+        tracks = [self.track_index(index.row()) for index in persistent]
+        self.__update_map()
+        if persistent:
+            size = self.__playlist.size() if self.__playlist is not None else 0
+            rows = [-1] * size
+            if self.__map is None:
+                rows[:self.__rows] = range(self.__rows)
+            else:
+                for row, track in enumerate(self.__map):
+                    rows[track] = row
+            self.changePersistentIndexList(
+                persistent, [self.index(rows[track], index.column()) if 0 <= track < size and rows[track] >= 0
+                             else QModelIndex()
+                             for track, index in zip(tracks, persistent)])
+        self.layoutChanged.emit([], hint)
+
+    def __update_map(self):
+        """Пересчитать соответствие строк трекам по фильтру и ключам сортировки"""
+        playlist = self.__playlist
+        if playlist is None:
+            self.__map = None
+            self.__rows = 0
+            return
+        if self.__sort:
+            order = playlist.sort_order(self.__sort)
+            if self.__filter is not None:
+                visible = bytearray(playlist.size())
+                for index in self.__filter:
+                    visible[index] = 1
+                order = [index for index in order if visible[index]]
+            self.__map = order
+        else:
+            self.__map = self.__filter
+        self.__rows = len(self.__map) if self.__map is not None else playlist.size()
+
+    def get_playlist(self):
+        """Получить отображаемый плейлист"""
+        return self.__playlist
+
+    def track_index(self, row):
+        """Индекс трека в плейлисте для строки модели"""
+        if self.__map is not None:
+            return self.__map[row]
+        return row
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.__rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or self.__playlist is None:
+            return None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            track = self.__playlist.get_track(self.track_index(index.row()))
+            if track is None:
+                return None
+            column = index.column()
+            if column == self.ARTIST:
+                return track.artist
+            if column == self.TITLE:
+                return track.title
+            if column == self.ALBUM:
+                return track.album
+            return track.get_duration_str()
+
+        if role == Qt.ItemDataRole.ToolTipRole:
+            track = self.__playlist.get_track(self.track_index(index.row()))
+            return track.path if track is not None else None
+
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() == self.DURATION:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def apply_change(self, playlist, kind, ranges):
+        """
+        Обработчик изменения плейлиста (Playlist.CHANGED).
+        Плейлист уже изменен, поэтому для каждого диапазона пара begin/end
+        вызывается сразу, а число строк обновляется между ними
+        """
+        if playlist is not self.__playlist or self.__map is not None:
+            return  # Отфильтрованный или отсортированный список представление пересчитает само
+
+        if kind == Playlist.INSERTED:
+            for start, count in ranges:
+                self.beginInsertRows(QModelIndex(), start, start + count - 1)
+                self.__rows += count
+                self.endInsertRows()
+        elif kind == Playlist.REMOVED:
+            if len(ranges) > self.MAX_RANGE_SIGNALS:
+                # Каждый сигнал пересчитывает сохраненные индексы (выделение) -
+                # при множестве разрозненных строк дешевле сбросить модель
+                self.beginResetModel()
+                self.__rows = playlist.size()
+                self.endResetModel()
+                return
+            # Диапазоны в исходных индексах по возрастанию - удаляем с конца
+            for start, count in reversed(ranges):
+                self.beginRemoveRows(QModelIndex(), start, start + count - 1)
+                self.__rows -= count
+                self.endRemoveRows()
+        elif kind == Playlist.MOVED:
+            for start, count, destination in ranges:
+                # Qt ждет строку, перед которой встанет блок, в индексах до перемещения
+                target = destination + count if destination > start else destination
+                self.beginMoveRows(QModelIndex(), start, start + count - 1, QModelIndex(), target)
+                self.endMoveRows()
+        elif kind == Playlist.REORDERED:
+            self.__reorder(ranges)
+        elif kind == Playlist.UPDATED:
+            for start, count in ranges:
+                self.dataChanged.emit(self.index(start, 0), self.index(start + count - 1, len(self.COLUMNS) - 1))
+
+    def __reorder(self, order):
+        """Перестановка строк: переносим выделение и прочие сохраненные индексы"""
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        if persistent:
+            new_rows = [0] * len(order)
+            for new_row, old_row in enumerate(order):
+                new_rows[old_row] = new_row
+            self.changePersistentIndexList(
+                persistent, [self.index(new_rows[index.row()], index.column()) for index in persistent])
+        self.layoutChanged.emit()
@@ -1,15 +1,37 @@
 # gui/playlist_view.py
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListWidget,
-                            QListWidgetItem, QComboBox, QLabel, QPushButton)
-from PyQt6.QtCore import Qt
+import os
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView, QHeaderView, QApplication,
+                            QAbstractItemView, QComboBox, QLabel, QLineEdit, QPushButton, QProgressBar,
+                            QMessageBox)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from core import metrics
+from gui.playlist_model import PlaylistModel
+
+_PLAYLIST_REFRESH = metrics.histogram("music_player_ui_refresh_seconds", "Обновление элементов интерфейса",
+                                      {"view": "playlist"})
 
 class PlaylistView(QWidget):
     """
     Виджет для отображения плейлиста
     """
-    def __init__(self, player):
+    # Изменения файлов в импортированных папках и их сопоставление с треками (из потока наблюдателя)
+    library_changed = pyqtSignal(object, object)
+    REMAP_INTERVAL = 500  # Не чаще раза в столько мс пересчитывается отфильтрованный/отсортированный список при импорте
+
+    def __init__(self, player, signals):
         super().__init__()
         self.__player = player
+        self.__signals = signals
+        self.__import_worker = None
+        self.__import_queue = []  # Ожидающие импорты: (плейлист, пути, обход папок или None)
+        self.__scanner = None  # Обход папок текущего импорта
+        self.__scanned_folder = None
+        self.__watcher = None  # Слежение за импортированными папками, создается при первом импорте папки
+        self.__search_index = None  # Индекс поиска по текущему плейлисту, строится при первом запросе
+        self.__filter_pending = False
+        self.__remap_timer = QTimer(self)
+        self.__remap_timer.setSingleShot(True)
+        self.__remap_timer.timeout.connect(self.__apply_filter)
 
         self.__setup_ui()
         self.__connect_signals()
@@ -29,8 +51,34 @@ class PlaylistView(QWidget):
         playlist_selector_layout.addWidget(self.__playlist_selector, 1)
         main_layout.addLayout(playlist_selector_layout)
 
-        # Список треков
-        self.__track_list = QListWidget()
+        # Поиск по плейлисту
+        self.__filter_edit = QLineEdit()
+        self.__filter_edit.setPlaceholderText("Поиск: название, исполнитель, альбом")
+        self.__filter_edit.setClearButtonEnabled(True)
+        main_layout.addWidget(self.__filter_edit)
+
+        # Список треков: строки запрашиваются у модели только для видимой области
+        self.__model = PlaylistModel(self)
+        self.__track_list = QTableView()
+        self.__track_list.setModel(self.__model)
+        self.__track_list.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.__track_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.__track_list.setShowGrid(False)
+        self.__track_list.setWordWrap(False)
+        # Строки одной высоты: представлению не нужно измерять каждую строку
+        vertical_header = self.__track_list.verticalHeader()
+        vertical_header.hide()
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setDefaultSectionSize(self.fontMetrics().height() + 6)
+        horizontal_header = self.__track_list.horizontalHeader()
+        horizontal_header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        horizontal_header.setSectionResizeMode(PlaylistModel.DURATION, QHeaderView.ResizeMode.Fixed)
+        horizontal_header.resizeSection(PlaylistModel.DURATION, self.fontMetrics().horizontalAdvance("000:00") + 16)
+        # Сортировка щелчком по заголовку; третий щелчок возвращает порядок плейлиста
+        horizontal_header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        if hasattr(horizontal_header, "setSortIndicatorClearable"):  # Qt 6.1+
+            horizontal_header.setSortIndicatorClearable(True)
+        self.__track_list.setSortingEnabled(True)
         main_layout.addWidget(self.__track_list, 1)  # 1 - растягивается при изменении размеров
 
         # Кнопки управления плейлистом
@@ -44,17 +92,39 @@ class PlaylistView(QWidget):
 
         main_layout.addLayout(playlist_controls_layout)
 
+        # Прогресс импорта (скрыт, пока импорт не идет)
+        import_layout = QHBoxLayout()
+        self.__import_progress = QProgressBar()
+        self.__cancel_import_button = QPushButton("Отмена")
+        import_layout.addWidget(self.__import_progress, 1)
+        import_layout.addWidget(self.__cancel_import_button)
+        self.__import_progress.hide()
+        self.__cancel_import_button.hide()
+
+        main_layout.addLayout(import_layout)
+
     def __connect_signals(self):
         """Подключение сигналов"""
         # При выборе плейлиста
         self.__playlist_selector.currentIndexChanged.connect(self.__on_playlist_changed)
 
         # При двойном клике на треке
-        self.__track_list.itemDoubleClicked.connect(self.__on_track_double_clicked)
+        self.__track_list.doubleClicked.connect(self.__on_track_double_clicked)
+
+        # Изменения состава текущего плейлиста
+        self.__signals.playlist_changed.connect(self.__model.apply_change)
+        self.__signals.playlist_changed.connect(self.__on_tracks_changed)
+
+        # Изменения файлов на диске применяются в GUI-потоке
+        self.library_changed.connect(self.__on_library_changed)
+
+        # Поиск при каждом нажатии клавиши
+        self.__filter_edit.textChanged.connect(self.__apply_filter)
 
         # Кнопки управления плейлистом
         self.__add_track_button.clicked.connect(self.__add_track)
         self.__remove_track_button.clicked.connect(self.__remove_track)
+        self.__cancel_import_button.clicked.connect(self.cancel_import)
 
     def update_playlists(self):
         """Обновление списка плейлистов"""
@@ -70,14 +140,175 @@ class PlaylistView(QWidget):
             self.__playlist_selector.setCurrentIndex(current_index)
 
     def update_playlist(self):
-        """Обновление содержимого плейлиста"""
-        self.__track_list.clear()
+        """Показать текущий плейлист"""
+        started = metrics.start()
+        playlist = self.__player.get_current_playlist()
+        if self.__search_index is not None and self.__model.get_playlist() is not playlist:
+            self.__search_index.close()
+            self.__search_index = None
+        self.__model.set_playlist(playlist)
+        self.__apply_filter()
+        _PLAYLIST_REFRESH.observe_since(started)
 
-        current_playlist = self.__player.get_current_playlist()
-        if current_playlist:
-            for track in current_playlist.get_tracks():
-                item = QListWidgetItem(f"{track.artist} - {track.title} ({track.get_duration_str()})")
-                self.__track_list.addItem(item)
+    def __apply_filter(self):
+        """Показать треки, подходящие под строку поиска"""
+        self.__filter_pending = False
+        self.__remap_timer.stop()
+        playlist = self.__model.get_playlist()
+        query = self.__filter_edit.text()
+        if playlist is None or not query.strip():
+            if self.__model.is_remapped():
+                self.__model.set_filter(None)  # Заодно пересортировка после изменений плейлиста
+            return
+
+        if self.__search_index is None:
+            # Индекс строится один раз, дальше обновляется по изменениям плейлиста
+            # Модули поиска, обхода папок, импорта и слежения загружаются при первом
+            # использовании - окно плеера появляется без них
+            from core.search_index import SearchIndex
+            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+            try:
+                self.__search_index = SearchIndex(playlist)
+            finally:
+                QApplication.restoreOverrideCursor()
+        self.__model.set_filter(self.__search_index.search(query))
+
+    def __on_tracks_changed(self, playlist, kind, ranges):
+        """Состав плейлиста изменился: отфильтрованный или отсортированный список пересчитывается после всех обработчиков"""
+        if self.__model.is_remapped() and not self.__filter_pending:
+            self.__filter_pending = True
+            # Пакеты импорта приходят один за другим, а пересчет проходит весь плейлист -
+            # во время импорта он выполняется раз в REMAP_INTERVAL, а не на каждый пакет
+            self.__remap_timer.start(self.REMAP_INTERVAL if self.__import_worker is not None else 0)
+
+    def import_tracks(self, paths):
+        """
+        Импортировать треки в текущий плейлист в фоновом потоке.
+        Треки появляются в списке по мере разбора тегов
+        """
+        playlist = self.__player.get_current_playlist()
+        if playlist is None or not paths:
+            return
+
+        self.__import_queue.append((playlist, paths, (None, None)))
+        if self.__import_worker is None:
+            self.__start_next_import()
+
+    def import_folder(self, folder):
+        """
+        Импортировать все mp3-файлы папки и вложенных папок в текущий плейлист.
+        Пути передаются импорту по мере обхода
+        """
+        playlist = self.__player.get_current_playlist()
+        if playlist is None:
+            return
+
+        from core.library_scanner import LibraryScanner
+        scanner = LibraryScanner()
+        self.__import_queue.append((playlist, scanner.scan(folder), (scanner, folder)))
+        if self.__import_worker is None:
+            self.__start_next_import()
+
+    def cancel_import(self, wait=False):
+        """Отменить текущий и ожидающие импорты"""
+        self.__import_queue.clear()
+        if self.__scanner is not None:
+            self.__scanner.cancel()
+        if self.__import_worker is not None:
+            self.__import_worker.cancel()
+            if wait:
+                self.__import_worker.wait()
+
+    def __start_next_import(self):
+        """Запустить следующий импорт из очереди"""
+        if not self.__import_queue:
+            self.__import_worker = None
+            self.__scanner = None
+            self.__scanned_folder = None
+            self.__import_progress.hide()
+            self.__cancel_import_button.hide()
+            if self.__filter_pending:
+                self.__remap_timer.start(0)  # Импорт закончен - последние пакеты показываются сразу
+            return
+
+        from gui.import_worker import ImportWorker
+        playlist, paths, (self.__scanner, self.__scanned_folder) = self.__import_queue.pop(0)
+        self.__import_worker = ImportWorker(playlist, paths, self)
+        self.__import_worker.batch_ready.connect(self.__on_import_batch)
+        self.__import_worker.progress.connect(self.__on_import_progress)
+        self.__import_worker.finished.connect(self.__on_import_finished)
+
+        total = len(paths) if hasattr(paths, "__len__") else 0
+        self.__import_progress.setRange(0, total)
+        self.__import_progress.setValue(0)
+        self.__import_progress.setFormat("%p%")
+        self.__import_progress.show()
+        self.__cancel_import_button.show()
+        self.__import_worker.start()
+
+    def __on_import_batch(self, playlist, tracks):
+        """Обработчик готового пакета треков (выполняется в GUI-потоке)"""
+        if not self.__player.get_playlist_manager().has_playlist(playlist):
+            return  # Плейлист удален во время импорта
+
+        # Модель получит новые строки через событие изменения плейлиста
+        playlist.append_tracks(tracks)
+
+    def __on_import_progress(self, done, total):
+        """Обработчик прогресса импорта"""
+        if total < 0:
+            self.__import_progress.setRange(0, 0)  # Неизвестный объем - бегущий индикатор
+            if self.__scanner is not None:
+                self.__import_progress.setFormat(
+                    f"Найдено файлов: {self.__scanner.files} ({self.__scanner.files_per_second():.0f}/с), "
+                    f"импортировано: {done}")
+        else:
+            self.__import_progress.setValue(done)
+
+    def __on_import_finished(self):
+        """Обработчик завершения импорта"""
+        self.__import_worker.deleteLater()
+        scanner = self.__scanner
+        if scanner is not None and not scanner.is_cancelled():
+            if scanner.files == 0:
+                QMessageBox.information(self, "Информация", "В выбранной папке не найдены MP3 файлы.")
+            else:
+                self.__watch_folder(self.__scanned_folder, self.__import_worker.playlist)
+        self.__start_next_import()
+
+    def stop_watching(self):
+        """Остановить слежение за папками"""
+        if self.__watcher is not None:
+            self.__watcher.stop()
+            self.__watcher = None
+
+    def __watch_folder(self, folder, playlist):
+        """
+        Следить за импортированной папкой: переименования, удаления и новые файлы
+        попадают в плейлисты без повторного импорта (отключается MUSIC_PLAYER_WATCH=0)
+        """
+        from core.library_watcher import LibraryWatcher
+        if not LibraryWatcher.is_supported() or os.environ.get("MUSIC_PLAYER_WATCH") == "0":
+            return
+        if self.__watcher is None:
+            try:
+                self.__watcher = LibraryWatcher(self.__plan_library_changes)
+            except OSError as e:
+                print(f"Ошибка запуска слежения за папками: {e}")
+                return
+        self.__watcher.watch(folder, playlist)
+
+    def __plan_library_changes(self, changes):
+        """
+        Изменения файлов на диске (поток наблюдателя): поиск затронутых треков по всем
+        плейлистам выполняется здесь, потоку интерфейса остается только применить результат
+        """
+        plans = self.__player.get_playlist_manager().plan_library_changes(changes)
+        self.library_changed.emit(changes, plans)
+
+    def __on_library_changed(self, changes, plans):
+        """Обработчик изменений файлов на диске"""
+        self.__player.get_playlist_manager().apply_library_changes(changes, plans)
 
     def __on_playlist_changed(self, index):
         """Обработчик изменения выбранного плейлиста"""
@@ -85,11 +316,10 @@ class PlaylistView(QWidget):
             self.__player.set_current_playlist(index)
             self.update_playlist()
 
-    def __on_track_double_clicked(self, item):
+    def __on_track_double_clicked(self, model_index):
         """Обработчик двойного клика на треке"""
-        index = self.__track_list.row(item)
-        if index >= 0:
-            self.__player.set_track(index)
+        if model_index.isValid():
+            self.__player.set_track(self.__model.track_index(model_index.row()))
             self.__player.play()
 
     def __add_track(self):
@@ -102,24 +332,12 @@ class PlaylistView(QWidget):
 
         if file_dialog.exec():
             files = file_dialog.selectedFiles()
-            self.__player.add_tracks(files)
-            self.update_playlist()
+            self.import_tracks(files)
 
     def __remove_track(self):
-        """Удаление трека из плейлиста"""
-        selected_items = self.__track_list.selectedItems()
-        if selected_items:
-            # Получаем индексы выбранных элементов
-            indices = [self.__track_list.row(item) for item in selected_items]
-
-            # Сортируем по убыванию, чтобы удаление не влияло на индексы
-            indices.sort(reverse=True)
-
-            # Удаляем треки
-            current_playlist = self.__player.get_current_playlist()
-            if current_playlist:
-                for index in indices:
-                    current_playlist.remove_track(index)
-
-                # Обновляем отображение плейлиста
-                self.update_playlist()
\ No newline at end of file
+        """Удаление выбранных треков из плейлиста"""
+        selected_rows = self.__track_list.selectionModel().selectedRows()
+        current_playlist = self.__player.get_current_playlist()
+        if selected_rows and current_playlist:
+            # Один проход по плейлисту и одно событие; модель убирает строки по нему
+            current_playlist.remove_many(self.__model.track_index(index.row()) for index in selected_rows)
@@ -0,0 +1,122 @@
+# gui/spectrum_view.py
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import QTimer, QRectF
+from PyQt6.QtGui import QPainter, QPalette
+from core import metrics
+
+_SPECTRUM_PAINT = metrics.histogram("music_player_ui_refresh_seconds", "Обновление элементов интерфейса",
+                                    {"view": "spectrum"})
+
+
+class SpectrumView(QWidget):
+    """
+    Визуализатор спектра и уровней каналов звучащего трека.
+    Спектр считает SpectrumAnalyzer в своем потоке; виджет с частотой обновления экрана
+    сообщает ему, что играет, и забирает последний готовый кадр без ожидания -
+    перерисовка только при новом кадре. Таймер работает, пока идет воспроизведение
+    или спадают значения после остановки
+    """
+    LEVEL_WIDTH = 6  # Ширина полосы уровня канала
+    GAP = 2  # Промежуток между полосами
+
+    def __init__(self, player, signals, parent=None):
+        super().__init__(parent)
+        self.__player = player
+        self.__analyzer = None  # Создается в start(): NumPy не нужен для запуска плеера
+        self.__follow_position = False  # Источник PCM - декодер по позиции движка (pygame)
+        self.__sequence = 0  # Номер показанного кадра
+        self.__frame = None
+        self.__interval = 16  # Период таймера, мс (по частоте обновления экрана)
+        self.setMinimumHeight(60)
+        self.setMaximumHeight(100)
+
+        self.__timer = QTimer(self)
+        self.__timer.timeout.connect(self.__on_tick)
+        signals.state_changed.connect(self.__on_state_changed)
+
+    def start(self):
+        """Запустить анализатор (после первой отрисовки окна)"""
+        if self.__analyzer is not None:
+            return
+        # NumPy и декодер нужны только визуализации - при запуске плеера не импортируются
+        from core.spectrum import SpectrumAnalyzer, DecodingSource
+        source = self.__player.get_pcm_tap()
+        self.__follow_position = source is None
+        if source is None:
+            source = DecodingSource()
+        screen = self.screen()
+        fps = (screen.refreshRate() if screen else 0) or 60
+        self.__interval = max(1, round(1000 / fps))
+        self.__analyzer = SpectrumAnalyzer(source, fps)
+        self.__on_state_changed(self.__player.get_state())
+
+    def stop(self):
+        """Остановить поток анализатора (при закрытии окна)"""
+        self.__timer.stop()
+        if self.__analyzer is not None:
+            self.__analyzer.close()
+            self.__analyzer = None
+
+    def __on_state_changed(self, state):
+        """Запуск и остановка обновления вместе с воспроизведением"""
+        if self.__analyzer is None:
+            return
+        self.__report_playback()
+        if state == self.__player.STATE_PLAYING and self.isVisible() and not self.__timer.isActive():
+            self.__timer.start(self.__interval)
+
+    def __report_playback(self):
+        """Сообщить анализатору, что играет"""
+        track = self.__player.get_current_track()
+        playing = self.isVisible() and track is not None and self.__player.get_state() == self.__player.STATE_PLAYING
+        position = self.__player.get_position() if playing and self.__follow_position else 0
+        self.__analyzer.set_playback(track.path if track else None, position, playing)
+        return playing
+
+    def __on_tick(self):
+        """Тик таймера: положение для анализатора и новый кадр, если он готов"""
+        playing = self.__report_playback()
+        sequence, frame = self.__analyzer.latest()
+        if sequence != self.__sequence:
+            self.__sequence = sequence
+            self.__frame = frame
+            self.update()
+        elif not playing:
+            self.__timer.stop()  # Анализатор спал до нуля и уснул
+
+    def showEvent(self, event):
+        """Показанный виджет возобновляет обновление"""
+        super().showEvent(event)
+        if self.__analyzer is not None:
+            self.__on_state_changed(self.__player.get_state())
+
+    def hideEvent(self, event):
+        """Скрытый виджет не нагружает анализатор"""
+        super().hideEvent(event)
+        if self.__analyzer is not None:
+            self.__report_playback()
+
+    def paintEvent(self, event):
+        """Полосы спектра и справа - уровни каналов"""
+        if self.__frame is None:
+            return
+        started = metrics.start()
+        painter = QPainter(self)
+        palette = self.palette()
+        height = self.height()
+        bands, levels = self.__frame
+
+        levels_width = len(levels) * (self.LEVEL_WIDTH + self.GAP)
+        band_width = (self.width() - levels_width) / len(bands)
+        color = palette.color(QPalette.ColorRole.Highlight)
+        for index, value in enumerate(bands):
+            bar = value * height
+            painter.fillRect(QRectF(index * band_width, height - bar, max(1.0, band_width - self.GAP), bar), color)
+
+        color = palette.color(QPalette.ColorRole.Text)
+        for index, value in enumerate(levels):
+            bar = value * height
+            x = self.width() - levels_width + self.GAP + index * (self.LEVEL_WIDTH + self.GAP)
+            painter.fillRect(QRectF(x, height - bar, self.LEVEL_WIDTH, bar), color)
+        painter.end()
+        _SPECTRUM_PAINT.observe_since(started)
@@ -0,0 +1,121 @@
+# gui/waveform_loader.py
+import threading
+from collections import OrderedDict
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class _WaveformSignals(QObject):
+    """Сигналы фоновой задачи (QRunnable сам не может их объявлять)"""
+    ready = pyqtSignal(str, object)
+
+
+class _WaveformTask(QRunnable):
+    """
+    Фоновая задача: обзор формы волны из кэша метаданных, а если его нет - построение:
+    сначала предварительный обзор, затем промежуточные и полный результаты
+    """
+    def __init__(self, signals, path, cancelled):
+        super().__init__()
+        self.__signals = signals
+        self.__path = path
+        self.__cancelled = cancelled
+
+    def run(self):
+        """Выполнение задачи в пуле потоков"""
+        # NumPy и декодер нужны только здесь - при запуске плеера не импортируются
+        from core.waveform import Waveform, WaveformBuilder
+        try:
+            waveform = Waveform.load(self.__path)
+            if waveform is None:
+                waveform = self.__build(WaveformBuilder(self.__path, self.__cancelled.is_set))
+                if waveform is not None:
+                    waveform.save(self.__path)
+        except Exception as e:
+            print(f"Ошибка при построении обзора: {e}")
+            return
+        if waveform is not None and not self.__cancelled.is_set():
+            self.__signals.ready.emit(self.__path, waveform)
+
+    def __build(self, builder):
+        """Построение обзора с промежуточными результатами"""
+        preview = builder.preview()
+        if preview is not None and not self.__cancelled.is_set():
+            self.__signals.ready.emit(self.__path, preview)
+        return builder.build(lambda waveform: self.__signals.ready.emit(self.__path, waveform), preview)
+
+
+class WaveformLoader(QObject):
+    """
+    Загрузчик обзоров формы волны с LRU-кэшем готовых обзоров в памяти.
+    Одновременно строится один обзор: запрос другого трека отменяет текущее построение.
+    До start() запросы только запоминаются - построение не мешает запуску плеера
+    """
+    waveform_ready = pyqtSignal(str, object)  # Путь к треку и обзор (предварительный или полный)
+
+    def __init__(self, max_entries=16, parent=None):
+        super().__init__(parent)
+        self.__max_entries = max_entries
+        self.__cache = OrderedDict()
+        self.__started = False
+        self.__path = None  # Трек, обзор которого загружается
+        self.__cancelled = None  # Флаг отмены текущей задачи
+        self.__pool = QThreadPool(self)
+        self.__pool.setMaxThreadCount(1)
+        self.__signals = _WaveformSignals(self)
+        self.__signals.ready.connect(self.__on_ready)
+
+    def start(self):
+        """Разрешить загрузку; отложенный запрос запускается сразу"""
+        if not self.__started:
+            self.__started = True
+            if self.__path is not None:
+                self.__start_task()
+
+    def request(self, path):
+        """
+        Запросить обзор трека.
+        Возвращает полный обзор из памяти или None - тогда обзоры придут сигналом waveform_ready
+        """
+        if path in self.__cache:
+            self.__cache.move_to_end(path)
+            self.cancel()
+            return self.__cache[path]
+        if path == self.__path:
+            return None  # Уже загружается
+
+        self.cancel()
+        self.__path = path
+        if self.__started:
+            self.__start_task()
+        return None
+
+    def cancel(self):
+        """Отменить текущую загрузку"""
+        if self.__cancelled is not None:
+            self.__cancelled.set()
+            self.__cancelled = None
+        self.__path = None
+
+    def shutdown(self):
+        """Отменить загрузку и дождаться остановки фонового потока"""
+        self.cancel()
+        self.__started = False
+        self.__pool.waitForDone()
+
+    def __start_task(self):
+        """Запустить построение обзора для self.__path"""
+        self.__cancelled = threading.Event()
+        self.__pool.start(_WaveformTask(self.__signals, self.__path, self.__cancelled))
+
+    def __on_ready(self, path, waveform):
+        """Обработчик обзора из фоновой задачи (выполняется в GUI-потоке)"""
+        if path != self.__path:
+            return  # Запоздавший результат отмененной задачи
+        if waveform.complete:
+            self.__path = None
+            self.__cancelled = None
+            self.__cache[path] = waveform
+            self.__cache.move_to_end(path)
+            while len(self.__cache) > self.__max_entries:
+                self.__cache.popitem(last=False)
+        self.waveform_ready.emit(path, waveform)
@@ -0,0 +1,89 @@
+# gui/waveform_slider.py
+from PyQt6.QtWidgets import QSlider, QStyle, QStyleOptionSlider
+from PyQt6.QtCore import Qt, QLineF, QRect
+from PyQt6.QtGui import QPainter, QPixmap, QPen, QPalette, QColor
+
+
+class WaveformSlider(QSlider):
+    """
+    Полоса перемотки с обзором формы волны трека под ползунком.
+    Форма волны рисуется в картинку один раз на размер полосы (для сыгранной и оставшейся
+    части - своим цветом), при движении ползунка картинки только копируются
+    """
+    WAVEFORM_HEIGHT = 40  # Высота полосы с формой волны
+
+    def __init__(self, parent=None):
+        super().__init__(Qt.Orientation.Horizontal, parent)
+        self.__waveform = None
+        self.__images = None  # ((область, масштаб экрана), картинка сыгранной части, оставшейся части)
+        self.setMinimumHeight(self.WAVEFORM_HEIGHT)
+
+    def set_waveform(self, waveform):
+        """Показать обзор формы волны (None - убрать)"""
+        self.__waveform = waveform
+        self.__images = None
+        self.update()
+
+    def paintEvent(self, event):
+        """Форма волны под стандартной отрисовкой полосы"""
+        if self.__waveform is not None:
+            area, handle_x = self.__geometry()
+            key = (area, self.devicePixelRatioF())
+            if self.__images is None or self.__images[0] != key:
+                self.__images = (key, self.__render(area.size(), QPalette.ColorRole.Highlight),
+                                 self.__render(area.size(), QPalette.ColorRole.Mid))
+            _, played, remaining = self.__images
+            split = max(0, min(area.width(), handle_x - area.left()))
+            ratio = played.devicePixelRatio()
+            painter = QPainter(self)
+            painter.drawPixmap(QRect(area.left(), area.top(), split, area.height()), played,
+                               QRect(0, 0, round(split * ratio), played.height()))
+            painter.drawPixmap(QRect(area.left() + split, area.top(), area.width() - split, area.height()),
+                               remaining, QRect(round(split * ratio), 0, remaining.width() - round(split * ratio),
+                                                remaining.height()))
+            painter.end()
+        super().paintEvent(event)
+
+    def __geometry(self):
+        """
+        Область формы волны и координата центра ползунка: по горизонтали - путь центра
+        ползунка от начала до конца трека, по вертикали - вся высота полосы
+        """
+        option = QStyleOptionSlider()
+        self.initStyleOption(option)
+        groove = self.style().subControlRect(QStyle.ComplexControl.CC_Slider, option,
+                                             QStyle.SubControl.SC_SliderGroove, self)
+        handle = self.style().subControlRect(QStyle.ComplexControl.CC_Slider, option,
+                                             QStyle.SubControl.SC_SliderHandle, self)
+        left = groove.left() + handle.width() // 2
+        width = max(1, groove.width() - handle.width())
+        return QRect(left, 0, width, self.height()), handle.center().x()
+
+    def __render(self, size, role):
+        """Картинка формы волны размера size цветом из палитры"""
+        ratio = self.devicePixelRatioF()
+        columns = max(1, round(size.width() * ratio))
+        pixmap = QPixmap(columns, max(1, round(size.height() * ratio)))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        minimum, maximum = self.__waveform.columns(columns)
+        middle = size.height() / 2
+        amplitude = middle - 1
+        lines = []
+        for column in range(columns):
+            x = (column + 0.5) / ratio
+            top = middle - maximum[column] * amplitude
+            bottom = max(middle - minimum[column] * amplitude, top + 1 / ratio)  # Тишина - тонкая линия
+            lines.append(QLineF(x, top, x, bottom))
+
+        color = QColor(self.palette().color(role))
+        if not self.__waveform.complete:
+            color.setAlpha(128)  # Предварительный обзор - бледнее
+        pen = QPen(color)
+        pen.setWidthF(1 / ratio)
+        painter = QPainter(pixmap)
+        painter.setPen(pen)
+        painter.drawLines(lines)
+        painter.end()
+        return pixmap
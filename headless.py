@@ -0,0 +1,71 @@
+# headless.py
+"""
+Плеер без графического интерфейса (PyQt6 не загружается).
+Управляется через сокет Unix - см. core/control_server.py и playerctl.py.
+
+    python headless.py [--socket PATH] [--null] [--no-store]
+"""
+import argparse
+import signal
+import time
+from core import metrics
+from core.control_server import ControlServer
+from core.music_player import MusicPlayer
+from core.playlist_store import PlaylistStore
+
+UPDATE_INTERVAL = 0.05  # Период опроса движка во время воспроизведения, с
+IDLE_INTERVAL = 0.5  # Период опроса, когда ничего не играет, с
+AUTOSAVE_INTERVAL = 5.0  # Период сохранения изменений плейлистов, с
+METRICS_INTERVAL = 10.0  # Период выгрузки метрик в файл из MUSIC_PLAYER_METRICS, с
+
+
+def create_engine(null_output):
+    """Аудио-движок: по умолчанию как в GUI, с --null - без устройства вывода"""
+    if not null_output:
+        return None  # MusicPlayer выберет движок сам (MUSIC_PLAYER_ENGINE)
+    from core.audio_sink import NullSink
+    from core.stream_engine import StreamEngine
+    return StreamEngine(sink=NullSink())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", help="путь к сокету (по умолчанию MUSIC_PLAYER_SOCKET или XDG_RUNTIME_DIR)")
+    parser.add_argument("--null", action="store_true", help="выводить звук в никуда (без звуковой карты)")
+    parser.add_argument("--no-store", action="store_true", help="не загружать и не сохранять плейлисты")
+    args = parser.parse_args()
+
+    metrics.configure_from_environment()
+    store = None if args.no_store else PlaylistStore.open_default()
+    player = MusicPlayer(audio_engine=create_engine(args.null), store=store)
+    player.prepare_audio()
+    player.start_loudness_analysis()
+    player.start_cache_eviction()
+    server = ControlServer(player, args.socket or ControlServer.default_path())
+    print(f"Плеер слушает {server.path}")
+
+    # SIGTERM и Ctrl+C завершают цикл штатно: плейлисты сохраняются, сокет удаляется
+    signal.signal(signal.SIGTERM, lambda *_: server.stop())
+    signal.signal(signal.SIGINT, lambda *_: server.stop())
+
+    saved_at = exported_at = time.monotonic()
+    try:
+        while server.is_running():
+            server.poll(UPDATE_INTERVAL if player.get_state() == MusicPlayer.STATE_PLAYING else IDLE_INTERVAL)
+            player.update()
+            if time.monotonic() - saved_at >= AUTOSAVE_INTERVAL:
+                player.save_state()
+                saved_at = time.monotonic()
+            if time.monotonic() - exported_at >= METRICS_INTERVAL:
+                metrics.flush()
+                exported_at = time.monotonic()
+    finally:
+        server.close()
+        player.stop()
+        player.save_state()
+        player.close()
+        metrics.flush()
+
+
+if __name__ == "__main__":
+    main()
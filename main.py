@@ -1,14 +1,26 @@
 # main.py
+import locale
 import sys
 from PyQt6.QtWidgets import QApplication
 from gui.main_window import MainWindow
 from core.music_player import MusicPlayer
+from core.playlist_store import PlaylistStore
+from core import metrics
 
 def main():
     app = QApplication(sys.argv)
 
-    # Создаем экземпляр плеера
-    player = MusicPlayer()
+    # Строки сортируются по правилам языка пользователя
+    try:
+        locale.setlocale(locale.LC_COLLATE, "")
+    except locale.Error:
+        pass
+
+    # Метрики собираются, если задана переменная MUSIC_PLAYER_METRICS
+    metrics.configure_from_environment()
+
+    # Создаем экземпляр плеера; плейлисты прошлого запуска загружаются из хранилища
+    player = MusicPlayer(store=PlaylistStore.open_default())
 
     # Создаем главное окно и передаем плеер
     window = MainWindow(player)
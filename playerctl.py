@@ -0,0 +1,60 @@
+# playerctl.py
+"""
+Управление плеером, запущенным через headless.py.
+
+    python playerctl.py status
+    python playerctl.py play [номер трека]
+    python playerctl.py pause | stop | next | previous | shutdown
+    python playerctl.py seek СЕКУНДЫ
+    python playerctl.py volume 0-100
+    python playerctl.py enqueue ФАЙЛ [ФАЙЛ ...]
+    python playerctl.py metrics [prometheus]
+"""
+import argparse
+import json
+import os
+import sys
+from core.control_client import ControlClient
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", help="путь к сокету плеера")
+    parser.add_argument("command", choices=("status", "play", "pause", "stop", "next", "previous",
+                                            "seek", "volume", "enqueue", "metrics", "shutdown"))
+    parser.add_argument("arguments", nargs="*")
+    args = parser.parse_args()
+
+    request = {}
+    try:
+        if args.command == "play" and args.arguments:
+            request["index"] = int(args.arguments[0])
+        elif args.command == "seek":
+            request["position"] = float(args.arguments[0])
+        elif args.command == "volume":
+            request["volume"] = int(args.arguments[0])
+        elif args.command == "enqueue":
+            # Сервер может быть запущен в другом каталоге - передаем абсолютные пути
+            request["paths"] = [os.path.abspath(path) for path in args.arguments]
+        elif args.command == "metrics" and args.arguments:
+            request["format"] = args.arguments[0]
+    except (IndexError, ValueError):
+        parser.error(f"неверные аргументы команды {args.command}")
+
+    try:
+        with ControlClient(args.socket) as client:
+            response = client.request(args.command, **request)
+    except OSError as e:
+        print(f"Плеер недоступен: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    if args.command == "metrics" and isinstance(response.get("result"), str):
+        print(response["result"], end="")
+    else:
+        print(json.dumps(response, ensure_ascii=False, indent=2))
+    if not response.get("ok"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()